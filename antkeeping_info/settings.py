@@ -282,6 +282,20 @@ CONTACT_RECIPIENT_EMAIL = env("CONTACT_RECIPIENT_EMAIL")
 # Social links
 DISCORD_URL = env("DISCORD_URL", default="https://discord.gg/xuuQnGt")
 
+# Geocoding
+# Provider used by flights.geocoding. OfflineGeocodingProvider answers from
+# the JSON file set in GEOCODING_OFFLINE_FILE and never hits the network.
+GEOCODING_PROVIDER = env(
+    "GEOCODING_PROVIDER", default="flights.geocoding.BingGeocodingProvider"
+)
+GEOCODING_OFFLINE_FILE = env("GEOCODING_OFFLINE_FILE", default=None)
+BING_API_KEY_SERVER = env("BING_API_KEY_SERVER", default="")
+# Cached geocoding results expire after this many days. The evict_geocoding_cache
+# command deletes them and the least recently used ones beyond
+# GEOCODING_CACHE_MAX_ENTRIES.
+GEOCODING_CACHE_TTL_DAYS = env.int("GEOCODING_CACHE_TTL_DAYS", default=180)
+GEOCODING_CACHE_MAX_ENTRIES = env.int("GEOCODING_CACHE_MAX_ENTRIES", default=50000)
+
 # prod settings
 
 if not DEBUG:
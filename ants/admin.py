@@ -18,6 +18,7 @@ from ants.models import (
     InvalidName,
     RatingPhoto,
     SpeciesDifficultyRating,
+    SpeciesFoodAcceptance,
     SpeciesFoodRating,
     SpeciesDescription,
     SubFamily,
@@ -253,6 +254,13 @@ class FoodItemAdmin(AdminImageMixin, admin.ModelAdmin):
                 else:
                     loser_sub.delete()
 
+            # bulk updates of the links do not send post_save, the aggregates
+            # of the losers are deleted together with them
+            SpeciesFoodAcceptance.objects.update_pairs(
+                SpeciesFoodRating.objects.filter(food_item=survivor).values_list(
+                    "species_id", "food_item_id"
+                )
+            )
             FoodItem.objects.filter(pk__in=loser_ids).delete()
 
         self.message_user(
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AntsConfig(AppConfig):
     name = "ants"
+
+    def ready(self):
+        from . import signals  # noqa: F401
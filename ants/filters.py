@@ -1,7 +1,8 @@
 import django_filters
 from django_filters import BooleanFilter, CharFilter, NumberFilter
 
-from .models import AntSize, AntSpecies
+from . import region_resolver
+from .models import AntRegion, AntSize, AntSpecies
 
 
 class AntSpeciesFilter(django_filters.FilterSet):
@@ -14,6 +15,10 @@ class AntSpeciesFilter(django_filters.FilterSet):
         method="filter_by_region",
         label="Filter by region code (e.g. de, de-by) or region ID.",
     )
+    include_descendants = BooleanFilter(
+        method="filter_include_descendants",
+        label="Include the species of all regions below the region (true/false).",
+    )
     forbidden_in_eu = BooleanFilter(
         label="Filter by EU import restriction status.",
     )
@@ -76,13 +81,17 @@ class AntSpeciesFilter(django_filters.FilterSet):
         fields = []
 
     def filter_by_region(self, queryset, name, value):
-        try:
-            int(value)
-            return queryset.filter(distribution__region__pk=value).distinct()
-        except ValueError:
-            return queryset.filter(
-                distribution__region__code__iexact=value
-            ).distinct()
+        region = region_resolver.resolve(value)
+        if region is None:
+            return queryset.none()
+        if self.form.cleaned_data.get("include_descendants"):
+            region_ids = AntRegion.objects.with_descendants(region.id).values("pk")
+            return queryset.filter(distribution__region_id__in=region_ids).distinct()
+        return queryset.filter(distribution__region_id=region.id).distinct()
+
+    def filter_include_descendants(self, queryset, name, value):
+        # applied by filter_by_region
+        return queryset
 
     def filter_by_genus(self, queryset, name, value):
         try:
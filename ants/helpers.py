@@ -1,3 +1,5 @@
+from django.db.models import F
+
 DEFAULT_NONE_STR = "No information."
 DEFAULT_NONE_RANGE_STR = "?"
 
@@ -26,3 +28,28 @@ def format_integer_range(int_range, unit_symbol):
     return format_min_max_integer_range(
         int_range.lower, int_range.upper - 1, unit_symbol
     )
+
+
+def flight_months_to_mask(month_ids):
+    """Return the bitmask of flight month ids (bit 0 is January)."""
+    mask = 0
+    for month_id in month_ids:
+        mask |= 1 << (month_id - 1)
+    return mask
+
+
+def flight_months_from_mask(mask):
+    """Return the sorted flight month ids of a bitmask."""
+    return [month_id for month_id in range(1, 13) if mask & (1 << (month_id - 1))]
+
+
+def filter_by_flight_month(queryset, month_id):
+    """
+    Filter an AntSpecies queryset by species flying in a specific month
+    using the flight months bitmask.
+    """
+    if not 1 <= month_id <= 12:
+        return queryset.none()
+    return queryset.alias(
+        flight_month_bit=F("flight_months_mask").bitand(1 << (month_id - 1))
+    ).filter(flight_month_bit__gt=0)
@@ -0,0 +1,90 @@
+import random
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from ants.models import AntRegion, AntSpecies, Distribution, Genus, Month
+from ants.views import NuptialFlightTableRowsView
+
+
+class _Rollback(Exception):
+    pass
+
+
+QUERIES = (
+    {},
+    {"month": "6"},
+    {"month": "6", "country": "bm"},
+    {"month": "6", "name": "species1"},
+    {"page": "20"},
+    {"month": "7", "print": "1"},
+)
+
+
+class Command(BaseCommand):
+    """
+    The command creates synthetic species with flight months inside a
+    transaction, measures the nuptial flight table rows view for some
+    filter combinations and rolls everything back.
+    """
+
+    help = "Benchmarks the nuptial flight table rows view on synthetic data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--species",
+            type=int,
+            default=3000,
+            help="Number of synthetic species (default: 3000).",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _create_species(self, count):
+        rng = random.Random(0)
+        for month_id in range(1, 13):
+            Month.objects.get_or_create(id=month_id, defaults={"name": str(month_id)})
+        country = AntRegion.objects.create(
+            name="Benchmarkland", code="bm", type="Country"
+        )
+        genus = Genus.objects.create(name="Benchmarkgenus")
+        for i in range(count):
+            species = AntSpecies.objects.create(
+                name=f"Benchmarkgenus species{i}", genus=genus, valid=True
+            )
+            species.flight_months.set(rng.sample(range(1, 13), rng.randint(1, 4)))
+            if rng.random() < 0.5:
+                Distribution.objects.create(species=species, region=country)
+
+    def _measure(self, params, repeat):
+        view = NuptialFlightTableRowsView.as_view()
+        request = RequestFactory().get("/", params)
+        best = None
+        for _ in range(repeat):
+            # the query log is full after creating the synthetic data
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                view(request)
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._create_species(options["species"])
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                for params in QUERIES:
+                    seconds, query_count = self._measure(params, options["repeat"])
+                    label = "&".join(f"{k}={v}" for k, v in params.items()) or "-"
+                    self.stdout.write(
+                        f"{label:<28} {seconds * 1000:>8.1f} ms "
+                        f"{query_count:>3} queries"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,79 @@
+import time
+import tracemalloc
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from ants.models import AntRegion, AntSpecies, Distribution, Genus
+from ants.views import TaxonomicRanksByRegion
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    The command creates synthetic species of a country inside a
+    transaction, measures the time to the first byte, the total time and
+    the peak memory of the species exports of TaxonomicRanksByRegion and
+    rolls everything back.
+    """
+
+    help = "Benchmarks the species exports of a region on synthetic data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--species",
+            type=int,
+            default=20000,
+            help="Number of synthetic species (default: 20000).",
+        )
+        parser.add_argument("--formats", nargs="+", default=["csv", "json", "ndjson"])
+
+    def _create_species(self, count):
+        country = AntRegion.objects.create(
+            name="Benchmarkland", code="bm", type="Country"
+        )
+        genus = Genus.objects.create(name="Benchmarkgenus")
+        for i in range(count):
+            species = AntSpecies.objects.create(
+                name=f"Benchmarkgenus species{i}", genus=genus, valid=True
+            )
+            Distribution.objects.create(species=species, region=country)
+
+    def _measure(self, fmt):
+        view = TaxonomicRanksByRegion.as_view()
+        request = RequestFactory().get("/", {"country": "bm", "export": fmt})
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = view(request, taxonomic_rank="species")
+        content = iter(
+            response.streaming_content if response.streaming else [response.content]
+        )
+        size = len(next(content))
+        first_byte = time.perf_counter() - start
+        size += sum(len(block) for block in content)
+        total = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return first_byte, total, peak, size
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._create_species(options["species"])
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                for fmt in options["formats"]:
+                    first_byte, total, peak, size = self._measure(fmt)
+                    self.stdout.write(
+                        f"{fmt:<8} first byte {first_byte * 1000:>8.1f} ms, "
+                        f"total {total * 1000:>8.1f} ms, "
+                        f"peak memory {peak / 1024:>8.0f} KiB, "
+                        f"{size / 1024:>6.0f} KiB"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
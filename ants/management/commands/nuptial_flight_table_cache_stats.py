@@ -0,0 +1,30 @@
+from django.core.management import BaseCommand
+
+from ants import nuptial_flight_table
+
+
+class Command(BaseCommand):
+    """
+    The command prints the number of cache hits and misses of the rows of
+    the nuptial flight table.
+    """
+
+    help = "Prints the cache hits and misses of the nuptial flight table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Reset the numbers after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        stats = nuptial_flight_table.cache_stats()
+        requests = stats["hits"] + stats["misses"]
+        hit_rate = stats["hits"] / requests * 100 if requests else 0
+        self.stdout.write(
+            f"Hits: {stats['hits']}, misses: {stats['misses']}, "
+            f"hit rate: {hit_rate:.1f} %"
+        )
+        if options["reset"]:
+            nuptial_flight_table.reset_cache_stats()
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from ants.models import SpeciesDifficultyAggregate
+
+
+class Command(BaseCommand):
+    """
+    The command recomputes the difficulty rating aggregates of all species
+    from the difficulty ratings.
+    """
+
+    help = "Rebuilds the difficulty rating aggregates of the ant species."
+
+    def handle(self, *args, **options):
+        row_count = SpeciesDifficultyAggregate.objects.rebuild()
+        self.stdout.write(f"Difficulty aggregates rebuilt ({row_count} rows).")
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from ants.models import SpeciesFoodAcceptance
+
+
+class Command(BaseCommand):
+    """
+    The command recomputes the food acceptance aggregates of all species
+    and the rollups of all food items from the food ratings.
+    """
+
+    help = "Rebuilds the food acceptance aggregates of the food database."
+
+    def handle(self, *args, **options):
+        row_count = SpeciesFoodAcceptance.objects.rebuild()
+        self.stdout.write(f"Food acceptance aggregates rebuilt ({row_count} rows).")
@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+
+from ants import rankings
+
+
+class Command(BaseCommand):
+    """
+    The command computes all rankings of the antdb top lists and stores
+    them as snapshot of the current data version.
+    """
+
+    help = "Rebuilds the ranking snapshot of the antdb top lists."
+
+    def handle(self, *args, **options):
+        computed = rankings.rebuild()
+        entries = sum(len(entries) for entries in computed.values())
+        self.stdout.write(f"Rankings rebuilt ({entries} entries).")
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from ants.models import AntRegionCapabilities
+
+
+class Command(BaseCommand):
+    """
+    The command recomputes the capabilities of all ant regions from the
+    distributions of the species.
+    """
+
+    help = "Rebuilds the region capabilities used by the region selectors."
+
+    def handle(self, *args, **options):
+        row_count = AntRegionCapabilities.objects.rebuild()
+        self.stdout.write(f"Region capabilities rebuilt ({row_count} rows).")
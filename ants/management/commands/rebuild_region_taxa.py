@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from ants.models import RegionTaxon
+
+
+class Command(BaseCommand):
+    """
+    The command rebuilds the denormalized species per region rows used by
+    the listings of taxonomic ranks by region.
+    """
+
+    help = "Rebuilds the region taxa from all distributions."
+
+    def handle(self, *args, **options):
+        row_count = RegionTaxon.objects.rebuild()
+        self.stdout.write(f"Region taxa rebuilt ({row_count} rows).")
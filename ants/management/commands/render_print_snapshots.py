@@ -0,0 +1,58 @@
+from django.core.management import BaseCommand
+
+from ants import nuptial_flight_table
+from ants.models import AntRegion, NuptialFlightPrintSnapshot
+from ants.views import render_nuptial_flight_print
+
+
+class Command(BaseCommand):
+    """
+    The command renders the print view of the nuptial flight table for all
+    countries with flight data and all months. Snapshots which were
+    invalidated by changes are rendered again. It is meant to be run
+    regularly in the background.
+    """
+
+    help = "Renders the print snapshots of the nuptial flight table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Render all snapshots again, not only the missing ones.",
+        )
+
+    def handle(self, *args, **options):
+        regions = [None] + list(AntRegion.countries.with_flight_data().order_by("name"))
+        existing = set()
+        if not options["all"]:
+            snapshots = NuptialFlightPrintSnapshot.objects.values_list(
+                "region_id", "month", "data_version"
+            )
+            existing = {
+                (region_id, month)
+                for region_id, month, version in snapshots
+                if version == nuptial_flight_table.print_snapshot_version(region_id)
+            }
+
+        rendered = 0
+        for region in regions:
+            region_id = region.pk if region else None
+            for month in [None, *range(1, 13)]:
+                if (region_id, month) in existing:
+                    continue
+                filters = {
+                    "name": "",
+                    "month": str(month) if month else "all",
+                    "country": str(region_id) if region else "all",
+                    "state": "all",
+                    "page": 1,
+                }
+                version = nuptial_flight_table.print_snapshot_version(region_id)
+                html = render_nuptial_flight_print(filters)
+                nuptial_flight_table.store_print_snapshot(
+                    region_id, month, html, version
+                )
+                rendered += 1
+
+        self.stdout.write(f"Rendered {rendered} print snapshots.")
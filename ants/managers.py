@@ -2,9 +2,31 @@
 Module which stores all the mangers of ant app.
 """
 
+from collections import defaultdict
+
 from django.apps import apps
-from django.db import transaction
-from django.db.models import Manager, Q
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, Manager, Q, Sum, Value, When
+from django.utils import timezone
+
+from ants.helpers import flight_months_to_mask
+
+# namespaces of the advisory locks taken while aggregates are recomputed
+FOOD_ITEM_LOCK_NAMESPACE = 1
+REGION_LOCK_NAMESPACE = 2
+
+
+def _advisory_lock(namespace, ids):
+    """
+    Lock the ids of a namespace until the current transaction ends. The ids
+    are locked in ascending order, so concurrent transactions cannot
+    deadlock on them.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, id) FROM unnest(%s::integer[]) AS id",
+            [namespace, sorted(ids)],
+        )
 
 
 class TaxonomicRankManager(Manager):
@@ -45,6 +67,32 @@ class GenusManager(TaxonomicRankManager):
 class AntSpeciesManager(TaxonomicRankManager):
     """Manager for AntSpeciesModel."""
 
+    def update_flight_months_masks(self, species_ids):
+        """
+        Recompute the flight_months_mask of the species from their
+        flight_months and return the new masks by species id.
+        """
+        species_ids = list(species_ids)
+        if not species_ids:
+            return {}
+        month_ids = defaultdict(list)
+        through = self.model.flight_months.through
+        for species_id, month_id in through.objects.filter(
+            antspecies_id__in=species_ids
+        ).values_list("antspecies_id", "month_id"):
+            month_ids[species_id].append(month_id)
+        masks = {
+            species_id: flight_months_to_mask(month_ids[species_id])
+            for species_id in species_ids
+        }
+        self.get_queryset().filter(pk__in=species_ids).update(
+            flight_months_mask=Case(
+                *[When(pk=pk, then=Value(mask)) for pk, mask in masks.items()],
+                default=Value(0),
+            )
+        )
+        return masks
+
     @transaction.atomic
     def add_with_name(self, name, genus_model=None):
         """
@@ -185,7 +233,17 @@ class AntRegionManager(Manager):
 
     def with_ants(self):
         """Returns all regions in which ants live"""
-        return self.get_queryset().filter(distribution__isnull=False).distinct()
+        return self.get_queryset().filter(capabilities__has_ants=True)
+
+    def with_flight_data(self):
+        """Returns all regions in which ants with known flight months live"""
+        return self.get_queryset().filter(capabilities__has_flight_data=True)
+
+    def with_descendants(self, region_id):
+        """Returns the region with the given id and all regions below it"""
+        return self.get_queryset().filter(
+            Q(pk=region_id) | Q(ancestor_ids__contains=[region_id])
+        )
 
     def get_by_name(self, name):
         """Return a region by name."""
@@ -202,15 +260,391 @@ class AntRegionManager(Manager):
     def get_by_id_or_code(self, id_code):
         """
         Returns a region (or None if not found)
-        by id or code.
+        by id, code or slug.
         """
-        try:
-            id = int(id_code)
-            filter = Q(id=id)
-        except ValueError:
-            filter = Q(code=id_code)
+        from ants import region_resolver
+
+        region = region_resolver.resolve(id_code)
+        if region is None:
+            return None
+        return self.get_queryset().filter(id=region.id).first()
+
+
+class AntRegionCapabilitiesManager(Manager):
+    """Manager for AntRegionCapabilities model."""
+
+    def update_regions(self, region_ids):
+        """
+        Recompute the capabilities of the regions from their distributions.
+        Regions without ants have no capabilities row.
+        """
+        region_ids = set(region_ids) - {None}
+        if not region_ids:
+            return
+        distribution_model = apps.get_model("ants", "Distribution")
+        with transaction.atomic():
+            # the distributions are read after concurrent updates of the
+            # regions committed, so their results cannot be overwritten
+            _advisory_lock(REGION_LOCK_NAMESPACE, region_ids)
+            counts = (
+                distribution_model.objects.filter(region_id__in=region_ids)
+                .values("region_id")
+                .annotate(
+                    species_count=Count("species_id"),
+                    flight_species_count=Count(
+                        "species_id", filter=Q(species__flight_months_mask__gt=0)
+                    ),
+                )
+            )
+            capabilities = [
+                self.model(
+                    region_id=row["region_id"],
+                    has_ants=True,
+                    has_flight_data=row["flight_species_count"] > 0,
+                    species_count=row["species_count"],
+                    flight_species_count=row["flight_species_count"],
+                )
+                for row in counts
+            ]
+            self.get_queryset().filter(region_id__in=region_ids).exclude(
+                region_id__in=[c.region_id for c in capabilities]
+            ).delete()
+            self.bulk_create(
+                capabilities,
+                update_conflicts=True,
+                unique_fields=["region"],
+                update_fields=[
+                    "has_ants",
+                    "has_flight_data",
+                    "species_count",
+                    "flight_species_count",
+                ],
+            )
+
+    def add_distribution(self, region_id, species_id, count=1):
+        """
+        Add (or remove if count is negative) a distribution of a species to
+        the capabilities of a region.
+        """
+        if region_id is None:
+            return
+        species_model = apps.get_model("ants", "AntSpecies")
+        has_flight_data = species_model.objects.filter(
+            pk=species_id, flight_months_mask__gt=0
+        ).exists()
+        flight_count = count if has_flight_data else 0
+        with transaction.atomic():
+            _advisory_lock(REGION_LOCK_NAMESPACE, [region_id])
+            if count > 0:
+                self.bulk_create(
+                    [self.model(region_id=region_id, has_ants=True)],
+                    ignore_conflicts=True,
+                )
+            qs = self.get_queryset().filter(region_id=region_id)
+            qs.update(
+                species_count=F("species_count") + count,
+                flight_species_count=F("flight_species_count") + flight_count,
+                # compares the flight species count before the update
+                has_flight_data=Case(
+                    When(flight_species_count__gt=-flight_count, then=Value(True)),
+                    default=Value(False),
+                ),
+            )
+            if count < 0:
+                qs.filter(species_count__lte=0).delete()
+
+    def update_species_regions(self, species_ids):
+        """Recompute the capabilities of all regions of the species."""
+        distribution_model = apps.get_model("ants", "Distribution")
+        self.update_regions(
+            distribution_model.objects.filter(species_id__in=species_ids)
+            .values_list("region_id", flat=True)
+            .distinct()
+        )
+
+    def rebuild(self):
+        """Recompute the capabilities of all regions."""
+        distribution_model = apps.get_model("ants", "Distribution")
+        with transaction.atomic():
+            self.get_queryset().delete()
+            self.update_regions(
+                distribution_model.objects.values_list(
+                    "region_id", flat=True
+                ).distinct()
+            )
+        return self.get_queryset().count()
+
+
+class RegionTaxonManager(Manager):
+    """Manager for RegionTaxon model."""
+
+    _DISTRIBUTION_FIELDS = {
+        "region_id": "region_id",
+        "species_id": "species_id",
+        "species_name": "species__name",
+        "species_slug": "species__slug",
+        "forbidden_in_eu": "species__forbidden_in_eu",
+        "genus_name": "species__genus__name",
+        "genus_slug": "species__genus__slug",
+        "tribe_name": "species__genus__tribe__name",
+        "tribe_slug": "species__genus__tribe__slug",
+        "sub_family_name": "species__genus__tribe__sub_family__name",
+        "sub_family_slug": "species__genus__tribe__sub_family__slug",
+    }
+
+    def _insert_from_distributions(self, distributions):
+        rows = distributions.values_list(*self._DISTRIBUTION_FIELDS.values())
+        return self.bulk_create(
+            [self.model(**dict(zip(self._DISTRIBUTION_FIELDS, row))) for row in rows],
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["region", "species"],
+            update_fields=list(self._DISTRIBUTION_FIELDS)[2:],
+        )
+
+    def update_distribution(self, species_id, region_id):
+        """
+        Insert, update or delete the row of a species in a region depending
+        on whether the species is distributed in the region.
+        """
+        distribution_model = apps.get_model("ants", "Distribution")
+        with transaction.atomic():
+            if not self._insert_from_distributions(
+                distribution_model.objects.filter(
+                    species_id=species_id, region_id=region_id
+                )
+            ):
+                self.get_queryset().filter(
+                    species_id=species_id, region_id=region_id
+                ).delete()
+
+    def update_species(self, species_ids):
+        """
+        Rebuild the rows of the species, e.g. after a species or one of its
+        higher taxonomic ranks was renamed.
+        """
+        species_ids = list(species_ids)
+        if not species_ids:
+            return
+        distribution_model = apps.get_model("ants", "Distribution")
+        with transaction.atomic():
+            self.get_queryset().filter(species_id__in=species_ids).delete()
+            self._insert_from_distributions(
+                distribution_model.objects.filter(species_id__in=species_ids)
+            )
+
+    def rebuild(self):
+        """Rebuild all rows from the distributions."""
+        distribution_model = apps.get_model("ants", "Distribution")
+        with transaction.atomic():
+            self.get_queryset().delete()
+            self._insert_from_distributions(distribution_model.objects.all())
+        return self.get_queryset().count()
+
+
+class SpeciesDifficultyAggregateManager(Manager):
+    """Manager for SpeciesDifficultyAggregate model."""
+
+    @transaction.atomic
+    def add_ratings(self, species_id, difficulty, count=1):
+        """
+        Add (or remove if count is negative) ratings of a difficulty to the
+        aggregate of a species.
+        """
+        if count > 0:
+            self.bulk_create([self.model(species_id=species_id)], ignore_conflicts=True)
+        level_field = self.model.LEVEL_FIELDS[difficulty]
+        qs = self.get_queryset().filter(species_id=species_id)
+        qs.update(
+            **{level_field: F(level_field) + count},
+            difficulty_sum=F("difficulty_sum") + difficulty * count,
+            total=F("total") + count,
+        )
+        if count < 0:
+            qs.filter(total__lte=0).delete()
+
+    def _aggregate_ratings(self, ratings):
+        counts = {
+            field: Count("id", filter=Q(difficulty=level))
+            for level, field in self.model.LEVEL_FIELDS.items()
+        }
+        rows = (
+            ratings.order_by()
+            .values("species_id")
+            .annotate(difficulty_sum=Sum("difficulty"), total=Count("id"), **counts)
+        )
+        return [self.model(**row) for row in rows]
+
+    def rebuild(self, species_ids=None):
+        """Rebuild the aggregates of the species or of all species."""
+        rating_model = apps.get_model("ants", "SpeciesDifficultyRating")
+        ratings = rating_model.objects.all()
+        aggregates = self.get_queryset()
+        if species_ids is not None:
+            ratings = ratings.filter(species_id__in=species_ids)
+            aggregates = aggregates.filter(species_id__in=species_ids)
+        with transaction.atomic():
+            aggregates.delete()
+            return len(self.bulk_create(self._aggregate_ratings(ratings)))
+
+
+class SpeciesFoodRatingManager(Manager):
+    """Manager for SpeciesFoodRating model."""
+
+    def link_submission(self, species_ids, food_item_id, user_id, submission_id):
+        """
+        Point the ratings of a user for the species and a food item at a
+        submission, creating the missing ones, with a single upsert. The
+        signal receivers of the ratings are not called.
+
+        Returns the ids of the submissions which lost a rating. They are
+        selected by the subquery of RETURNING which still sees the rows
+        before the upsert.
+        """
+        # sorted to lock the rows in the same order in concurrent upserts
+        species_ids = sorted(set(species_ids))
+        if not species_ids:
+            return set()
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} AS link (
+                    species_id, food_item_id, user_id, submission_id,
+                    created_at, updated_at
+                )
+                SELECT species_id, %s, %s, %s, %s, %s
+                FROM unnest(%s::bigint[]) AS species_id
+                ON CONFLICT (species_id, food_item_id, user_id) DO UPDATE
+                SET submission_id = EXCLUDED.submission_id,
+                    updated_at = EXCLUDED.updated_at
+                WHERE link.submission_id <> EXCLUDED.submission_id
+                RETURNING (
+                    SELECT previous.submission_id
+                    FROM {table} AS previous
+                    WHERE previous.id = link.id
+                )
+                """,
+                [food_item_id, user_id, submission_id, now, now, species_ids],
+            )
+            return {row[0] for row in cursor.fetchall() if row[0] is not None}
+
+
+class SpeciesFoodAcceptanceManager(Manager):
+    """Manager for SpeciesFoodAcceptance model."""
+
+    def _aggregate_ratings(self, ratings):
+        rows = (
+            ratings.order_by()
+            .values("species_id", "food_item_id")
+            .annotate(
+                rating_count=Count("id"), acceptance_sum=Sum("submission__acceptance")
+            )
+        )
+        return [self.model(**row) for row in rows]
+
+    def update_pairs(self, pairs):
+        """
+        Recompute the aggregates of the (species id, food item id) pairs
+        from the food ratings and the rollups of their food items.
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return
+        rating_model = apps.get_model("ants", "SpeciesFoodRating")
+        species_ids = {species_id for species_id, _ in pairs}
+        food_item_ids = {food_item_id for _, food_item_id in pairs}
+        with transaction.atomic():
+            # the ratings are read after concurrent updates of the food items
+            # committed, so their results cannot be overwritten by stale ones
+            _advisory_lock(FOOD_ITEM_LOCK_NAMESPACE, food_item_ids)
+            aggregates = [
+                aggregate
+                for aggregate in self._aggregate_ratings(
+                    rating_model.objects.filter(
+                        species_id__in=species_ids, food_item_id__in=food_item_ids
+                    )
+                )
+                if (aggregate.species_id, aggregate.food_item_id) in pairs
+            ]
+            rated_pairs = {(a.species_id, a.food_item_id) for a in aggregates}
+            unrated = Q()
+            for species_id, food_item_id in pairs - rated_pairs:
+                unrated |= Q(species_id=species_id, food_item_id=food_item_id)
+            if unrated:
+                self.get_queryset().filter(unrated).delete()
+            self.bulk_create(
+                aggregates,
+                update_conflicts=True,
+                unique_fields=["species", "food_item"],
+                update_fields=["rating_count", "acceptance_sum"],
+            )
+            apps.get_model("ants", "FoodItemAcceptance").objects.update_food_items(
+                food_item_ids
+            )
+
+    def update_submissions(self, submission_ids):
+        """Recompute the aggregates of all pairs rated by the submissions."""
+        rating_model = apps.get_model("ants", "SpeciesFoodRating")
+        self.update_pairs(
+            rating_model.objects.filter(submission_id__in=submission_ids).values_list(
+                "species_id", "food_item_id"
+            )
+        )
+
+    def rebuild(self):
+        """Rebuild all aggregates and rollups from the food ratings."""
+        rating_model = apps.get_model("ants", "SpeciesFoodRating")
+        with transaction.atomic():
+            self.get_queryset().delete()
+            row_count = len(
+                self.bulk_create(self._aggregate_ratings(rating_model.objects.all()))
+            )
+            apps.get_model("ants", "FoodItemAcceptance").objects.rebuild()
+        return row_count
+
+
+class FoodItemAcceptanceManager(Manager):
+    """Manager for FoodItemAcceptance model."""
+
+    def _rollups(self, acceptances):
+        rows = (
+            acceptances.order_by()
+            .values("food_item_id")
+            .annotate(
+                species_count=Count("species_id"),
+                rating_count=Sum("rating_count"),
+                acceptance_sum=Sum("acceptance_sum"),
+            )
+        )
+        return [self.model(**row) for row in rows]
+
+    def update_food_items(self, food_item_ids):
+        """Recompute the rollups of the food items from the aggregates."""
+        food_item_ids = set(food_item_ids)
+        acceptance_model = apps.get_model("ants", "SpeciesFoodAcceptance")
+        with transaction.atomic():
+            _advisory_lock(FOOD_ITEM_LOCK_NAMESPACE, food_item_ids)
+            rollups = self._rollups(
+                acceptance_model.objects.filter(food_item_id__in=food_item_ids)
+            )
+            self.get_queryset().filter(food_item_id__in=food_item_ids).exclude(
+                food_item_id__in=[rollup.food_item_id for rollup in rollups]
+            ).delete()
+            self.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=["food_item"],
+                update_fields=["species_count", "rating_count", "acceptance_sum"],
+            )
 
-        return self.get_queryset().filter(filter).first()
+    def rebuild(self):
+        """Rebuild all rollups from the aggregates."""
+        acceptance_model = apps.get_model("ants", "SpeciesFoodAcceptance")
+        with transaction.atomic():
+            self.get_queryset().delete()
+            return len(self.bulk_create(self._rollups(acceptance_model.objects.all())))
 
 
 class CountryAntRegionManager(AntRegionManager):
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:19
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def populate_flight_months_masks(apps, schema_editor):
+    AntSpecies = apps.get_model("ants", "AntSpecies")
+    masks = defaultdict(int)
+    flight_months = AntSpecies.flight_months.through.objects.values_list(
+        "antspecies_id", "month_id"
+    )
+    for species_id, month_id in flight_months.iterator():
+        masks[species_id] |= 1 << (month_id - 1)
+    species = [
+        AntSpecies(pk=species_id, flight_months_mask=mask)
+        for species_id, mask in masks.items()
+    ]
+    AntSpecies.objects.bulk_update(species, ["flight_months_mask"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0062_alter_fooditem_image_author_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='antspecies',
+            name='flight_months_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_flight_months_masks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='antspecies',
+            index=models.Index(condition=models.Q(('flight_months_mask__gt', 0)), fields=['flight_months_mask'], name='antspecies_flight_months_idx'),
+        ),
+    ]
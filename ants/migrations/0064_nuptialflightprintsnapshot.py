@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0063_antspecies_flight_months_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NuptialFlightPrintSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('content', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('region', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ants.antregion')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('region', 'month'), name='unique_nuptial_flight_print_snapshot', nulls_distinct=False)],
+            },
+        ),
+    ]
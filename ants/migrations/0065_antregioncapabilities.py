@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_region_capabilities(apps, schema_editor):
+    AntRegionCapabilities = apps.get_model("ants", "AntRegionCapabilities")
+    Distribution = apps.get_model("ants", "Distribution")
+    counts = Distribution.objects.values("region_id").annotate(
+        species_count=Count("species_id"),
+        flight_species_count=Count(
+            "species_id", filter=Q(species__flight_months_mask__gt=0)
+        ),
+    )
+    AntRegionCapabilities.objects.bulk_create(
+        [
+            AntRegionCapabilities(
+                region_id=row["region_id"],
+                has_ants=True,
+                has_flight_data=row["flight_species_count"] > 0,
+                species_count=row["species_count"],
+                flight_species_count=row["flight_species_count"],
+            )
+            for row in counts
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0064_nuptialflightprintsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AntRegionCapabilities',
+            fields=[
+                ('region', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='capabilities', serialize=False, to='ants.antregion')),
+                ('has_ants', models.BooleanField(default=False)),
+                ('has_flight_data', models.BooleanField(default=False)),
+                ('species_count', models.PositiveIntegerField(default=0)),
+                ('flight_species_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Region capabilities',
+                'verbose_name_plural': 'Region capabilities',
+            },
+        ),
+        migrations.RunPython(populate_region_capabilities, migrations.RunPython.noop),
+    ]
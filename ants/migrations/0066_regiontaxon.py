@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+DISTRIBUTION_FIELDS = {
+    "region_id": "region_id",
+    "species_id": "species_id",
+    "species_name": "species__name",
+    "species_slug": "species__slug",
+    "forbidden_in_eu": "species__forbidden_in_eu",
+    "genus_name": "species__genus__name",
+    "genus_slug": "species__genus__slug",
+    "tribe_name": "species__genus__tribe__name",
+    "tribe_slug": "species__genus__tribe__slug",
+    "sub_family_name": "species__genus__tribe__sub_family__name",
+    "sub_family_slug": "species__genus__tribe__sub_family__slug",
+}
+
+
+def populate_region_taxa(apps, schema_editor):
+    RegionTaxon = apps.get_model("ants", "RegionTaxon")
+    Distribution = apps.get_model("ants", "Distribution")
+    rows = Distribution.objects.values_list(*DISTRIBUTION_FIELDS.values())
+    RegionTaxon.objects.bulk_create(
+        [RegionTaxon(**dict(zip(DISTRIBUTION_FIELDS, row))) for row in rows.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0065_antregioncapabilities'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegionTaxon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('species_name', models.CharField(max_length=200)),
+                ('species_slug', models.SlugField(db_index=False)),
+                ('forbidden_in_eu', models.BooleanField(default=False)),
+                ('genus_name', models.CharField(max_length=200, null=True)),
+                ('genus_slug', models.SlugField(db_index=False, null=True)),
+                ('tribe_name', models.CharField(max_length=200, null=True)),
+                ('tribe_slug', models.SlugField(db_index=False, null=True)),
+                ('sub_family_name', models.CharField(max_length=200, null=True)),
+                ('sub_family_slug', models.SlugField(db_index=False, null=True)),
+                ('region', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ants.antregion')),
+                ('species', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ants.antspecies')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['region', 'species_name'], include=('species_slug', 'species', 'forbidden_in_eu'), name='regiontaxon_species_idx'), models.Index(fields=['region', 'genus_name', 'genus_slug'], name='regiontaxon_genus_idx'), models.Index(fields=['region', 'tribe_name', 'tribe_slug'], name='regiontaxon_tribe_idx'), models.Index(fields=['region', 'sub_family_name', 'sub_family_slug'], name='regiontaxon_sub_family_idx')],
+                'constraints': [models.UniqueConstraint(fields=('region', 'species'), name='unique_region_taxon')],
+            },
+        ),
+        migrations.RunPython(populate_region_taxa, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0066_regiontaxon'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking', models.CharField(max_length=50)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('entry_name', models.CharField(max_length=300)),
+                ('total', models.PositiveIntegerField()),
+                ('data_version', models.BigIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ranking', 'rank'), name='unique_ranking_snapshot_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:30
+
+import django.db.models.deletion
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+LEVEL_FIELDS = {
+    1: "beginner_count",
+    2: "intermediate_count",
+    3: "advanced_count",
+    4: "expert_count",
+}
+
+
+def populate_difficulty_aggregates(apps, schema_editor):
+    SpeciesDifficultyAggregate = apps.get_model("ants", "SpeciesDifficultyAggregate")
+    SpeciesDifficultyRating = apps.get_model("ants", "SpeciesDifficultyRating")
+    counts = {
+        field: Count("id", filter=Q(difficulty=level))
+        for level, field in LEVEL_FIELDS.items()
+    }
+    rows = (
+        SpeciesDifficultyRating.objects.order_by()
+        .values("species_id")
+        .annotate(difficulty_sum=Sum("difficulty"), total=Count("id"), **counts)
+    )
+    SpeciesDifficultyAggregate.objects.bulk_create(
+        [SpeciesDifficultyAggregate(**row) for row in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0067_rankingsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpeciesDifficultyAggregate',
+            fields=[
+                ('species', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='difficulty_aggregate', serialize=False, to='ants.antspecies')),
+                ('beginner_count', models.PositiveIntegerField(default=0)),
+                ('intermediate_count', models.PositiveIntegerField(default=0)),
+                ('advanced_count', models.PositiveIntegerField(default=0)),
+                ('expert_count', models.PositiveIntegerField(default=0)),
+                ('difficulty_sum', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('bayesian_average', models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.Value(12.5), '+', models.F('difficulty_sum')), '/', django.db.models.expressions.CombinedExpression(models.Value(5), '+', models.F('total'))), models.FloatField()), output_field=models.FloatField())),
+            ],
+            options={
+                'verbose_name': 'Species difficulty aggregate',
+                'verbose_name_plural': 'Species difficulty aggregates',
+                'indexes': [models.Index(fields=['bayesian_average', 'species'], name='difficulty_bayesian_avg_idx')],
+            },
+        ),
+        migrations.RunPython(populate_difficulty_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+import django.db.models.deletion
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_food_acceptance(apps, schema_editor):
+    SpeciesFoodAcceptance = apps.get_model("ants", "SpeciesFoodAcceptance")
+    FoodItemAcceptance = apps.get_model("ants", "FoodItemAcceptance")
+    SpeciesFoodRating = apps.get_model("ants", "SpeciesFoodRating")
+    rows = (
+        SpeciesFoodRating.objects.order_by()
+        .values("species_id", "food_item_id")
+        .annotate(rating_count=Count("id"), acceptance_sum=Sum("submission__acceptance"))
+    )
+    SpeciesFoodAcceptance.objects.bulk_create(
+        [SpeciesFoodAcceptance(**row) for row in rows], batch_size=1000
+    )
+    rollups = (
+        SpeciesFoodAcceptance.objects.order_by()
+        .values("food_item_id")
+        .annotate(
+            species_count=Count("species_id"),
+            rating_count=Sum("rating_count"),
+            acceptance_sum=Sum("acceptance_sum"),
+        )
+    )
+    FoodItemAcceptance.objects.bulk_create(
+        [FoodItemAcceptance(**row) for row in rollups], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0068_speciesdifficultyaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FoodItemAcceptance',
+            fields=[
+                ('food_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='acceptance', serialize=False, to='ants.fooditem')),
+                ('species_count', models.PositiveIntegerField(default=0)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('acceptance_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Food item acceptance',
+                'verbose_name_plural': 'Food item acceptances',
+            },
+        ),
+        migrations.CreateModel(
+            name='SpeciesFoodAcceptance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('acceptance_sum', models.PositiveIntegerField(default=0)),
+                ('average_acceptance', models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast(models.F('acceptance_sum'), models.FloatField()), '/', django.db.models.functions.comparison.NullIf(models.F('rating_count'), 0)), output_field=models.FloatField())),
+                ('food_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='species_acceptances', to='ants.fooditem')),
+                ('species', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='food_acceptances', to='ants.antspecies')),
+            ],
+            options={
+                'verbose_name': 'Species food acceptance',
+                'verbose_name_plural': 'Species food acceptances',
+                'indexes': [models.Index(models.F('food_item'), models.OrderBy(models.F('average_acceptance'), descending=True), models.OrderBy(models.F('rating_count'), descending=True), name='food_acceptance_ranking_idx')],
+                'constraints': [models.UniqueConstraint(fields=('species', 'food_item'), name='unique_species_food_acceptance')],
+            },
+        ),
+        migrations.RunPython(populate_food_acceptance, migrations.RunPython.noop),
+    ]
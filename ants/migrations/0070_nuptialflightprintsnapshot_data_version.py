@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0069_food_acceptance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nuptialflightprintsnapshot',
+            name='data_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
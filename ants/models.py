@@ -10,19 +10,26 @@ from django.contrib.postgres import validators as psql_validators
 from django.core.files.uploadedfile import UploadedFile
 from django.core.validators import MinValueValidator, RegexValidator, ValidationError
 from django.db import models
+from django.db.models.functions import Cast, NullIf
 from django.urls import reverse
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 from sorl.thumbnail import ImageField
 from tinymce.models import HTMLField
 
-from ants.helpers import DEFAULT_NONE_STR
+from ants.helpers import DEFAULT_NONE_STR, flight_months_from_mask
 from ants.managers import (
+    AntRegionCapabilitiesManager,
     AntRegionManager,
     AntSizeManager,
     AntSpeciesManager,
     CountryAntRegionManager,
+    FoodItemAcceptanceManager,
     GenusManager,
+    RegionTaxonManager,
+    SpeciesDifficultyAggregateManager,
+    SpeciesFoodAcceptanceManager,
+    SpeciesFoodRatingManager,
     StateAntRegionManager,
     TaxonomicRankManager,
 )
@@ -200,6 +207,88 @@ class Distribution(models.Model):
         unique_together = ("species", "region")
 
 
+class AntRegionCapabilities(models.Model):
+    """
+    Precomputed data of an ant region used to fill region selectors
+    without joining the distributions. The rows are kept up to date by the
+    signal receivers of the ants app.
+    """
+
+    region = models.OneToOneField(
+        AntRegion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="capabilities",
+    )
+    has_ants = models.BooleanField(default=False)
+    has_flight_data = models.BooleanField(default=False)
+    species_count = models.PositiveIntegerField(default=0)
+    flight_species_count = models.PositiveIntegerField(default=0)
+
+    objects = AntRegionCapabilitiesManager()
+
+    def __str__(self):
+        return str(self.region)
+
+    class Meta:
+        verbose_name = _("Region capabilities")
+        verbose_name_plural = _("Region capabilities")
+
+
+class RegionTaxon(models.Model):
+    """
+    Denormalized row of an ant species occurring in a region together with
+    the names of its higher taxonomic ranks. The rows are kept up to date by
+    the signal receivers of the ants app and back the listings of taxonomic
+    ranks by region.
+    """
+
+    region = models.ForeignKey(
+        AntRegion, on_delete=models.CASCADE, related_name="+", db_index=False
+    )
+    species = models.ForeignKey(
+        "AntSpecies", on_delete=models.CASCADE, related_name="+"
+    )
+    species_name = models.CharField(max_length=200)
+    species_slug = models.SlugField(db_index=False)
+    forbidden_in_eu = models.BooleanField(default=False)
+    genus_name = models.CharField(max_length=200, null=True)
+    genus_slug = models.SlugField(null=True, db_index=False)
+    tribe_name = models.CharField(max_length=200, null=True)
+    tribe_slug = models.SlugField(null=True, db_index=False)
+    sub_family_name = models.CharField(max_length=200, null=True)
+    sub_family_slug = models.SlugField(null=True, db_index=False)
+
+    objects = RegionTaxonManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["region", "species"], name="unique_region_taxon"
+            )
+        ]
+        # one covering index per taxonomic rank listing
+        indexes = [
+            models.Index(
+                fields=["region", "species_name"],
+                include=["species_slug", "species", "forbidden_in_eu"],
+                name="regiontaxon_species_idx",
+            ),
+            models.Index(
+                fields=["region", "genus_name", "genus_slug"],
+                name="regiontaxon_genus_idx",
+            ),
+            models.Index(
+                fields=["region", "tribe_name", "tribe_slug"],
+                name="regiontaxon_tribe_idx",
+            ),
+            models.Index(
+                fields=["region", "sub_family_name", "sub_family_slug"],
+                name="regiontaxon_sub_family_idx",
+            ),
+        ]
+
+
 class SpeciesMeta(TaxonomicRankMeta):
     verbose_name = _("Species")
     verbose_name_plural = _("Species")
@@ -425,6 +514,9 @@ class AntSpecies(Species):
         blank=True,
         verbose_name=_("Nuptial flight months"),
     )
+    # bitmask of the flight month ids (bit 0 is January), kept in sync with
+    # flight_months by ants.signals
+    flight_months_mask = models.PositiveSmallIntegerField(default=0, editable=False)
 
     flight_hour_range = psql_fields.IntegerRangeField(
         blank=True,
@@ -460,6 +552,11 @@ class AntSpecies(Species):
         verbose_name=_("Nuptial flight data source"),
     )
 
+    @property
+    def flight_month_ids(self):
+        """Returns the sorted ids of the nuptial flight months."""
+        return flight_months_from_mask(self.flight_months_mask)
+
     @property
     def flight_months_str(self):
         """Returns the nuptial flight months as a string."""
@@ -596,6 +693,8 @@ class AntSpecies(Species):
 
     @property
     def main_image(self):
+        if "images" in getattr(self, "_prefetched_objects_cache", {}):
+            return next((i for i in self.images.all() if i.main_image), None)
         return self.images.filter(main_image=True).first()
 
     def get_absolute_url(self):
@@ -610,7 +709,13 @@ class AntSpecies(Species):
     objects = AntSpeciesManager()
 
     class Meta(SpeciesMeta):
-        pass
+        indexes = [
+            models.Index(
+                fields=["flight_months_mask"],
+                name="antspecies_flight_months_idx",
+                condition=models.Q(flight_months_mask__gt=0),
+            )
+        ]
 
 
 class AntSpeciesDistribution(AntSpecies):
@@ -715,6 +820,76 @@ class SpeciesDifficultyRating(models.Model):
         verbose_name_plural = _("Species difficulty ratings")
 
 
+class SpeciesDifficultyAggregate(models.Model):
+    """
+    Aggregate of the difficulty ratings of an ant species. The rows are
+    kept up to date by the signal receivers of the ants app, species
+    without ratings have no row.
+
+    The Bayesian average pulls the average of species with few ratings
+    towards the middle of the scale so they can be ranked next to species
+    with many ratings.
+    """
+
+    LEVEL_FIELDS = {
+        SpeciesDifficultyRating.BEGINNER: "beginner_count",
+        SpeciesDifficultyRating.INTERMEDIATE: "intermediate_count",
+        SpeciesDifficultyRating.ADVANCED: "advanced_count",
+        SpeciesDifficultyRating.EXPERT: "expert_count",
+    }
+    PRIOR_MEAN = 2.5
+    PRIOR_WEIGHT = 5
+
+    species = models.OneToOneField(
+        AntSpecies,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="difficulty_aggregate",
+    )
+    beginner_count = models.PositiveIntegerField(default=0)
+    intermediate_count = models.PositiveIntegerField(default=0)
+    advanced_count = models.PositiveIntegerField(default=0)
+    expert_count = models.PositiveIntegerField(default=0)
+    difficulty_sum = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    bayesian_average = models.GeneratedField(
+        expression=Cast(
+            (PRIOR_MEAN * PRIOR_WEIGHT + models.F("difficulty_sum"))
+            / (PRIOR_WEIGHT + models.F("total")),
+            models.FloatField(),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    objects = SpeciesDifficultyAggregateManager()
+
+    def __str__(self):
+        return str(self.species)
+
+    @property
+    def average(self):
+        """Return the plain average of the ratings."""
+        return self.difficulty_sum / self.total if self.total else None
+
+    @property
+    def distribution(self):
+        """Return the number of ratings by difficulty level."""
+        return {
+            level: getattr(self, field) for level, field in self.LEVEL_FIELDS.items()
+        }
+
+    class Meta:
+        verbose_name = _("Species difficulty aggregate")
+        verbose_name_plural = _("Species difficulty aggregates")
+        indexes = [
+            models.Index(
+                fields=["bayesian_average", "species"],
+                name="difficulty_bayesian_avg_idx",
+            ),
+        ]
+
+
 class FoodItem(models.Model):
     """A food item that can be offered to ant species. Staff-managed."""
 
@@ -923,7 +1098,136 @@ class SpeciesFoodRating(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SpeciesFoodRatingManager()
+
     class Meta:
         unique_together = ("species", "food_item", "user")
         verbose_name = _("Species food rating")
         verbose_name_plural = _("Species food ratings")
+
+
+class SpeciesFoodAcceptance(models.Model):
+    """
+    Aggregate of the food ratings of an ant species for a food item. The
+    rows are updated together with the ratings, pairs without ratings have
+    no row.
+    """
+
+    species = models.ForeignKey(
+        AntSpecies, on_delete=models.CASCADE, related_name="food_acceptances"
+    )
+    food_item = models.ForeignKey(
+        FoodItem, on_delete=models.CASCADE, related_name="species_acceptances"
+    )
+    rating_count = models.PositiveIntegerField(default=0)
+    acceptance_sum = models.PositiveIntegerField(default=0)
+    average_acceptance = models.GeneratedField(
+        expression=Cast(models.F("acceptance_sum"), models.FloatField())
+        / NullIf(models.F("rating_count"), 0),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    objects = SpeciesFoodAcceptanceManager()
+
+    def __str__(self):
+        return f"{self.species} / {self.food_item}"
+
+    class Meta:
+        verbose_name = _("Species food acceptance")
+        verbose_name_plural = _("Species food acceptances")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["species", "food_item"],
+                name="unique_species_food_acceptance",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                "food_item",
+                models.F("average_acceptance").desc(),
+                models.F("rating_count").desc(),
+                name="food_acceptance_ranking_idx",
+            ),
+        ]
+
+
+class FoodItemAcceptance(models.Model):
+    """
+    Rollup of the acceptance aggregates of all species rated for a food
+    item. It is updated together with SpeciesFoodAcceptance.
+    """
+
+    food_item = models.OneToOneField(
+        FoodItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="acceptance",
+    )
+    species_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    acceptance_sum = models.PositiveIntegerField(default=0)
+
+    objects = FoodItemAcceptanceManager()
+
+    def __str__(self):
+        return str(self.food_item)
+
+    @property
+    def average(self):
+        """Return the average acceptance of all ratings of the food item."""
+        return self.acceptance_sum / self.rating_count if self.rating_count else None
+
+    class Meta:
+        verbose_name = _("Food item acceptance")
+        verbose_name_plural = _("Food item acceptances")
+
+
+class NuptialFlightPrintSnapshot(models.Model):
+    """
+    Pre-rendered print view of the nuptial flight table for a region and a
+    month. A missing region or month stands for all regions or months.
+    The HTML is stored gzip compressed.
+    """
+
+    region = models.ForeignKey(
+        AntRegion,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    month = models.PositiveSmallIntegerField(null=True, blank=True)
+    content = models.BinaryField()
+    # version of the region's snapshots the snapshot was rendered for
+    data_version = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["region", "month"],
+                name="unique_nuptial_flight_print_snapshot",
+                nulls_distinct=False,
+            )
+        ]
+
+
+class RankingSnapshot(models.Model):
+    """
+    Entry of a precomputed ranking of the antdb top lists. All rows of a
+    snapshot share the data version they were computed from.
+    """
+
+    ranking = models.CharField(max_length=50)
+    rank = models.PositiveSmallIntegerField()
+    entry_name = models.CharField(max_length=300)
+    total = models.PositiveIntegerField()
+    data_version = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["ranking", "rank"], name="unique_ranking_snapshot_rank"
+            )
+        ]
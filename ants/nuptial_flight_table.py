@@ -0,0 +1,218 @@
+"""
+Filters, cached rows and print snapshots of the nuptial flight table.
+
+The rendered rows are cached per normalized filter combination. All cached
+rows are invalidated at once by bumping a version number which is part of
+the cache keys whenever species, distributions or flight months change.
+Cache hits and misses are counted in the cache as well.
+
+The print view of each region and month (including all regions and all
+months) is stored gzip compressed in the database as snapshot. Snapshots
+carry the version of their region they were rendered for. When the data
+of a region changes its version is bumped and its snapshots are deleted.
+They are rendered again by the render_print_snapshots command or by the
+next request.
+"""
+
+import datetime
+import gzip
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import translation
+
+from . import region_resolver
+from .models import Distribution, NuptialFlightPrintSnapshot
+from .utils import cache_versions
+
+ROWS_VERSION_CACHE_KEY = "nuptial_flight_table_version"
+PRINT_VERSION_CACHE_KEY = "nuptial_flight_print_version:{}"
+ROWS_CACHE_TIMEOUT = 60 * 60 * 24
+HITS_CACHE_KEY = "nuptial_flight_table_hits"
+MISSES_CACHE_KEY = "nuptial_flight_table_misses"
+MINIMUM_NAME_LENGTH = 3
+
+
+def _normalize_region(value):
+    value = (value or "").strip()
+    if not value or value == "all":
+        return "all"
+    try:
+        return str(int(value))
+    except ValueError:
+        return value.lower()
+
+
+def normalize_filters(params):
+    """
+    Return the filters of the nuptial flight table as dictionary with
+    normalized values. Filters which would be ignored by the queryset
+    become their default, "current" becomes the current month and the
+    country is dropped if a state is given because the state wins.
+    """
+    name = params.get("name", "").lower()
+    if len(name) < MINIMUM_NAME_LENGTH:
+        name = ""
+
+    month = params.get("month", "all")
+    if month == "current":
+        month = str(datetime.date.today().month)
+    if month != "all":
+        try:
+            month = str(int(month))
+        except (ValueError, TypeError):
+            month = "all"
+
+    state = _normalize_region(params.get("state"))
+    country = _normalize_region(params.get("country")) if state == "all" else "all"
+
+    try:
+        page = int(params.get("page", 1))
+    except (ValueError, TypeError):
+        page = 1
+
+    return {
+        "name": name,
+        "month": month,
+        "country": country,
+        "state": state,
+        "page": page,
+    }
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def _rows_cache_key(filters):
+    version = cache_versions.get_version(ROWS_VERSION_CACHE_KEY)
+    parameters = {**filters, "language": translation.get_language()}
+    digest = hashlib.sha1(
+        json.dumps(parameters, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"nuptial_flight_table_rows:{version}:{digest}"
+
+
+def cached_rows(filters, render):
+    """
+    Return the rendered rows for normalized filters and whether they were
+    cached. render is called with the filters if they were not cached.
+    """
+    key = _rows_cache_key(filters)
+    html = cache.get(key)
+    if html is not None:
+        _count(HITS_CACHE_KEY)
+        return html, True
+
+    _count(MISSES_CACHE_KEY)
+    html = render(filters)
+    cache.set(key, html, timeout=ROWS_CACHE_TIMEOUT)
+    return html, False
+
+
+def invalidate_rows():
+    """Invalidate all cached rows."""
+    cache_versions.bump_versions(ROWS_VERSION_CACHE_KEY)
+
+
+def cache_stats():
+    """Return the number of cache hits and misses of the rows."""
+    stats = cache.get_many([HITS_CACHE_KEY, MISSES_CACHE_KEY])
+    return {
+        "hits": stats.get(HITS_CACHE_KEY, 0),
+        "misses": stats.get(MISSES_CACHE_KEY, 0),
+    }
+
+
+def reset_cache_stats():
+    """Reset the number of cache hits and misses."""
+    cache.delete_many([HITS_CACHE_KEY, MISSES_CACHE_KEY])
+
+
+def print_snapshot_month(filters):
+    """
+    Return the month of the print snapshot for normalized filters (None
+    for all months) or False if there are no snapshots for the filters.
+    """
+    if filters["name"] or filters["state"] != "all":
+        return False
+    if filters["month"] == "all":
+        return None
+    month = int(filters["month"])
+    return month if 1 <= month <= 12 else False
+
+
+def _print_version_key(region_id):
+    return PRINT_VERSION_CACHE_KEY.format(region_id or "all")
+
+
+def print_snapshot_version(region_id):
+    """
+    Return the current version of the print snapshots of a region (None for
+    all regions). It has to be taken before the print view is rendered.
+    """
+    return cache_versions.get_version(_print_version_key(region_id))
+
+
+def load_print_snapshot(filters):
+    """Return the compressed print snapshot for normalized filters or None."""
+    month = print_snapshot_month(filters)
+    if month is False:
+        return None
+    country = filters["country"]
+    region_id = None
+    if country != "all":
+        region = region_resolver.resolve(country)
+        if region is None:
+            return None
+        region_id = region.id
+    content = (
+        NuptialFlightPrintSnapshot.objects.filter(
+            region_id=region_id,
+            month=month,
+            data_version=print_snapshot_version(region_id),
+        )
+        .values_list("content", flat=True)
+        .first()
+    )
+    return bytes(content) if content is not None else None
+
+
+def store_print_snapshot(region_id, month, html, version):
+    """
+    Store the print view of a region and month rendered for a version and
+    return it compressed. Nothing is stored if the version is outdated.
+    """
+    content = gzip.compress(html.encode())
+    if cache_versions.is_stored(_print_version_key(region_id), version):
+        NuptialFlightPrintSnapshot.objects.update_or_create(
+            region_id=region_id,
+            month=month,
+            defaults={"content": content, "data_version": version},
+        )
+    return content
+
+
+def invalidate_print_snapshots(region_ids):
+    """Invalidate the print snapshots of the regions and of all regions."""
+    region_ids = {region_id for region_id in region_ids if region_id}
+    cache_versions.bump_versions(
+        *(_print_version_key(region_id) for region_id in [None, *region_ids])
+    )
+    NuptialFlightPrintSnapshot.objects.filter(
+        Q(region_id__in=region_ids) | Q(region=None)
+    ).delete()
+
+
+def invalidate_species_print_snapshots(species_ids):
+    """Invalidate the print snapshots of the regions of the species."""
+    invalidate_print_snapshots(
+        Distribution.objects.filter(species_id__in=species_ids)
+        .values_list("region_id", flat=True)
+        .distinct()
+    )
@@ -0,0 +1,150 @@
+"""
+Rankings of the antdb top lists page.
+
+All rankings are computed together from one pass over the distributions
+in countries and one pass over the species and stored as a snapshot in
+RankingSnapshot. The snapshot rows carry the data version they were
+computed from. The data version changes whenever species, genera,
+regions or distributions change and the snapshot is computed again on
+the next read or by the rebuild_rankings command.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import AntSpecies, Distribution, Genus, RankingSnapshot
+from .utils import cache_versions
+
+RANKINGS_VERSION_CACHE_KEY = "ant_rankings_version"
+# the largest number of entries the top lists page shows
+MAX_RANKING_ENTRIES = 50
+
+
+def data_version():
+    """Return the current version of the data the rankings are based on."""
+    return cache_versions.get_version(RANKINGS_VERSION_CACHE_KEY)
+
+
+def invalidate():
+    """Mark the ranking snapshot as outdated."""
+    cache_versions.bump_versions(RANKINGS_VERSION_CACHE_KEY)
+
+
+def _top(totals):
+    """Return the entries with the largest totals as (name, total) pairs."""
+    return sorted(totals.items(), key=lambda item: (-item[1], item[0]))[
+        :MAX_RANKING_ENTRIES
+    ]
+
+
+def compute_rankings():
+    """Return the top entries of all rankings by ranking key."""
+    country_species = Counter()
+    country_genera = defaultdict(set)
+    species_countries = Counter()
+    species_names = {}
+    genus_countries = defaultdict(set)
+    distributions = Distribution.objects.filter(region__type="Country").values_list(
+        "region__name",
+        "region__code",
+        "species_id",
+        "species__name",
+        "species__genus__name",
+    )
+    for country, code, species_id, species, genus in distributions.iterator(
+        chunk_size=5000
+    ):
+        country_species[country] += 1
+        species_countries[species_id] += 1
+        species_names[species_id] = species
+        if genus is not None:
+            country_genera[country].add(genus)
+            if code is not None:
+                genus_countries[genus].add(code)
+
+    genus_species = Counter(
+        dict.fromkeys(Genus.objects.values_list("name", flat=True), 0)
+    )
+    author_species = Counter()
+    for genus, author in AntSpecies.objects.values_list(
+        "genus__name", "author"
+    ).iterator(chunk_size=5000):
+        if genus is not None:
+            genus_species[genus] += 1
+        if author is not None:
+            author_species[author] += 1
+
+    return {
+        "countries-by-species": _top(country_species),
+        "countries-by-genera": _top(
+            {country: len(genera) for country, genera in country_genera.items()}
+        ),
+        "species-by-countries": _top(
+            {
+                species_names[species_id]: total
+                for species_id, total in species_countries.items()
+            }
+        ),
+        "genera-by-countries": _top(
+            {genus: len(codes) for genus, codes in genus_countries.items()}
+        ),
+        "genera-by-species": _top(genus_species),
+        "authors-by-species": _top(author_species),
+    }
+
+
+def rebuild(version=None):
+    """
+    Compute all rankings, store them as snapshot of the data version and
+    return them.
+    """
+    if version is None:
+        version = data_version()
+    rankings = compute_rankings()
+    snapshot = [
+        RankingSnapshot(
+            ranking=ranking,
+            rank=rank,
+            entry_name=name,
+            total=total,
+            data_version=version,
+        )
+        for ranking, entries in rankings.items()
+        for rank, (name, total) in enumerate(entries, start=1)
+    ]
+    try:
+        with transaction.atomic():
+            RankingSnapshot.objects.all().delete()
+            RankingSnapshot.objects.bulk_create(snapshot)
+    except IntegrityError:
+        # another process stored a snapshot at the same time
+        pass
+    return rankings
+
+
+def get_ranking(ranking, entries):
+    """
+    Return the first entries of a ranking as dictionaries with
+    rank_entry_name and total.
+    """
+    version = data_version()
+    snapshot = RankingSnapshot.objects.filter(data_version=version)
+    result = list(
+        snapshot.filter(ranking=ranking, rank__lte=entries)
+        .order_by("rank")
+        .values("total", rank_entry_name=F("entry_name"))
+    )
+    if result or snapshot.exists():
+        return result
+    if cache_versions.is_stored(RANKINGS_VERSION_CACHE_KEY, version):
+        rankings = rebuild(version)
+    else:
+        # the cache does not keep the version (like the DummyCache) or it
+        # changed meanwhile, so a stored snapshot would never be read
+        rankings = compute_rankings()
+    return [
+        {"rank_entry_name": name, "total": total}
+        for name, total in rankings[ranking][:entries]
+    ]
@@ -0,0 +1,93 @@
+"""
+Resolver of ant regions by id, code or slug.
+
+Every process keeps a map of all regions in memory. The map is loaded
+again when the version number of the regions in the cache changed, which
+happens whenever a region is saved or deleted. If the cache does not keep
+the version (like the DummyCache) the map is loaded again after
+UNVERSIONED_TIMEOUT seconds instead.
+"""
+
+import time
+from collections import namedtuple
+
+from django.db import transaction
+
+from .models import AntRegion
+from .utils import cache_versions
+
+REGIONS_VERSION_CACHE_KEY = "ant_regions_version"
+UNVERSIONED_TIMEOUT = 60
+_UNVERSIONED = "unversioned"
+
+RegionRecord = namedtuple(
+    "RegionRecord", ["id", "name", "code", "slug", "type", "parent_id"]
+)
+
+# (version, regions by id, regions by lowercased code, regions by slug)
+_regions = (None, {}, {}, {})
+# time.monotonic() when the regions were loaded
+_loaded_at = 0.0
+
+
+def _load_regions(version):
+    by_id = {}
+    by_code = {}
+    by_slug = {}
+    # the first region wins if codes or slugs are not unique
+    for region in AntRegion.objects.order_by("type", "name").values_list(
+        *RegionRecord._fields
+    ):
+        record = RegionRecord(*region)
+        by_id[record.id] = record
+        if record.code:
+            by_code.setdefault(record.code.lower(), record)
+        by_slug.setdefault(record.slug, record)
+    return version, by_id, by_code, by_slug
+
+
+def _get_regions():
+    global _regions, _loaded_at
+    version = cache_versions.get_version(REGIONS_VERSION_CACHE_KEY)
+    if _regions[0] == version:
+        return _regions
+    if not cache_versions.is_stored(REGIONS_VERSION_CACHE_KEY, version):
+        if (
+            _regions[0] == _UNVERSIONED
+            and time.monotonic() - _loaded_at < UNVERSIONED_TIMEOUT
+        ):
+            return _regions
+        version = _UNVERSIONED
+    _regions = _load_regions(version)
+    _loaded_at = time.monotonic()
+    return _regions
+
+
+def _forget_regions():
+    global _regions
+    _regions = (None, {}, {}, {})
+
+
+def resolve(value):
+    """
+    Return the RegionRecord of a region by id, code (case-insensitive) or
+    slug or None if there is no such region.
+    """
+    if value is None:
+        return None
+    _, by_id, by_code, by_slug = _get_regions()
+    value = str(value).strip()
+    try:
+        return by_id.get(int(value))
+    except ValueError:
+        pass
+    value = value.lower()
+    return by_code.get(value) or by_slug.get(value)
+
+
+def invalidate():
+    """Make all processes load the regions again."""
+    cache_versions.bump_versions(REGIONS_VERSION_CACHE_KEY)
+    # the own process also loads them again without a versioning cache
+    _forget_regions()
+    transaction.on_commit(_forget_regions)
@@ -4,6 +4,7 @@ from collections.abc import Callable, Iterable
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.db import transaction
 
+from ants import species_detail
 from ants.models import (
     AntRegion,
     AntSpecies,
@@ -13,7 +14,8 @@ from ants.models import (
     SubFamily,
     Tribe,
 )
-from flights.models import Flight
+from flights import map_grid, timeseries, top_lists
+from flights.models import Flight, FlightFrequency
 
 _delimiter = "\t"
 
@@ -33,6 +35,16 @@ def _print_progress(species_name):
     print(f"{species_name: <150}")
 
 
+def _update_moved_flights(species_ids):
+    # bulk updates of flights do not send post_save, so the data derived
+    # from the flights of the species is updated here
+    FlightFrequency.objects.rebuild(species_ids)
+    map_grid.rebuild(species_ids)
+    top_lists.invalidate_top_lists()
+    timeseries.invalidate_timeseries()
+    species_detail.invalidate_species(species_ids)
+
+
 def import_invalid_ant_species(csv_file: Iterable[str], verbose=False):
     """
     Imports invalid ant species from given csv file.
@@ -79,9 +91,11 @@ def import_invalid_ant_species(csv_file: Iterable[str], verbose=False):
                 invalid_species.valid = False
                 invalid_species.save()
                 # update flights
-                Flight.objects.filter(ant_species=invalid_species).update(
+                moved = Flight.objects.filter(ant_species=invalid_species).update(
                     ant_species=valid_species
                 )
+                if moved:
+                    _update_moved_flights([invalid_species.pk, valid_species.pk])
 
             # Add new valid species if not existent
             valid_species = AntSpecies.objects.get_or_create_with_name(valid_name)
@@ -0,0 +1,364 @@
+"""Signal receivers of ants app."""
+
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import nuptial_flight_table, rankings, region_resolver, species_detail
+from .models import (
+    AntRegion,
+    AntRegionCapabilities,
+    AntSize,
+    AntSpecies,
+    AntSpeciesImage,
+    CommonName,
+    Distribution,
+    FoodItem,
+    FoodRatingSubmission,
+    Genus,
+    InvalidName,
+    Month,
+    RegionTaxon,
+    SpeciesDifficultyAggregate,
+    SpeciesDifficultyRating,
+    SpeciesFoodAcceptance,
+    SpeciesFoodRating,
+    SubFamily,
+    Tribe,
+)
+
+
+@receiver(m2m_changed, sender=AntSpecies.flight_months.through)
+def update_flight_months_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep AntSpecies.flight_months_mask in sync with flight_months."""
+    if action == "pre_clear" and reverse:
+        # the species of a month are unknown after clearing it
+        instance._flight_months_species_ids = list(
+            instance.antspecies_set.values_list("pk", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        species_ids = [instance.pk]
+    elif action == "post_clear":
+        species_ids = instance._flight_months_species_ids
+    else:
+        species_ids = pk_set
+
+    masks = AntSpecies.objects.update_flight_months_masks(species_ids)
+    if not reverse:
+        instance.flight_months_mask = masks[instance.pk]
+    nuptial_flight_table.invalidate_rows()
+    nuptial_flight_table.invalidate_species_print_snapshots(species_ids)
+    AntRegionCapabilities.objects.update_species_regions(species_ids)
+    species_detail.invalidate_species(species_ids)
+
+
+@receiver(post_save, sender=AntSpecies)
+@receiver(post_delete, sender=AntSpecies)
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+@receiver(post_save, sender=AntRegion)
+@receiver(post_delete, sender=AntRegion)
+def invalidate_nuptial_flight_table(sender, **kwargs):
+    """Invalidate the cached rows of the nuptial flight table."""
+    nuptial_flight_table.invalidate_rows()
+
+
+@receiver(post_save, sender=AntSpecies)
+@receiver(post_delete, sender=AntSpecies)
+def invalidate_species_print_snapshots(sender, instance, **kwargs):
+    """Invalidate the print snapshots of the regions of a species."""
+    nuptial_flight_table.invalidate_species_print_snapshots([instance.pk])
+
+
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def invalidate_distribution_print_snapshots(sender, instance, **kwargs):
+    """Invalidate the print snapshots of the old and the new region."""
+    nuptial_flight_table.invalidate_print_snapshots(
+        [instance.region_id, getattr(instance, "_previous_region_id", None)]
+    )
+
+
+@receiver(post_save, sender=AntRegion)
+def invalidate_region_print_snapshots(sender, instance, **kwargs):
+    """Invalidate the print snapshots of a region, e.g. if it was renamed."""
+    nuptial_flight_table.invalidate_print_snapshots([instance.pk])
+
+
+@receiver(post_save, sender=AntRegion)
+@receiver(post_delete, sender=AntRegion)
+def invalidate_region_resolver(sender, **kwargs):
+    """Make all processes load the regions of the region resolver again."""
+    region_resolver.invalidate()
+
+
+@receiver(pre_save, sender=Distribution)
+def remember_previous_region(sender, instance, **kwargs):
+    """Store the species and region of the distribution before it gets changed."""
+    instance._previous_species_id = None
+    instance._previous_region_id = None
+    if instance.pk is not None:
+        previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("species_id", "region_id")
+            .first()
+        )
+        if previous is not None:
+            instance._previous_species_id, instance._previous_region_id = previous
+
+
+@receiver(post_save, sender=Distribution)
+def update_region_capabilities_on_save(sender, instance, raw=False, **kwargs):
+    """Update the capabilities of the old and the new region."""
+    if raw:
+        return
+    previous = (
+        getattr(instance, "_previous_species_id", None),
+        getattr(instance, "_previous_region_id", None),
+    )
+    if previous == (instance.species_id, instance.region_id):
+        return
+    if previous[0] is not None:
+        AntRegionCapabilities.objects.add_distribution(previous[1], previous[0], -1)
+    AntRegionCapabilities.objects.add_distribution(
+        instance.region_id, instance.species_id
+    )
+
+
+@receiver(post_save, sender=Distribution)
+def update_region_taxa_on_save(sender, instance, raw=False, **kwargs):
+    """Update the region taxa of the old and the new distribution."""
+    if raw:
+        return
+    previous = (
+        getattr(instance, "_previous_species_id", None),
+        getattr(instance, "_previous_region_id", None),
+    )
+    if previous[0] is not None and previous != (
+        instance.species_id,
+        instance.region_id,
+    ):
+        RegionTaxon.objects.update_distribution(*previous)
+    RegionTaxon.objects.update_distribution(instance.species_id, instance.region_id)
+
+
+@receiver(post_delete, sender=Distribution)
+def update_region_taxa_on_delete(sender, instance, **kwargs):
+    """Delete the region taxon of a deleted distribution."""
+    RegionTaxon.objects.update_distribution(instance.species_id, instance.region_id)
+
+
+@receiver(post_save, sender=AntSpecies)
+def update_species_region_taxa(sender, instance, raw=False, **kwargs):
+    """Update the region taxa of a species, e.g. if it was renamed."""
+    if raw:
+        return
+    RegionTaxon.objects.update_species([instance.pk])
+
+
+@receiver(post_save, sender=Genus)
+@receiver(post_save, sender=Tribe)
+@receiver(post_save, sender=SubFamily)
+def update_rank_region_taxa(sender, instance, raw=False, **kwargs):
+    """Update the region taxa of all species of a higher taxonomic rank."""
+    if raw:
+        return
+    lookup = {
+        Genus: "genus",
+        Tribe: "genus__tribe",
+        SubFamily: "genus__tribe__sub_family",
+    }[sender]
+    RegionTaxon.objects.update_species(
+        AntSpecies.objects.filter(**{lookup: instance}).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Genus)
+@receiver(post_delete, sender=Tribe)
+@receiver(post_delete, sender=SubFamily)
+def update_deleted_rank_region_taxa(sender, instance, **kwargs):
+    """
+    Update the region taxa of the species of a deleted higher taxonomic
+    rank. The references to the rank are set to null without signals.
+    """
+    field = {Genus: "genus", Tribe: "tribe", SubFamily: "sub_family"}[sender]
+    RegionTaxon.objects.update_species(
+        RegionTaxon.objects.filter(**{f"{field}_slug": instance.slug})
+        .values_list("species_id", flat=True)
+        .distinct()
+    )
+
+
+@receiver(post_delete, sender=Distribution)
+def update_region_capabilities_on_delete(sender, instance, **kwargs):
+    """Update the capabilities of the region of a deleted distribution."""
+    AntRegionCapabilities.objects.add_distribution(
+        instance.region_id, instance.species_id, -1
+    )
+
+
+@receiver(post_save, sender=AntSpecies)
+@receiver(post_delete, sender=AntSpecies)
+@receiver(post_save, sender=Genus)
+@receiver(post_delete, sender=Genus)
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+@receiver(post_save, sender=AntRegion)
+@receiver(post_delete, sender=AntRegion)
+def invalidate_rankings(sender, **kwargs):
+    """Mark the ranking snapshot of the top lists as outdated."""
+    rankings.invalidate()
+
+
+@receiver(pre_save, sender=SpeciesDifficultyRating)
+def remember_previous_difficulty(sender, instance, **kwargs):
+    """Store the species and difficulty of the rating before it gets changed."""
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = (
+            sender.objects.filter(pk=instance.pk)
+            .values_list("species_id", "difficulty")
+            .first()
+        )
+
+
+@receiver(post_save, sender=SpeciesDifficultyRating)
+def update_difficulty_aggregate_on_save(sender, instance, raw=False, **kwargs):
+    """Move a saved rating to its difficulty in the aggregate of its species."""
+    if raw:
+        return
+    previous = getattr(instance, "_previous_rating", None)
+    current = (instance.species_id, instance.difficulty)
+    if previous == current:
+        return
+    if previous is not None:
+        SpeciesDifficultyAggregate.objects.add_ratings(*previous, count=-1)
+    SpeciesDifficultyAggregate.objects.add_ratings(*current)
+
+
+@receiver(post_delete, sender=SpeciesDifficultyRating)
+def update_difficulty_aggregate_on_delete(sender, instance, **kwargs):
+    """Remove a deleted rating from the aggregate of its species."""
+    SpeciesDifficultyAggregate.objects.add_ratings(
+        instance.species_id, instance.difficulty, count=-1
+    )
+
+
+@receiver(pre_save, sender=SpeciesFoodRating)
+def remember_previous_food_pair(sender, instance, update_fields=None, **kwargs):
+    """Store the species and food item of the rating before they get changed."""
+    instance._previous_pair = None
+    pair_fields = {"species", "species_id", "food_item", "food_item_id"}
+    if instance.pk is None or (
+        update_fields is not None and not pair_fields & set(update_fields)
+    ):
+        return
+    instance._previous_pair = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("species_id", "food_item_id")
+        .first()
+    )
+
+
+@receiver(post_save, sender=SpeciesFoodRating)
+def update_food_acceptance_on_save(sender, instance, raw=False, **kwargs):
+    """Update the acceptance aggregates of a saved food rating."""
+    if raw:
+        return
+    pairs = {(instance.species_id, instance.food_item_id)}
+    previous_pair = getattr(instance, "_previous_pair", None)
+    if previous_pair is not None:
+        pairs.add(previous_pair)
+    SpeciesFoodAcceptance.objects.update_pairs(pairs)
+
+
+@receiver(post_save, sender=FoodRatingSubmission)
+def update_food_acceptance_of_submission(
+    sender, instance, created, raw=False, update_fields=None, **kwargs
+):
+    """Update the acceptance aggregates of the ratings of a changed submission."""
+    if raw or created:
+        # a new submission has no ratings yet
+        return
+    if update_fields is not None and "acceptance" not in update_fields:
+        return
+    SpeciesFoodAcceptance.objects.update_submissions([instance.pk])
+
+
+@receiver(post_delete, sender=SpeciesFoodRating)
+def update_food_acceptance_on_delete(sender, instance, origin=None, **kwargs):
+    """Remove a deleted food rating from the acceptance aggregates."""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is FoodItem:
+        # the aggregates of the food item are deleted with it
+        return
+    SpeciesFoodAcceptance.objects.update_pairs(
+        [(instance.species_id, instance.food_item_id)]
+    )
+
+
+@receiver(post_save, sender=AntSpecies)
+@receiver(post_delete, sender=AntSpecies)
+def invalidate_species_detail(sender, instance, **kwargs):
+    """Invalidate the cached detail page of a changed species."""
+    species_detail.invalidate_species([instance.pk])
+
+
+@receiver(post_save, sender=CommonName)
+@receiver(post_delete, sender=CommonName)
+@receiver(post_save, sender=InvalidName)
+@receiver(post_delete, sender=InvalidName)
+@receiver(post_save, sender=SpeciesDifficultyRating)
+@receiver(post_delete, sender=SpeciesDifficultyRating)
+@receiver(post_save, sender=SpeciesFoodRating)
+@receiver(post_delete, sender=SpeciesFoodRating)
+def invalidate_species_detail_of_name_or_rating(sender, instance, **kwargs):
+    """Invalidate the cached detail page of the species of a name or rating."""
+    species_detail.invalidate_species([instance.species_id])
+
+
+@receiver(post_save, sender=AntSize)
+@receiver(post_delete, sender=AntSize)
+@receiver(post_save, sender=AntSpeciesImage)
+@receiver(post_delete, sender=AntSpeciesImage)
+def invalidate_species_detail_of_size_or_image(sender, instance, **kwargs):
+    """Invalidate the cached detail page of the species of a size or image."""
+    species_detail.invalidate_species([instance.ant_species_id])
+
+
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def invalidate_species_detail_of_distribution(sender, instance, **kwargs):
+    """Invalidate the cached detail pages of the species of a distribution."""
+    species_detail.invalidate_species(
+        [instance.species_id, getattr(instance, "_previous_species_id", None)]
+    )
+
+
+@receiver(post_save, sender=FoodRatingSubmission)
+def invalidate_species_detail_of_submission(sender, instance, **kwargs):
+    """Invalidate the cached detail pages of the species of a submission."""
+    species_detail.invalidate_species(
+        instance.species_food_ratings.values_list("species_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=AntRegion)
+@receiver(post_delete, sender=AntRegion)
+@receiver(post_save, sender=Genus)
+@receiver(post_delete, sender=Genus)
+@receiver(post_save, sender=Tribe)
+@receiver(post_delete, sender=Tribe)
+@receiver(post_save, sender=SubFamily)
+@receiver(post_delete, sender=SubFamily)
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+@receiver(post_save, sender=Month)
+@receiver(post_delete, sender=Month)
+def invalidate_all_species_details(sender, **kwargs):
+    """Invalidate the cached detail pages of all species."""
+    species_detail.invalidate_all()
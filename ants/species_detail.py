@@ -0,0 +1,228 @@
+"""
+Loader of the data shown on the detail page of an ant species.
+
+All data is fetched with a fixed number of queries which does not depend
+on the number of names, sizes, images, regions or ratings of a species.
+
+The body of the page is rendered for anonymous users and cached under the
+content version of the species and a version shared by all species. The
+content version of a species is bumped by changes of the species and its
+sizes, images, names, distribution, flights and ratings, the shared
+version by changes of regions, higher taxonomic ranks and food items.
+The ratings of a logged-in user are filled in by a separate overlay.
+"""
+
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db.models import Prefetch, prefetch_related_objects
+from django.template.loader import render_to_string
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+from flights.models import Flight
+
+from .models import (
+    AntRegion,
+    AntSize,
+    AntSpecies,
+    AntSpeciesImage,
+    FoodItem,
+    SpeciesDifficultyAggregate,
+    SpeciesDifficultyRating,
+    SpeciesFoodAcceptance,
+)
+from .utils import cache_versions
+
+VERSION_CACHE_KEY = "ant_species_detail_version"
+SPECIES_VERSION_CACHE_KEY = "ant_species_detail_version:{}"
+BODY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _prefetch_lookups():
+    return [
+        "commonname_set",
+        "invalid_names",
+        "flight_months",
+        Prefetch("sizes", queryset=AntSize.objects.order_by("pk")),
+        Prefetch("images", queryset=AntSpeciesImage.objects.order_by("pk")),
+    ]
+
+
+def species_queryset():
+    """
+    Return a queryset of ant species with everything the detail page
+    reads from the species itself.
+    """
+    return AntSpecies.objects.select_related(
+        "genus", "genus__tribe", "genus__tribe__sub_family"
+    ).prefetch_related(*_prefetch_lookups())
+
+
+def _sizes_by_type(species):
+    sizes = {}
+    for size in species.sizes.all():
+        sizes.setdefault(size.type, size)
+    return sizes
+
+
+def _flight_frequency(species):
+    flight_frequency = Flight.objects.flight_frequency_per_month(species)
+    if any(flight_frequency.values()):
+        return json.dumps(list(flight_frequency.values()), separators=(",", ":"))
+    return None
+
+
+def build_difficulty_context(species):
+    """Return difficulty rating aggregate data for template context."""
+    choices = SpeciesDifficultyRating.DIFFICULTY_CHOICES
+    aggregate = SpeciesDifficultyAggregate.objects.filter(species=species).first()
+    if aggregate is None:
+        aggregate = SpeciesDifficultyAggregate(species=species)
+    distribution = aggregate.distribution
+    total = aggregate.total
+
+    if total > 0:
+        avg_rounded = round(aggregate.average, 1)
+        dominant_level = max(distribution, key=distribution.get)
+        dominant_label = dict(choices)[dominant_level]
+    else:
+        avg_rounded = None
+        dominant_level = None
+        dominant_label = None
+
+    return {
+        "difficulty_distribution": distribution,
+        "difficulty_total": total,
+        "difficulty_choices": choices,
+        "difficulty_avg": avg_rounded,
+        "dominant_difficulty_level": dominant_level,
+        "dominant_difficulty_label": dominant_label,
+    }
+
+
+def build_food_context(species, user):
+    """Return food acceptance rating data grouped by category for template context."""
+    food_items = list(FoodItem.objects.all())
+    acceptance_by_food = {
+        acceptance.food_item_id: acceptance
+        for acceptance in SpeciesFoodAcceptance.objects.filter(species=species)
+    }
+    user_rating_by_food = {}
+    if user.is_authenticated:
+        user_rating_by_food = {
+            rating.food_item_id: rating
+            for rating in species.food_ratings.filter(user=user).select_related(
+                "submission"
+            )
+        }
+
+    categories = {}
+    for food_item in food_items:
+        acceptance = acceptance_by_food.get(food_item.pk)
+        total = acceptance.rating_count if acceptance else 0
+        avg = round(acceptance.average_acceptance, 1) if acceptance else None
+
+        cat = food_item.category
+        if cat not in categories:
+            categories[cat] = {
+                "category_key": cat,
+                "category_label": dict(FoodItem.CATEGORY_CHOICES)[cat],
+                "items": [],
+            }
+        categories[cat]["items"].append(
+            {
+                "food_item": food_item,
+                "total": total,
+                "avg": avg,
+                "user_rating": user_rating_by_food.get(food_item.pk),
+            }
+        )
+
+    ordered_keys = [key for key, _ in FoodItem.CATEGORY_CHOICES]
+    food_by_category = [categories[k] for k in ordered_keys if k in categories]
+    return {"food_by_category": food_by_category}
+
+
+def load_species_detail(species, user):
+    """
+    Return the template context of the detail page of a species which was
+    loaded with species_queryset.
+    """
+    sizes = _sizes_by_type(species)
+    context = {
+        "countries": list(AntRegion.countries.filter(distribution__species=species)),
+        "common_names": species.common_names,
+        "invalid_names": species.invalid_names.all(),
+        "worker_size": sizes.get(AntSize.WORKER),
+        "queen_size": sizes.get(AntSize.QUEEN),
+        "male_size": sizes.get(AntSize.MALE),
+        "flight_frequency": _flight_frequency(species),
+        "user_difficulty_rating": (
+            species.difficulty_ratings.filter(user=user).first()
+            if user.is_authenticated
+            else None
+        ),
+    }
+    context.update(build_difficulty_context(species))
+    context.update(build_food_context(species, user))
+    return context
+
+
+def _body_cache_key(species_id):
+    version = cache_versions.get_version(VERSION_CACHE_KEY)
+    species_version = cache_versions.get_version(
+        SPECIES_VERSION_CACHE_KEY.format(species_id)
+    )
+    language = translation.get_language()
+    return (
+        f"ant_species_detail_body:{species_id}:{version}:{species_version}:{language}"
+    )
+
+
+def cached_body(species):
+    """
+    Return the rendered body of the detail page of a species as seen by
+    anonymous users. The species needs its genus, tribe and sub family
+    selected.
+    """
+    key = _body_cache_key(species.pk)
+    html = cache.get(key)
+    if html is None:
+        prefetch_related_objects([species], *_prefetch_lookups())
+        user = AnonymousUser()
+        context = load_species_detail(species, user)
+        context.update({"object": species, "user": user})
+        html = render_to_string(
+            "ants/antspecies_detail/antspecies_detail_body.html", context
+        )
+        cache.set(key, html, timeout=BODY_CACHE_TIMEOUT)
+    return mark_safe(html)
+
+
+def load_user_overlay(species, user):
+    """Return the template context of the ratings of a user for a species."""
+    return {
+        "object": species,
+        "difficulty_choices": SpeciesDifficultyRating.DIFFICULTY_CHOICES,
+        "user_difficulty_rating": species.difficulty_ratings.filter(user=user).first(),
+        "user_food_ratings": list(
+            species.food_ratings.filter(user=user).select_related("submission")
+        ),
+    }
+
+
+def invalidate_species(species_ids):
+    """Invalidate the cached bodies of the species."""
+    species_ids = {species_id for species_id in species_ids if species_id}
+    if not species_ids:
+        return
+    cache_versions.bump_versions(
+        *(SPECIES_VERSION_CACHE_KEY.format(species_id) for species_id in species_ids)
+    )
+
+
+def invalidate_all():
+    """Invalidate the cached bodies of all species."""
+    cache_versions.bump_versions(VERSION_CACHE_KEY)
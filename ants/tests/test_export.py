@@ -0,0 +1,175 @@
+"""Test module for the streaming exports."""
+
+import json
+
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+
+from ants.models import AntRegion, AntSpecies, Distribution, Genus, Month
+from ants.utils.export import (
+    export_csv_streaming_response,
+    export_json_streaming_response,
+)
+
+
+def _content(response):
+    return b"".join(response.streaming_content).decode("utf-8")
+
+
+class ExportCsvStreamingResponseTest(TestCase):
+    def test_blocks(self):
+        response = export_csv_streaming_response(
+            range(100),
+            "numbers",
+            headers=["Number"],
+            row_getter=lambda number: [number],
+            block_size=50,
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="numbers.csv"'
+        )
+        blocks = [block.decode("utf-8") for block in response.streaming_content]
+        self.assertGreater(len(blocks), 1)
+        content = "".join(blocks)
+        self.assertTrue(content.startswith("﻿Number\r\n0\r\n1\r\n"))
+        self.assertTrue(content.endswith("98\r\n99\r\n"))
+
+    def test_queryset(self):
+        genus = Genus.objects.create(name="Lasius")
+        for name in ("Lasius niger", "Lasius flavus", "Lasius fuliginosus"):
+            AntSpecies.objects.create(name=name, genus=genus)
+        response = export_csv_streaming_response(
+            AntSpecies.objects.order_by("name"),
+            "species",
+            headers=["Name"],
+            row_getter=lambda species: [species.name],
+            chunk_size=2,
+        )
+        self.assertEqual(
+            _content(response),
+            "﻿Name\r\nLasius flavus\r\nLasius fuliginosus\r\nLasius niger\r\n",
+        )
+
+
+class ExportJsonStreamingResponseTest(TestCase):
+    def test_array(self):
+        response = export_json_streaming_response(
+            range(3), "numbers", lambda number: {"number": number, "name": "Ä"}
+        )
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="numbers.json"'
+        )
+        self.assertEqual(
+            _content(response),
+            '[{"number":0,"name":"Ä"},{"number":1,"name":"Ä"},{"number":2,"name":"Ä"}]',
+        )
+
+    def test_empty_array(self):
+        response = export_json_streaming_response([], "empty")
+        self.assertEqual(json.loads(_content(response)), [])
+
+    def test_ndjson(self):
+        response = export_json_streaming_response(
+            [{"number": 1}, {"number": 2}], "numbers", ndjson=True
+        )
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="numbers.ndjson"'
+        )
+        self.assertEqual(_content(response), '{"number":1}\n{"number":2}\n')
+
+    def test_blocks(self):
+        response = export_json_streaming_response(
+            range(1000), "numbers", block_size=100
+        )
+        blocks = list(response.streaming_content)
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual(json.loads(b"".join(blocks)), list(range(1000)))
+
+
+class ExportViewsTest(TestCase):
+    def setUp(self):
+        for i in range(1, 13):
+            Month.objects.create(id=i, name=str(i))
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", genus=genus, valid=True, forbidden_in_eu=True
+        )
+        self.lasius_niger.flight_months.set([7, 8])
+        region = AntRegion.objects.create(name="Germany", code="DE", type="Country")
+        Distribution.objects.create(species=self.lasius_niger, region=region)
+
+    def test_nuptial_flight_table_csv(self):
+        response = self.client.get(reverse("nuptial_flight_table_csv"))
+        lines = _content(response).splitlines()
+        self.assertEqual(
+            lines[0],
+            "﻿Species,Jan,Feb,Mar,Apr,May,Jun,Jul,Aug,"
+            "Sep,Oct,Nov,Dec,Flight time,Climate",
+        )
+        self.assertEqual(lines[1], "Lasius niger,,,,,,,x,x,,,,,,")
+
+    def test_taxonomic_ranks_by_region_csv(self):
+        response = self.client.get(
+            reverse("taxonomic_ranks_by_region", args=["species"]),
+            {"country": "DE", "export": "csv"},
+        )
+        self.assertEqual(
+            _content(response), "﻿Name,Forbidden in EU\r\nLasius niger,yes\r\n"
+        )
+
+    def test_forbidden_in_eu_species_csv(self):
+        response = self.client.get(
+            reverse("forbidden_in_eu_species_list"), {"export": "csv"}
+        )
+        self.assertEqual(_content(response), "﻿Name\r\nLasius niger\r\n")
+
+    def test_nuptial_flight_table_json(self):
+        response = self.client.get(reverse("nuptial_flight_table_json"))
+        self.assertEqual(
+            json.loads(_content(response)),
+            [
+                {
+                    "id": self.lasius_niger.id,
+                    "name": "Lasius niger",
+                    "flight_months": [7, 8],
+                    "flight_hour_range": None,
+                    "flight_climate": None,
+                    "forbidden_in_eu": True,
+                }
+            ],
+        )
+
+    def test_taxonomic_ranks_by_region_json(self):
+        url = reverse("taxonomic_ranks_by_region", args=["species"])
+        expected = {
+            "id": self.lasius_niger.id,
+            "name": "Lasius niger",
+            "slug": self.lasius_niger.slug,
+            "forbidden_in_eu": True,
+        }
+        response = self.client.get(url, {"country": "DE", "export": "json"})
+        self.assertEqual(json.loads(_content(response)), [expected])
+
+        response = self.client.get(url, {"country": "DE", "export": "ndjson"})
+        lines = _content(response).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [expected])
+
+    def test_forbidden_in_eu_species_json(self):
+        response = self.client.get(
+            reverse("forbidden_in_eu_species_list"), {"export": "json"}
+        )
+        self.assertEqual(
+            json.loads(_content(response)),
+            [
+                {
+                    "id": self.lasius_niger.id,
+                    "name": "Lasius niger",
+                    "slug": self.lasius_niger.slug,
+                }
+            ],
+        )
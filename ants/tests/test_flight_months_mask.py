@@ -0,0 +1,80 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from ants.helpers import (
+    filter_by_flight_month,
+    flight_months_from_mask,
+    flight_months_to_mask,
+)
+from ants.models import AntRegion, AntSpecies, Distribution, Genus, Month
+
+
+class FlightMonthsMaskHelpersTest(TestCase):
+    def test_round_trip(self):
+        self.assertEqual(flight_months_to_mask([1, 6, 12]), 0b100000100001)
+        self.assertEqual(flight_months_from_mask(0b100000100001), [1, 6, 12])
+        self.assertEqual(flight_months_from_mask(0), [])
+
+
+class FlightMonthsMaskTest(TestCase):
+    def setUp(self):
+        self.months = {i: Month.objects.create(id=i, name=str(i)) for i in range(1, 13)}
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", genus=genus, valid=True
+        )
+        self.lasius_flavus = AntSpecies.objects.create(
+            name="Lasius flavus", genus=genus, valid=True
+        )
+
+    def _mask(self, species):
+        return AntSpecies.objects.get(pk=species.pk).flight_months_mask
+
+    def test_add_and_remove(self):
+        self.lasius_niger.flight_months.add(6, 7)
+        self.assertEqual(self._mask(self.lasius_niger), 0b1100000)
+        self.assertEqual(self.lasius_niger.flight_month_ids, [6, 7])
+
+        self.lasius_niger.flight_months.remove(6)
+        self.assertEqual(self._mask(self.lasius_niger), 0b1000000)
+
+    def test_set_and_clear(self):
+        self.lasius_niger.flight_months.set([8, 9])
+        self.assertEqual(self._mask(self.lasius_niger), 0b110000000)
+
+        self.lasius_niger.flight_months.clear()
+        self.assertEqual(self._mask(self.lasius_niger), 0)
+
+    def test_reverse_changes(self):
+        self.months[7].antspecies_set.add(self.lasius_niger, self.lasius_flavus)
+        self.assertEqual(self._mask(self.lasius_niger), 0b1000000)
+        self.assertEqual(self._mask(self.lasius_flavus), 0b1000000)
+
+        self.months[7].antspecies_set.clear()
+        self.assertEqual(self._mask(self.lasius_niger), 0)
+        self.assertEqual(self._mask(self.lasius_flavus), 0)
+
+    def test_filter_by_flight_month(self):
+        self.lasius_niger.flight_months.set([6, 7])
+        self.lasius_flavus.flight_months.set([8])
+        species = AntSpecies.objects.all()
+        self.assertEqual(list(filter_by_flight_month(species, 7)), [self.lasius_niger])
+        self.assertEqual(list(filter_by_flight_month(species, 1)), [])
+        self.assertEqual(list(filter_by_flight_month(species, 13)), [])
+
+    def test_nuptial_flight_table_rows(self):
+        self.lasius_niger.flight_months.set([6, 7])
+        self.lasius_flavus.flight_months.set([8])
+        region = AntRegion.objects.create(name="Germany", code="DE", type="Country")
+        Distribution.objects.create(species=self.lasius_niger, region=region)
+        Distribution.objects.create(species=self.lasius_flavus, region=region)
+
+        url = reverse("nuptial_flight_table_rows")
+        response = self.client.get(url, {"month": "7", "country": "DE"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Lasius niger")
+        self.assertNotContains(response, "Lasius flavus")
+
+        response = self.client.get(url, {"month": "all"})
+        self.assertContains(response, "Lasius niger")
+        self.assertContains(response, "Lasius flavus")
@@ -0,0 +1,230 @@
+"""Test module for the food acceptance aggregates."""
+
+from io import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ants.admin import FoodItemAdmin
+from ants.models import (
+    FoodItem,
+    FoodItemAcceptance,
+    FoodRatingSubmission,
+    SpeciesFoodAcceptance,
+    SpeciesFoodRating,
+)
+from ants.tests.test_food_item_admin_merge import _FakeRequest
+from ants.tests.test_species_food_rating import (
+    _make_food,
+    _make_rating,
+    _make_species,
+)
+from ants.views import _FOOD_OVERVIEW_TOP_N
+
+
+class FoodAcceptanceTest(TestCase):
+    def setUp(self):
+        self.lasius = _make_species()
+        self.formica = _make_species(name="Formica rufa", slug="formica-rufa")
+        self.food = _make_food(category=FoodItem.SUGAR)
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass")
+            for i in range(3)
+        ]
+
+    def acceptance(self, species, food_item=None):
+        return SpeciesFoodAcceptance.objects.filter(
+            species=species, food_item=food_item or self.food
+        ).first()
+
+    def rollup(self, food_item=None):
+        return FoodItemAcceptance.objects.filter(
+            food_item=food_item or self.food
+        ).first()
+
+    def test_ratings_are_aggregated(self):
+        _make_rating(self.lasius, self.food, self.users[0], acceptance=5)
+        _make_rating(self.lasius, self.food, self.users[1], acceptance=2)
+        _make_rating(self.formica, self.food, self.users[0], acceptance=4)
+        acceptance = self.acceptance(self.lasius)
+        self.assertEqual(acceptance.rating_count, 2)
+        self.assertEqual(acceptance.acceptance_sum, 7)
+        self.assertEqual(acceptance.average_acceptance, 3.5)
+        rollup = self.rollup()
+        self.assertEqual(rollup.species_count, 2)
+        self.assertEqual(rollup.rating_count, 3)
+        self.assertAlmostEqual(rollup.average, 11 / 3)
+
+    def test_changed_and_deleted_ratings(self):
+        rating = _make_rating(self.lasius, self.food, self.users[0], acceptance=5)
+        _make_rating(self.lasius, self.food, self.users[1], acceptance=3)
+        rating.submission.acceptance = 1
+        rating.submission.save()
+        self.assertEqual(self.acceptance(self.lasius).acceptance_sum, 4)
+
+        rating.species = self.formica
+        rating.save()
+        self.assertEqual(self.acceptance(self.lasius).rating_count, 1)
+        self.assertEqual(self.acceptance(self.formica).acceptance_sum, 1)
+
+        self.users[1].delete()
+        self.assertIsNone(self.acceptance(self.lasius))
+        self.assertEqual(self.rollup().species_count, 1)
+
+        rating.submission.delete()
+        self.assertIsNone(self.acceptance(self.formica))
+        self.assertIsNone(self.rollup())
+
+    def test_deleted_food_item(self):
+        _make_rating(self.lasius, self.food, self.users[0], acceptance=5)
+        _make_rating(self.formica, self.food, self.users[0], acceptance=3)
+        self.food.delete()
+        self.assertFalse(SpeciesFoodAcceptance.objects.exists())
+        self.assertFalse(FoodItemAcceptance.objects.exists())
+        connection.check_constraints()
+
+    def test_submit_and_edit_views(self):
+        self.client.login(username="user0", password="pass")
+        response = self.client.post(
+            reverse("food_overview_rate"),
+            {
+                "food_item_id": self.food.pk,
+                "species_id": [self.lasius.pk, self.formica.pk],
+                "acceptance": 4,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_ratings"], 2)
+        self.assertEqual(response.context["overall_avg"], 4.0)
+        self.assertEqual(self.acceptance(self.formica).acceptance_sum, 4)
+
+        submission = FoodRatingSubmission.objects.get()
+        response = self.client.post(
+            reverse("food_rating_edit", args=[submission.pk]),
+            {"species_id": [self.lasius.pk], "acceptance": 2},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.acceptance(self.lasius).acceptance_sum, 2)
+        self.assertIsNone(self.acceptance(self.formica))
+        self.assertEqual(self.rollup().rating_count, 1)
+
+    def test_link_submission(self):
+        rating = _make_rating(self.lasius, self.food, self.users[0], acceptance=1)
+        previous_id = rating.submission_id
+        submission = FoodRatingSubmission.objects.create(
+            user=self.users[0], food_item=self.food, acceptance=5
+        )
+        with self.assertNumQueries(1):
+            orphans = SpeciesFoodRating.objects.link_submission(
+                [self.lasius.pk, self.formica.pk, self.formica.pk],
+                self.food.pk,
+                self.users[0].pk,
+                submission.pk,
+            )
+        self.assertEqual(orphans, {previous_id})
+        self.assertEqual(
+            set(
+                SpeciesFoodRating.objects.filter(user=self.users[0]).values_list(
+                    "species_id", "submission_id"
+                )
+            ),
+            {(self.lasius.pk, submission.pk), (self.formica.pk, submission.pk)},
+        )
+        # linking again does not change anything
+        orphans = SpeciesFoodRating.objects.link_submission(
+            [self.lasius.pk], self.food.pk, self.users[0].pk, submission.pk
+        )
+        self.assertEqual(orphans, set())
+
+    def test_submit_query_count_does_not_depend_on_species(self):
+        species = [self.lasius, self.formica] + [
+            _make_species(name=f"Genus{i} species", slug=f"genus{i}-species")
+            for i in range(8)
+        ]
+
+        def submit(species_list):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse("food_overview_rate"),
+                    {
+                        "food_item_id": self.food.pk,
+                        "species_id": [s.pk for s in species_list],
+                        "acceptance": 4,
+                    },
+                )
+            self.assertEqual(response.status_code, 200)
+            return len(queries)
+
+        self.client.login(username="user1", password="pass")
+        single = submit(species[:1])
+        self.client.login(username="user2", password="pass")
+        self.assertEqual(submit(species), single)
+        self.assertEqual(self.acceptance(species[-1]).rating_count, 1)
+        self.assertEqual(self.rollup().rating_count, 11)
+
+    def test_merge_food_items(self):
+        honey = _make_food(name="Honey", category=FoodItem.SUGAR)
+        _make_rating(self.lasius, self.food, self.users[0], acceptance=2)
+        _make_rating(self.lasius, honey, self.users[0], acceptance=5)
+        _make_rating(self.lasius, honey, self.users[1], acceptance=3)
+        _make_rating(self.formica, honey, self.users[1], acceptance=4)
+
+        FoodItemAdmin(FoodItem, AdminSite()).merge_food_items(
+            request=_FakeRequest(),
+            queryset=FoodItem.objects.filter(pk__in=[self.food.pk, honey.pk]),
+        )
+        acceptance = self.acceptance(self.lasius)
+        # the higher acceptance of user0 survives the collision
+        self.assertEqual(acceptance.rating_count, 2)
+        self.assertEqual(acceptance.acceptance_sum, 8)
+        self.assertEqual(self.acceptance(self.formica).rating_count, 1)
+        self.assertEqual(self.rollup().rating_count, 3)
+        self.assertEqual(SpeciesFoodAcceptance.objects.count(), 2)
+        self.assertEqual(FoodItemAcceptance.objects.count(), 1)
+        connection.check_constraints()
+
+    def test_rebuild(self):
+        _make_rating(self.lasius, self.food, self.users[0], acceptance=5)
+        SpeciesFoodAcceptance.objects.update(acceptance_sum=1)
+        FoodItemAcceptance.objects.all().delete()
+        call_command("rebuild_food_acceptance", stdout=StringIO())
+        self.assertEqual(self.acceptance(self.lasius).acceptance_sum, 5)
+        self.assertEqual(self.rollup().acceptance_sum, 5)
+
+
+class FoodOverviewAcceptanceTest(TestCase):
+    def setUp(self):
+        self.food = _make_food(category=FoodItem.SUGAR)
+        self.other_food = _make_food(name="Honey", category=FoodItem.SUGAR)
+        user = User.objects.create_user(username="user")
+        self.species = []
+        for i in range(_FOOD_OVERVIEW_TOP_N + 2):
+            species = _make_species(name=f"Genus{i} species", slug=f"genus{i}-species")
+            _make_rating(species, self.food, user, acceptance=i % 5 + 1)
+            self.species.append(species)
+        _make_rating(self.species[0], self.other_food, user, acceptance=2)
+
+    def test_top_species_per_food_item(self):
+        response = self.client.get(reverse("food_overview"), {"category": "SUGAR"})
+        food_data = {
+            entry["food_item"]: entry for entry in response.context["food_data"]
+        }
+        entry = food_data[self.food]
+        self.assertEqual(len(entry["top_species"]), _FOOD_OVERVIEW_TOP_N)
+        self.assertEqual(entry["extra_count"], 2)
+        self.assertEqual(entry["total_species"], _FOOD_OVERVIEW_TOP_N + 2)
+        averages = [row["species_avg"] for row in entry["top_species"]]
+        self.assertEqual(averages, sorted(averages, reverse=True))
+        self.assertEqual(averages[0], 5.0)
+
+        entry = food_data[self.other_food]
+        self.assertEqual(
+            [row["species_id"] for row in entry["top_species"]], [self.species[0].pk]
+        )
+        self.assertEqual(entry["overall_avg"], 2.0)
+        self.assertEqual(entry["extra_count"], 0)
@@ -4,7 +4,7 @@ from django.test import TestCase
 
 from ants.models import AntRegion, AntSpecies
 from ants.services.antwiki import import_invalid_ant_species
-from flights.models import Flight
+from flights.models import Flight, FlightFrequency, FlightMapCell
 
 # Columns (tab-separated):
 # 0: taxon_name, 1-7: (unused), 8: valid_name, 9: current_status
@@ -115,3 +115,24 @@ class AntSpeciesManagerTestCase(TestCase):
                 ant_species__name=self._invalid_species_name_no_valid_species
             ).first()
         )
+
+    def test_derived_flight_data_updated(self):
+        valid_species = AntSpecies.objects.get(name=self._valid_species_name)
+        invalid_species = AntSpecies.objects.get(name=self._invalid_species_name)
+
+        self.assertEqual(
+            list(
+                FlightFrequency.objects.filter(
+                    ant_species__in=[valid_species, invalid_species]
+                ).values_list("ant_species_id", "count")
+            ),
+            [(valid_species.pk, 1)],
+        )
+        self.assertEqual(
+            set(
+                FlightMapCell.objects.filter(
+                    ant_species__in=[valid_species, invalid_species]
+                ).values_list("ant_species_id", flat=True)
+            ),
+            {valid_species.pk},
+        )
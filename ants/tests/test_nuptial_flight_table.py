@@ -0,0 +1,217 @@
+"""Test module for the cached rows of the nuptial flight table."""
+
+import datetime
+import gzip
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ants import nuptial_flight_table
+from ants.models import (
+    AntRegion,
+    AntSpecies,
+    Distribution,
+    Genus,
+    Month,
+    NuptialFlightPrintSnapshot,
+)
+from ants.tests.caches import DUMMY_CACHE, LOCMEM_CACHE
+
+
+class NormalizeFiltersTest(TestCase):
+    def test_defaults(self):
+        self.assertEqual(
+            nuptial_flight_table.normalize_filters({}),
+            {"name": "", "month": "all", "country": "all", "state": "all", "page": 1},
+        )
+
+    def test_normalized_values(self):
+        filters = nuptial_flight_table.normalize_filters(
+            {"name": "NIGer", "month": "07", "country": "DE", "page": "2"}
+        )
+        self.assertEqual(
+            filters,
+            {"name": "niger", "month": "7", "country": "de", "state": "all", "page": 2},
+        )
+
+    def test_ignored_values(self):
+        filters = nuptial_flight_table.normalize_filters(
+            {"name": "ni", "month": "x", "country": "DE", "state": "5", "page": "x"}
+        )
+        self.assertEqual(
+            filters,
+            {"name": "", "month": "all", "country": "all", "state": "5", "page": 1},
+        )
+
+    def test_current_month(self):
+        filters = nuptial_flight_table.normalize_filters({"month": "current"})
+        self.assertEqual(filters["month"], str(datetime.date.today().month))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NuptialFlightTableRowsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(1, 13):
+            Month.objects.create(id=i, name=str(i))
+        self.genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", genus=self.genus, valid=True
+        )
+        self.lasius_niger.flight_months.set([7])
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.url = reverse("nuptial_flight_table_rows")
+
+    def _get(self, **params):
+        return self.client.get(self.url, {"month": "7", "country": "de", **params})
+
+    def test_cache_hit(self):
+        Distribution.objects.create(species=self.lasius_niger, region=self.germany)
+        response = self._get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertContains(response, "Lasius niger")
+
+        with self.assertNumQueries(0):
+            response = self._get(country="DE", month="07")
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertContains(response, "Lasius niger")
+        self.assertEqual(nuptial_flight_table.cache_stats(), {"hits": 1, "misses": 1})
+
+    def test_distribution_change_invalidates(self):
+        self.assertNotContains(self._get(), "Lasius niger")
+        Distribution.objects.create(species=self.lasius_niger, region=self.germany)
+        response = self._get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertContains(response, "Lasius niger")
+
+    def test_flight_months_change_invalidates(self):
+        Distribution.objects.create(species=self.lasius_niger, region=self.germany)
+        self.assertContains(self._get(), "Lasius niger")
+        self.lasius_niger.flight_months.set([8])
+        self.assertNotContains(self._get(), "Lasius niger")
+
+    def test_species_change_invalidates(self):
+        Distribution.objects.create(species=self.lasius_niger, region=self.germany)
+        self.assertContains(self._get(), "Lasius niger")
+        self.lasius_niger.valid = False
+        self.lasius_niger.save()
+        self.assertNotContains(self._get(), "Lasius niger")
+
+    def test_stats_command(self):
+        self._get()
+        self._get()
+        out = StringIO()
+        call_command("nuptial_flight_table_cache_stats", "--reset", stdout=out)
+        self.assertIn("Hits: 1, misses: 1, hit rate: 50.0 %", out.getvalue())
+        self.assertEqual(nuptial_flight_table.cache_stats(), {"hits": 0, "misses": 0})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NuptialFlightPrintSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(1, 13):
+            Month.objects.create(id=i, name=str(i))
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", genus=genus, valid=True
+        )
+        self.lasius_niger.flight_months.set([7])
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.spain = AntRegion.objects.create(name="Spain", code="ES", type="Country")
+        Distribution.objects.create(species=self.lasius_niger, region=self.germany)
+        self.url = reverse("nuptial_flight_table_rows")
+
+    def _get(self, gzip=False, **params):
+        headers = {"Accept-Encoding": "gzip, deflate"} if gzip else {}
+        return self.client.get(
+            self.url, {"print": "1", "country": "de", **params}, headers=headers
+        )
+
+    def test_snapshot_is_stored_and_served(self):
+        response = self._get(month="7")
+        self.assertContains(response, "Lasius niger")
+        self.assertContains(response, "(Germany)")
+        snapshot = NuptialFlightPrintSnapshot.objects.get()
+        self.assertEqual((snapshot.region, snapshot.month), (self.germany, 7))
+
+        with self.assertNumQueries(1):
+            response = self._get(month="7", gzip=True)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Lasius niger", gzip.decompress(response.content).decode())
+
+        with self.assertNumQueries(1):
+            response = self._get(month="7")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertContains(response, "Lasius niger")
+
+    def test_name_filter_is_not_stored(self):
+        self.assertContains(self._get(name="niger"), 'Filter: "niger"')
+        self.assertFalse(NuptialFlightPrintSnapshot.objects.exists())
+
+    def test_invalidation_per_region(self):
+        self._get()
+        self._get(country="es")
+        self._get(country="all")
+        self.assertEqual(NuptialFlightPrintSnapshot.objects.count(), 3)
+
+        Distribution.objects.create(species=self.lasius_niger, region=self.spain)
+        self.assertEqual(
+            list(NuptialFlightPrintSnapshot.objects.values_list("region", flat=True)),
+            [self.germany.pk],
+        )
+        self.assertContains(self._get(country="es"), "Lasius niger")
+
+    def test_moved_distribution_invalidates_both_regions(self):
+        self._get()
+        self._get(country="es")
+        distribution = Distribution.objects.get()
+        distribution.region = self.spain
+        distribution.save()
+        self.assertFalse(NuptialFlightPrintSnapshot.objects.exists())
+        self.assertNotContains(self._get(), "Lasius niger")
+
+    def test_snapshot_rendered_before_a_change_is_not_served(self):
+        version = nuptial_flight_table.print_snapshot_version(self.spain.pk)
+        Distribution.objects.create(species=self.lasius_niger, region=self.spain)
+        # a request which rendered before the change stores its snapshot late
+        nuptial_flight_table.store_print_snapshot(
+            self.spain.pk, None, "outdated", version
+        )
+        self.assertFalse(NuptialFlightPrintSnapshot.objects.exists())
+        NuptialFlightPrintSnapshot.objects.create(
+            region=self.spain,
+            month=None,
+            content=gzip.compress(b"outdated"),
+            data_version=version,
+        )
+        self.assertContains(self._get(country="es", month="all"), "Lasius niger")
+
+    @override_settings(CACHES=DUMMY_CACHE)
+    def test_snapshot_is_not_stored_without_cache(self):
+        self.assertContains(self._get(), "Lasius niger")
+        self.assertFalse(NuptialFlightPrintSnapshot.objects.exists())
+
+    def test_flight_months_change_invalidates(self):
+        self._get(month="7")
+        self._get(country="es", month="7")
+        self.lasius_niger.flight_months.set([8])
+        self.assertEqual(
+            list(NuptialFlightPrintSnapshot.objects.values_list("region", flat=True)),
+            [self.spain.pk],
+        )
+        self.assertNotContains(self._get(month="7"), "Lasius niger")
+
+    def test_render_command(self):
+        self._get(month="7")
+        out = StringIO()
+        call_command("render_print_snapshots", stdout=out)
+        self.assertIn("Rendered 25 print snapshots.", out.getvalue())
+        self.assertEqual(NuptialFlightPrintSnapshot.objects.count(), 26)
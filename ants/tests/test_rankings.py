@@ -0,0 +1,104 @@
+"""Test module for the rankings of the antdb top lists."""
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ants import rankings
+from ants.models import AntRegion, AntSpecies, Distribution, Genus, RankingSnapshot
+from ants.tests.caches import DUMMY_CACHE, LOCMEM_CACHE
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RankingsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        germany = AntRegion.objects.create(name="Germany", code="DE", type="Country")
+        france = AntRegion.objects.create(name="France", code="FR", type="Country")
+        bavaria = AntRegion.objects.create(
+            name="Bavaria", code="DE-BY", type="State", parent=germany
+        )
+        lasius = Genus.objects.create(name="Lasius")
+        formica = Genus.objects.create(name="Formica")
+        Genus.objects.create(name="Myrmica")
+        niger = AntSpecies.objects.create(
+            name="Lasius niger", genus=lasius, author="Linnaeus"
+        )
+        flavus = AntSpecies.objects.create(
+            name="Lasius flavus", genus=lasius, author="Fabricius"
+        )
+        rufa = AntSpecies.objects.create(
+            name="Formica rufa", genus=formica, author="Linnaeus"
+        )
+        for species, region in [
+            (niger, germany),
+            (niger, france),
+            (niger, bavaria),
+            (flavus, germany),
+            (rufa, germany),
+        ]:
+            Distribution.objects.create(species=species, region=region)
+
+    def ranking(self, key, entries=50):
+        return [
+            (entry["rank_entry_name"], entry["total"])
+            for entry in rankings.get_ranking(key, entries)
+        ]
+
+    def test_rankings(self):
+        self.assertEqual(
+            self.ranking("countries-by-species"), [("Germany", 3), ("France", 1)]
+        )
+        self.assertEqual(
+            self.ranking("countries-by-genera"), [("Germany", 2), ("France", 1)]
+        )
+        self.assertEqual(
+            self.ranking("species-by-countries"),
+            [("Lasius niger", 2), ("Formica rufa", 1), ("Lasius flavus", 1)],
+        )
+        self.assertEqual(
+            self.ranking("genera-by-countries"), [("Lasius", 2), ("Formica", 1)]
+        )
+        self.assertEqual(
+            self.ranking("genera-by-species"),
+            [("Lasius", 2), ("Formica", 1), ("Myrmica", 0)],
+        )
+        self.assertEqual(
+            self.ranking("authors-by-species", entries=1), [("Linnaeus", 2)]
+        )
+
+    def test_snapshot_is_read(self):
+        self.ranking("countries-by-species")
+        self.assertTrue(RankingSnapshot.objects.exists())
+        with self.assertNumQueries(1):
+            self.ranking("genera-by-species")
+
+    def test_data_change_recomputes(self):
+        self.ranking("countries-by-species")
+        Distribution.objects.filter(region__name="France").delete()
+        self.assertEqual(self.ranking("countries-by-species"), [("Germany", 3)])
+
+    def test_rebuild_rankings(self):
+        call_command("rebuild_rankings", stdout=StringIO())
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.ranking("countries-by-species", entries=1), [("Germany", 3)]
+            )
+
+    def test_version_is_bumped_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Distribution.objects.filter(region__name="France").delete()
+            # a request before the commit can store a snapshot of the old data
+            version = rankings.data_version()
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(rankings.data_version(), version)
+
+    @override_settings(CACHES=DUMMY_CACHE)
+    def test_snapshot_is_not_stored_without_cache(self):
+        self.assertEqual(
+            self.ranking("countries-by-species"), [("Germany", 3), ("France", 1)]
+        )
+        self.assertFalse(RankingSnapshot.objects.exists())
@@ -0,0 +1,108 @@
+"""Test module for the region capabilities."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ants.models import (
+    AntRegion,
+    AntRegionCapabilities,
+    AntSpecies,
+    Distribution,
+    Month,
+)
+
+
+class RegionCapabilitiesTest(TestCase):
+    def setUp(self):
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.austria = AntRegion.objects.create(
+            name="Austria", code="AT", type="Country"
+        )
+        self.lasius = AntSpecies.objects.create(name="Lasius niger")
+        self.myrmica = AntSpecies.objects.create(name="Myrmica rubra")
+        self.july = Month.objects.create(id=7, name="July")
+
+    def capabilities(self, region):
+        return AntRegionCapabilities.objects.filter(region=region).first()
+
+    def test_distribution_changes(self):
+        distribution = Distribution.objects.create(
+            species=self.lasius, region=self.germany
+        )
+        Distribution.objects.create(species=self.myrmica, region=self.germany)
+        capabilities = self.capabilities(self.germany)
+        self.assertTrue(capabilities.has_ants)
+        self.assertFalse(capabilities.has_flight_data)
+        self.assertEqual(capabilities.species_count, 2)
+        self.assertIsNone(self.capabilities(self.austria))
+
+        distribution.region = self.austria
+        distribution.save()
+        self.assertEqual(self.capabilities(self.germany).species_count, 1)
+        self.assertEqual(self.capabilities(self.austria).species_count, 1)
+
+        distribution.delete()
+        self.assertIsNone(self.capabilities(self.austria))
+        self.assertEqual(list(AntRegion.countries.with_ants()), [self.germany])
+
+    def test_flight_month_changes(self):
+        Distribution.objects.create(species=self.lasius, region=self.germany)
+        self.lasius.flight_months.add(self.july)
+        capabilities = self.capabilities(self.germany)
+        self.assertTrue(capabilities.has_flight_data)
+        self.assertEqual(capabilities.flight_species_count, 1)
+        self.assertEqual(list(AntRegion.countries.with_flight_data()), [self.germany])
+
+        self.lasius.flight_months.clear()
+        self.assertFalse(self.capabilities(self.germany).has_flight_data)
+        self.assertFalse(AntRegion.countries.with_flight_data().exists())
+
+    def test_distribution_changes_match_rebuild(self):
+        self.lasius.flight_months.add(self.july)
+        lasius = Distribution.objects.create(species=self.lasius, region=self.germany)
+        myrmica = Distribution.objects.create(species=self.myrmica, region=self.germany)
+        Distribution.objects.create(species=self.lasius, region=self.austria)
+        myrmica.region = self.austria
+        myrmica.save()
+        myrmica.save()
+        lasius.species = self.myrmica
+        lasius.save()
+
+        def all_capabilities():
+            return set(
+                AntRegionCapabilities.objects.values_list(
+                    "region_id",
+                    "has_flight_data",
+                    "species_count",
+                    "flight_species_count",
+                )
+            )
+
+        self.assertEqual(
+            all_capabilities(),
+            {(self.germany.pk, False, 1, 0), (self.austria.pk, True, 2, 1)},
+        )
+        capabilities = all_capabilities()
+        AntRegionCapabilities.objects.rebuild()
+        self.assertEqual(all_capabilities(), capabilities)
+
+    def test_region_delete(self):
+        Distribution.objects.create(species=self.lasius, region=self.germany)
+        self.germany.delete()
+        self.assertFalse(AntRegionCapabilities.objects.exists())
+
+    def test_rebuild(self):
+        Distribution.objects.bulk_create(
+            [
+                Distribution(species=self.lasius, region=self.germany),
+                Distribution(species=self.myrmica, region=self.austria),
+            ]
+        )
+        self.assertFalse(AntRegionCapabilities.objects.exists())
+        call_command("rebuild_region_capabilities", stdout=StringIO())
+        self.assertEqual(self.capabilities(self.germany).species_count, 1)
+        self.assertEqual(self.capabilities(self.austria).species_count, 1)
@@ -0,0 +1,80 @@
+"""Test module for the region resolver."""
+
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ants import region_resolver
+from ants.models import AntRegion
+from ants.tests.caches import DUMMY_CACHE, LOCMEM_CACHE
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RegionResolverTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.bavaria = AntRegion.objects.create(
+            name="Bavaria", code="DE-BY", type="State", parent=self.germany
+        )
+
+    def test_resolve(self):
+        for value in (self.bavaria.pk, str(self.bavaria.pk), "de-by", "DE-BY"):
+            region = region_resolver.resolve(value)
+            self.assertEqual(region.id, self.bavaria.pk)
+        self.assertEqual(region.name, "Bavaria")
+        self.assertEqual(region.parent_id, self.germany.pk)
+        self.assertEqual(region_resolver.resolve("germany").id, self.germany.pk)
+
+    def test_unknown_region(self):
+        self.assertIsNone(region_resolver.resolve("xx"))
+        self.assertIsNone(region_resolver.resolve(0))
+        self.assertIsNone(region_resolver.resolve(None))
+
+    def test_regions_are_loaded_once(self):
+        region_resolver.resolve("de")
+        with self.assertNumQueries(0):
+            region_resolver.resolve("de-by")
+            region_resolver.resolve(self.germany.pk)
+
+    def test_save_invalidates(self):
+        region_resolver.resolve("de")
+        self.germany.code = "GER"
+        self.germany.save()
+        self.assertIsNone(region_resolver.resolve("de"))
+        self.assertEqual(region_resolver.resolve("ger").id, self.germany.pk)
+
+    def test_get_by_id_or_code(self):
+        self.assertEqual(AntRegion.objects.get_by_id_or_code("de"), self.germany)
+        self.assertIsNone(AntRegion.countries.get_by_id_or_code("de-by"))
+
+
+@override_settings(CACHES=DUMMY_CACHE)
+class UnversionedRegionResolverTest(TestCase):
+    def setUp(self):
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+
+    def test_regions_are_kept_without_versioning_cache(self):
+        region_resolver.resolve("de")
+        with self.assertNumQueries(0):
+            self.assertEqual(region_resolver.resolve("de").id, self.germany.pk)
+            region_resolver.resolve(self.germany.pk)
+
+    def test_save_invalidates(self):
+        region_resolver.resolve("de")
+        self.germany.code = "GER"
+        self.germany.save()
+        self.assertIsNone(region_resolver.resolve("de"))
+
+    def test_regions_are_loaded_again_after_timeout(self):
+        region_resolver.resolve("de")
+        later = time.monotonic() + region_resolver.UNVERSIONED_TIMEOUT
+        with mock.patch.object(region_resolver.time, "monotonic", return_value=later):
+            with self.assertNumQueries(1):
+                region_resolver.resolve("de")
@@ -0,0 +1,108 @@
+"""Test module for the region taxa of the taxonomic ranks by region."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ants.models import (
+    AntRegion,
+    AntSpecies,
+    Distribution,
+    Genus,
+    RegionTaxon,
+    SubFamily,
+    Tribe,
+)
+from ants.views import TaxonomicRanksByRegion
+
+
+class RegionTaxonTest(TestCase):
+    def setUp(self):
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.bavaria = AntRegion.objects.create(
+            name="Bavaria", code="DE-BY", type="State", parent=self.germany
+        )
+        self.formicinae = SubFamily.objects.create(name="Formicinae")
+        self.lasiini = Tribe.objects.create(name="Lasiini", sub_family=self.formicinae)
+        self.lasius = Genus.objects.create(name="Lasius", tribe=self.lasiini)
+        self.niger = AntSpecies.objects.create(name="Lasius niger", genus=self.lasius)
+        self.flavus = AntSpecies.objects.create(
+            name="Lasius flavus", genus=self.lasius, forbidden_in_eu=True
+        )
+        Distribution.objects.create(species=self.niger, region=self.germany)
+        Distribution.objects.create(species=self.flavus, region=self.germany)
+        Distribution.objects.create(species=self.niger, region=self.bavaria)
+
+    def ranks(self, taxonomic_rank, country=None, sub_region=None, name=None):
+        qs = TaxonomicRanksByRegion()._get_filtered_queryset(
+            taxonomic_rank, country, sub_region, name
+        )
+        return [item["taxonomic_rank_name"] for item in qs]
+
+    def test_listings(self):
+        self.assertEqual(
+            self.ranks("species", country="DE"), ["Lasius flavus", "Lasius niger"]
+        )
+        self.assertEqual(
+            self.ranks("species", country="DE", name="fla"), ["Lasius flavus"]
+        )
+        self.assertEqual(self.ranks("species", sub_region="de-by"), ["Lasius niger"])
+        self.assertEqual(self.ranks("genera", country="DE"), ["Lasius"])
+        self.assertEqual(self.ranks("tribes", country="DE"), ["Lasiini"])
+        self.assertEqual(self.ranks("sub-families", country="DE"), ["Formicinae"])
+        self.assertEqual(self.ranks("species", country="DE-BY"), [])
+        self.assertEqual(self.ranks("species", sub_region="DE"), [])
+        self.assertIsNone(
+            TaxonomicRanksByRegion()._get_filtered_queryset("species", None, None, None)
+        )
+
+    def test_species_values(self):
+        qs = TaxonomicRanksByRegion()._get_filtered_queryset(
+            "species", "DE", None, "flavus"
+        )
+        self.assertEqual(
+            list(qs),
+            [
+                {
+                    "species_id": self.flavus.pk,
+                    "taxonomic_rank_name": "Lasius flavus",
+                    "taxonomic_rank_slug": "lasius-flavus",
+                    "forbidden_in_eu": True,
+                }
+            ],
+        )
+
+    def test_distribution_changes(self):
+        distribution = Distribution.objects.get(
+            species=self.flavus, region=self.germany
+        )
+        distribution.region = self.bavaria
+        distribution.save()
+        self.assertEqual(self.ranks("species", country="DE"), ["Lasius niger"])
+        self.assertEqual(
+            self.ranks("species", sub_region="DE-BY"), ["Lasius flavus", "Lasius niger"]
+        )
+        distribution.delete()
+        self.assertEqual(self.ranks("species", sub_region="DE-BY"), ["Lasius niger"])
+
+    def test_taxonomy_changes(self):
+        self.flavus.forbidden_in_eu = False
+        self.flavus.save()
+        self.assertFalse(RegionTaxon.objects.filter(forbidden_in_eu=True).exists())
+
+        self.lasiini.name = "Lasiinae"
+        self.lasiini.save()
+        self.assertEqual(self.ranks("tribes", country="DE"), ["Lasiinae"])
+
+        self.formicinae.delete()
+        self.assertEqual(self.ranks("sub-families", country="DE"), [])
+        self.assertEqual(self.ranks("tribes", country="DE"), ["Lasiinae"])
+
+    def test_rebuild(self):
+        RegionTaxon.objects.all().delete()
+        call_command("rebuild_region_taxa", stdout=StringIO())
+        self.assertEqual(RegionTaxon.objects.count(), 3)
+        self.assertEqual(self.ranks("genera", sub_region="DE-BY"), ["Lasius"])
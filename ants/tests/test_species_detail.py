@@ -0,0 +1,193 @@
+"""Test module for the data loader of the ant species detail page."""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ants.models import (
+    AntRegion,
+    AntSize,
+    AntSpecies,
+    AntSpeciesImage,
+    CommonName,
+    Distribution,
+    FoodItem,
+    FoodRatingSubmission,
+    Genus,
+    InvalidName,
+    Month,
+    SpeciesDifficultyRating,
+    SpeciesFoodRating,
+)
+from ants.tests.caches import LOCMEM_CACHE
+
+# queries of the whole page including session and user
+QUERY_BUDGET = 14
+
+
+class SpeciesDetailQueryCountTest(TestCase):
+    def setUp(self):
+        genus = Genus.objects.create(name="Lasius")
+        self.species = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus, slug="lasius-niger"
+        )
+        self.food_items = [
+            FoodItem.objects.create(name="Mealworms", category=FoodItem.PROTEIN),
+            FoodItem.objects.create(name="Honey", category=FoodItem.SUGAR),
+        ]
+        self.user = User.objects.create_user(username="user", password="pass")
+        self.url = reverse("ant_detail", args=[self.species.slug])
+        self.created = 0
+
+    def _add_data(self, count):
+        for i in range(self.created, self.created + count):
+            region = AntRegion.objects.create(
+                name=f"Country {i}", code=f"C{i}", type="Country"
+            )
+            Distribution.objects.create(species=self.species, region=region)
+            AntSpeciesImage.objects.create(
+                ant_species=self.species, image_file=f"images/{i}.jpg"
+            )
+            CommonName.objects.create(
+                name=f"Ant {i}", language="en", species=self.species
+            )
+            InvalidName.objects.create(name=f"Formica nigra{i}", species=self.species)
+            self.species.flight_months.add(Month.objects.create(id=i + 1, name=str(i)))
+            user = User.objects.create_user(username=f"user{i}")
+            SpeciesDifficultyRating.objects.create(
+                species=self.species, user=user, difficulty=i % 4 + 1
+            )
+            for food_item in self.food_items:
+                submission = FoodRatingSubmission.objects.create(
+                    food_item=food_item, user=user, acceptance=3
+                )
+                SpeciesFoodRating.objects.create(
+                    species=self.species,
+                    food_item=food_item,
+                    user=user,
+                    submission=submission,
+                )
+        for ant_type in (AntSize.WORKER, AntSize.QUEEN, AntSize.MALE):
+            AntSize.objects.create(
+                ant_species=self.species, type=ant_type, minimum=2, maximum=4
+            )
+        self.created += count
+
+    def _count_queries(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self.client.login(username="user", password="pass")
+        self._add_data(1)
+        few = self._count_queries()
+        self._add_data(8)
+        many = self._count_queries()
+        self.assertEqual(few, many)
+        self.assertLessEqual(many, QUERY_BUDGET)
+
+    def test_anonymous_query_count_is_constant(self):
+        self._add_data(1)
+        few = self._count_queries()
+        self._add_data(8)
+        self.assertEqual(self._count_queries(), few)
+
+    def test_user_overlay_query_count_is_constant(self):
+        self.client.login(username="user", password="pass")
+        overlay_url = reverse("ant_detail_user_overlay", args=[self.species.slug])
+        self._add_data(1)
+        few = self._count_queries(overlay_url)
+        self._add_data(8)
+        self.assertEqual(self._count_queries(overlay_url), few)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SpeciesDetailCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        genus = Genus.objects.create(name="Lasius")
+        self.species = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus, slug="lasius-niger"
+        )
+        self.region = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.user = User.objects.create_user(username="user", password="pass")
+        self.url = reverse("ant_detail", args=[self.species.slug])
+        self.overlay_url = reverse("ant_detail_user_overlay", args=[self.species.slug])
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_body_is_cached(self):
+        self.assertGreater(self._count_queries(), 1)
+        self.assertEqual(self._count_queries(), 1)
+
+    def test_distribution_invalidates_body(self):
+        self.client.get(self.url)
+        Distribution.objects.create(species=self.species, region=self.region)
+        self.assertContains(self.client.get(self.url), "Germany")
+
+    def test_region_invalidates_body(self):
+        Distribution.objects.create(species=self.species, region=self.region)
+        self.client.get(self.url)
+        self.region.name = "Deutschland"
+        self.region.save()
+        self.assertContains(self.client.get(self.url), "Deutschland")
+
+    def test_rating_invalidates_body(self):
+        self.client.get(self.url)
+        SpeciesDifficultyRating.objects.create(
+            species=self.species, user=self.user, difficulty=1
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["difficulty_total"], 1)
+
+    def test_other_species_are_not_invalidated(self):
+        other = AntSpecies.objects.create(
+            name="Lasius flavus", valid=True, genus=self.species.genus
+        )
+        self.client.get(self.url)
+        Distribution.objects.create(species=other, region=self.region)
+        self.assertEqual(self._count_queries(), 1)
+
+    def test_body_is_shared_by_users(self):
+        SpeciesDifficultyRating.objects.create(
+            species=self.species, user=self.user, difficulty=3
+        )
+        self.client.get(self.url)
+        self.client.login(username="user", password="pass")
+        response = self.client.get(self.url)
+        self.assertContains(response, self.overlay_url)
+        self.assertNotContains(response, "You can update your rating at any time.")
+
+    def test_user_overlay(self):
+        SpeciesDifficultyRating.objects.create(
+            species=self.species, user=self.user, difficulty=3
+        )
+        self.client.login(username="user", password="pass")
+        response = self.client.get(self.overlay_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'hx-swap-oob="true"')
+        self.assertContains(response, "You can update your rating at any time.")
+        self.assertIn("no-cache", response["Cache-Control"])
+
+    def test_user_overlay_anonymous(self):
+        response = self.client.get(self.overlay_url)
+        self.assertEqual(response.status_code, 204)
+        self.assertNotContains(self.client.get(self.url), self.overlay_url)
+
+    def test_user_overlay_unknown_species(self):
+        self.client.login(username="user", password="pass")
+        response = self.client.get(
+            reverse("ant_detail_user_overlay", args=["unknown-species"])
+        )
+        self.assertEqual(response.status_code, 404)
@@ -1,9 +1,17 @@
+from io import StringIO
+
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.db import IntegrityError
 from django.test import TestCase
 from django.urls import reverse
 
-from ants.models import AntSpecies, Genus, SpeciesDifficultyRating
+from ants.models import (
+    AntSpecies,
+    Genus,
+    SpeciesDifficultyAggregate,
+    SpeciesDifficultyRating,
+)
 
 
 def _make_species(name="Lasius niger", slug="lasius-niger"):
@@ -72,6 +80,7 @@ class AntSpeciesDetailDifficultyContextTest(TestCase):
     def setUp(self):
         self.species = _make_species()
         self.url = reverse("ant_detail", args=[self.species.slug])
+        self.overlay_url = reverse("ant_detail_user_overlay", args=[self.species.slug])
         self.user1 = User.objects.create_user(username="user1", password="pass")
         self.user2 = User.objects.create_user(username="user2", password="pass")
         self.user3 = User.objects.create_user(username="user3", password="pass")
@@ -115,15 +124,16 @@ class AntSpeciesDetailDifficultyContextTest(TestCase):
             species=self.species, user=self.user1, difficulty=SpeciesDifficultyRating.ADVANCED
         )
         self.client.login(username="user1", password="pass")
-        response = self.client.get(self.url)
+        response = self.client.get(self.overlay_url)
         self.assertEqual(response.context["user_difficulty_rating"], rating)
+        self.assertContains(response, 'id="difficulty-user-rating" hx-swap-oob="true"')
 
     def test_context_user_rating_logged_in_no_own_rating(self):
         SpeciesDifficultyRating.objects.create(
             species=self.species, user=self.user2, difficulty=SpeciesDifficultyRating.ADVANCED
         )
         self.client.login(username="user1", password="pass")
-        response = self.client.get(self.url)
+        response = self.client.get(self.overlay_url)
         self.assertIsNone(response.context["user_difficulty_rating"])
 
     def test_distribution_counts(self):
@@ -188,3 +198,125 @@ class SubmitDifficultyRatingViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, 'id="difficulty-rating-section"')
         self.assertContains(response, "Advanced")
+
+
+class SpeciesDifficultyAggregateTest(TestCase):
+    def setUp(self):
+        self.species = _make_species()
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass")
+            for i in range(3)
+        ]
+
+    def aggregate(self, species=None):
+        return SpeciesDifficultyAggregate.objects.filter(
+            species=species or self.species
+        ).first()
+
+    def rate(self, user, difficulty, species=None):
+        return SpeciesDifficultyRating.objects.create(
+            species=species or self.species, user=user, difficulty=difficulty
+        )
+
+    def test_ratings_are_aggregated(self):
+        self.rate(self.users[0], SpeciesDifficultyRating.BEGINNER)
+        self.rate(self.users[1], SpeciesDifficultyRating.BEGINNER)
+        self.rate(self.users[2], SpeciesDifficultyRating.ADVANCED)
+        aggregate = self.aggregate()
+        self.assertEqual(aggregate.distribution, {1: 2, 2: 0, 3: 1, 4: 0})
+        self.assertEqual(aggregate.difficulty_sum, 5)
+        self.assertEqual(aggregate.total, 3)
+        self.assertAlmostEqual(aggregate.average, 5 / 3)
+        # (2.5 * 5 + 5) / (5 + 3)
+        self.assertAlmostEqual(aggregate.bayesian_average, 17.5 / 8)
+
+    def test_changed_and_deleted_ratings(self):
+        rating = self.rate(self.users[0], SpeciesDifficultyRating.BEGINNER)
+        self.rate(self.users[1], SpeciesDifficultyRating.EXPERT)
+        rating.difficulty = SpeciesDifficultyRating.INTERMEDIATE
+        rating.save()
+        aggregate = self.aggregate()
+        self.assertEqual(aggregate.distribution, {1: 0, 2: 1, 3: 0, 4: 1})
+        self.assertEqual(aggregate.difficulty_sum, 6)
+
+        rating.delete()
+        aggregate = self.aggregate()
+        self.assertEqual(aggregate.distribution, {1: 0, 2: 0, 3: 0, 4: 1})
+        self.assertEqual(aggregate.total, 1)
+
+        SpeciesDifficultyRating.objects.all().delete()
+        self.assertIsNone(self.aggregate())
+
+    def test_moved_rating(self):
+        other = _make_species(name="Formica rufa", slug="formica-rufa")
+        rating = self.rate(self.users[0], SpeciesDifficultyRating.ADVANCED)
+        rating.species = other
+        rating.save()
+        self.assertIsNone(self.aggregate())
+        self.assertEqual(self.aggregate(other).advanced_count, 1)
+
+    def test_deleted_user(self):
+        self.rate(self.users[0], SpeciesDifficultyRating.ADVANCED)
+        self.rate(self.users[1], SpeciesDifficultyRating.EXPERT)
+        self.users[0].delete()
+        self.assertEqual(self.aggregate().distribution, {1: 0, 2: 0, 3: 0, 4: 1})
+
+    def test_submit_view_updates_aggregate(self):
+        url = reverse("rate_difficulty", args=[self.species.slug])
+        self.client.login(username="user0", password="pass")
+        self.client.post(url, {"difficulty": 1})
+        response = self.client.post(url, {"difficulty": 3})
+        self.assertEqual(response.context["difficulty_total"], 1)
+        self.assertEqual(response.context["difficulty_avg"], 3.0)
+        self.assertEqual(self.aggregate().distribution, {1: 0, 2: 0, 3: 1, 4: 0})
+
+    def test_rebuild(self):
+        self.rate(self.users[0], SpeciesDifficultyRating.BEGINNER)
+        self.rate(self.users[1], SpeciesDifficultyRating.EXPERT)
+        SpeciesDifficultyAggregate.objects.all().update(beginner_count=7)
+        call_command("rebuild_difficulty_aggregates", stdout=StringIO())
+        aggregate = self.aggregate()
+        self.assertEqual(aggregate.distribution, {1: 1, 2: 0, 3: 0, 4: 1})
+        self.assertEqual(aggregate.total, 2)
+        self.assertEqual(aggregate.bayesian_average, 17.5 / 7)
+
+
+class SpeciesByDifficultyListViewTest(TestCase):
+    def setUp(self):
+        self.url = reverse("species_by_difficulty_list")
+        self.easy = _make_species(name="Lasius niger", slug="lasius-niger")
+        self.hard = _make_species(name="Atta cephalotes", slug="atta-cephalotes")
+        self.popular = _make_species(name="Messor barbarus", slug="messor-barbarus")
+        _make_species(name="Formica rufa", slug="formica-rufa")
+        users = [User.objects.create_user(username=f"user{i}") for i in range(4)]
+        ratings = [
+            (self.easy, users[:1], SpeciesDifficultyRating.BEGINNER),
+            (self.hard, users[:1], SpeciesDifficultyRating.EXPERT),
+            (self.popular, users, SpeciesDifficultyRating.BEGINNER),
+        ]
+        for species, raters, difficulty in ratings:
+            for user in raters:
+                SpeciesDifficultyRating.objects.create(
+                    species=species, user=user, difficulty=difficulty
+                )
+
+    def species_of(self, response):
+        return [aggregate.species for aggregate in response.context["page_obj"]]
+
+    def test_sorted_by_difficulty(self):
+        # many beginner ratings outweigh a single one
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["total_objects"], 3)
+        self.assertEqual(self.species_of(response), [self.popular, self.easy, self.hard])
+        response = self.client.get(self.url, {"sort": "hardest"})
+        self.assertEqual(self.species_of(response), [self.hard, self.easy, self.popular])
+
+    def test_sorted_by_ratings(self):
+        response = self.client.get(self.url, {"sort": "ratings"})
+        self.assertEqual(self.species_of(response)[0], self.popular)
+        self.assertContains(response, "Messor barbarus")
+
+    def test_invalid_sort(self):
+        response = self.client.get(self.url, {"sort": "unknown"})
+        self.assertEqual(response.context["sort"], "easiest")
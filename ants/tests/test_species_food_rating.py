@@ -133,6 +133,7 @@ class AntSpeciesDetailFoodContextTest(TestCase):
     def setUp(self):
         self.species = _make_species()
         self.url = reverse("ant_detail", args=[self.species.slug])
+        self.overlay_url = reverse("ant_detail_user_overlay", args=[self.species.slug])
         self.user1 = User.objects.create_user(username="user1", password="pass")
         self.user2 = User.objects.create_user(username="user2", password="pass")
 
@@ -181,17 +182,15 @@ class AntSpeciesDetailFoodContextTest(TestCase):
         food = _make_food()
         rating = _make_rating(self.species, food, self.user1, acceptance=FoodRatingSubmission.TWO_STARS)
         self.client.login(username="user1", password="pass")
-        response = self.client.get(self.url)
-        item_data = response.context["food_by_category"][0]["items"][0]
-        self.assertEqual(item_data["user_rating"], rating)
+        response = self.client.get(self.overlay_url)
+        self.assertEqual(response.context["user_food_ratings"], [rating])
 
     def test_context_user_rating_logged_in_no_own_rating(self):
         food = _make_food()
         _make_rating(self.species, food, self.user2, acceptance=FoodRatingSubmission.THREE_STARS)
         self.client.login(username="user1", password="pass")
-        response = self.client.get(self.url)
-        item_data = response.context["food_by_category"][0]["items"][0]
-        self.assertIsNone(item_data["user_rating"])
+        response = self.client.get(self.overlay_url)
+        self.assertEqual(response.context["user_food_ratings"], [])
 
     def test_category_grouping(self):
         _make_food(name="Mealworms", category=FoodItem.PROTEIN)
@@ -226,7 +225,8 @@ class AntSpeciesDetailFoodContextTest(TestCase):
         food = _make_food()
         _make_rating(self.species, food, self.user1, acceptance=FoodRatingSubmission.FOUR_STARS)
         self.client.login(username="user1", password="pass")
-        response = self.client.get(self.url)
+        response = self.client.get(self.overlay_url)
+        self.assertContains(response, f'id="food-user-rating-{food.pk}" hx-swap-oob="true"')
         self.assertContains(response, "You rated this")
 
 
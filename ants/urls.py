@@ -64,6 +64,11 @@ urlpatterns = [
         views.SpeciesFilterResultsView.as_view(),
         name="species_filter_results",
     ),
+    path(
+        "species-by-difficulty/",
+        views.SpeciesByDifficultyListView.as_view(),
+        name="species_by_difficulty_list",
+    ),
     path(
         "size-comparison/",
         views.SizeComparisonView.as_view(),
@@ -79,5 +84,10 @@ urlpatterns = [
         views.SubmitDifficultyRatingView.as_view(),
         name="rate_difficulty",
     ),
+    path(
+        "<islug:slug>/user-overlay/",
+        views.AntSpeciesDetailUserOverlay.as_view(),
+        name="ant_detail_user_overlay",
+    ),
     path("<islug:slug>/", views.AntSpeciesDetail.as_view(), name="ant_detail"),
 ]
@@ -0,0 +1,43 @@
+"""
+Version numbers stored in the cache.
+
+Cached data is invalidated at once by making a version number part of its
+cache keys and bumping the version whenever the underlying data changes.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def get_version(key):
+    """Return the version stored under the cache key, creating it if missing."""
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def is_stored(key, version):
+    """
+    Return whether the version is still the one stored under the cache key.
+    This is never the case if the cache does not store anything.
+    """
+    return cache.get(key) == version
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # a new version must not collide with ones which were used before
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_versions(*keys):
+    """
+    Bump the versions stored under the cache keys now and again when the
+    current transaction commits, since other requests could cache data of
+    the old version before the commit.
+    """
+    _bump(keys)
+    transaction.on_commit(lambda: _bump(keys))
@@ -2,30 +2,118 @@
 
 import csv
 
-from django.http import HttpResponse, JsonResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
 
+# Number of rows fetched from the database at once by streaming exports.
+EXPORT_CHUNK_SIZE = 2000
+# Streaming exports send their content in blocks of about this many characters.
+EXPORT_BLOCK_SIZE = 64 * 1024
 
-def export_csv_response(queryset_or_list, filename, headers, row_getter):
-    """Return an HttpResponse with CSV content as a file download.
 
-    Adds a UTF-8 BOM so Excel opens the file correctly.
+def _iterate(queryset_or_list, chunk_size):
+    if hasattr(queryset_or_list, "iterator"):
+        # uses a server-side cursor, so not all rows are in memory at once
+        return queryset_or_list.iterator(chunk_size=chunk_size)
+    return iter(queryset_or_list)
+
+
+def _blocks(parts, block_size):
+    """Join the parts to blocks of about block_size characters."""
+    block = []
+    length = 0
+    for part in parts:
+        block.append(part)
+        length += len(part)
+        if length >= block_size:
+            yield "".join(block)
+            block = []
+            length = 0
+    if block:
+        yield "".join(block)
+
+
+class _Echo:
+    """File-like object which returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(items, headers, row_getter):
+    writer = csv.writer(_Echo())
+    yield "\ufeff"  # BOM for Excel UTF-8 compatibility
+    yield writer.writerow(headers)
+    for item in items:
+        yield writer.writerow(row_getter(item))
+
+
+def export_csv_streaming_response(
+    queryset_or_list,
+    filename,
+    headers,
+    row_getter,
+    chunk_size=EXPORT_CHUNK_SIZE,
+    block_size=EXPORT_BLOCK_SIZE,
+):
+    """Return a StreamingHttpResponse with CSV content as a file download.
+
+    Querysets are read in chunks of chunk_size rows and the content is sent
+    in blocks of about block_size characters, so the memory usage does not
+    depend on the number of rows. Adds a UTF-8 BOM so Excel opens the file
+    correctly.
     """
-    response = HttpResponse(content_type="text/csv; charset=utf-8")
+    lines = _csv_lines(_iterate(queryset_or_list, chunk_size), headers, row_getter)
+    response = StreamingHttpResponse(
+        _blocks(lines, block_size), content_type="text/csv; charset=utf-8"
+    )
     response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
-    response.write("\ufeff")  # BOM for Excel UTF-8 compatibility
-    writer = csv.writer(response)
-    writer.writerow(headers)
-    for item in queryset_or_list:
-        writer.writerow(row_getter(item))
     return response
 
 
-def export_json_response(data, filename):
-    """Return a JsonResponse as a file download."""
-    response = JsonResponse(
-        data,
-        safe=False,
-        json_dumps_params={"ensure_ascii": False, "indent": 2},
+def _json_parts(items, item_getter, ndjson):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    if ndjson:
+        for item in items:
+            yield encoder.encode(item_getter(item)) + "\n"
+        return
+
+    yield "["
+    separator = ""
+    for item in items:
+        yield separator + encoder.encode(item_getter(item))
+        separator = ","
+    yield "]"
+
+
+def export_json_streaming_response(
+    queryset_or_list,
+    filename,
+    item_getter=None,
+    ndjson=False,
+    chunk_size=EXPORT_CHUNK_SIZE,
+    block_size=EXPORT_BLOCK_SIZE,
+):
+    """Return a StreamingHttpResponse with JSON content as a file download.
+
+    The items are converted with item_getter (if given) and encoded one by
+    one without indentation. The content is a JSON array or, if ndjson is
+    set, one JSON object per line. Querysets are read in chunks like in
+    export_csv_streaming_response.
+    """
+    parts = _json_parts(
+        _iterate(queryset_or_list, chunk_size),
+        item_getter or (lambda item: item),
+        ndjson,
+    )
+    if ndjson:
+        content_type = "application/x-ndjson; charset=utf-8"
+        extension = "ndjson"
+    else:
+        content_type = "application/json"
+        extension = "json"
+    response = StreamingHttpResponse(
+        _blocks(parts, block_size), content_type=content_type
     )
-    response["Content-Disposition"] = f'attachment; filename="{filename}.json"'
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
     return response
@@ -3,20 +3,23 @@ Module for all models of ants app.
 """
 
 import datetime
-import json
+import gzip
 import logging
+import re
 
 from dal import autocomplete
 from django.conf import settings
 from django.core.mail import send_mail
 from django.core.paginator import Paginator
 from django.db import IntegrityError, transaction
-from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, IntegerField, Max, Min, Q, Sum, When
+from django.db.models import Case, Exists, ExpressionWrapper, F, FloatField, IntegerField, Max, Min, OuterRef, Q, Sum, When, Window
+from django.db.models.functions import RowNumber
 from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 from django.utils.decorators import method_decorator
 from django.utils.text import slugify
 from django.views.decorators.cache import never_cache
@@ -27,11 +30,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 
 logger = logging.getLogger(__name__)
 
-from flights.models import Flight
 
+from . import nuptial_flight_table, rankings, region_resolver, species_detail
 from .forms import FoodItemCreateForm, FoodRatingImageForm, NuptialFlightReportForm
-from .models import AntRegion, AntSize, AntSpecies, FoodItem, FoodRatingSubmission, Genus, RatingPhoto, SpeciesDifficultyRating, SpeciesFoodRating, SubFamily, Tribe
-from .utils.export import export_csv_response, export_json_response
+from .helpers import filter_by_flight_month
+from .models import AntRegion, AntSize, AntSpecies, FoodItem, FoodItemAcceptance, FoodRatingSubmission, Genus, RatingPhoto, RegionTaxon, SpeciesDifficultyAggregate, SpeciesDifficultyRating, SpeciesFoodAcceptance, SpeciesFoodRating, SubFamily, Tribe
+from .utils.export import export_csv_streaming_response, export_json_streaming_response
 
 _MONTH_NAMES_SHORT = [
     "Jan",
@@ -64,51 +68,42 @@ _MONTH_NAMES_FULL = [
 # List of (month_number, short_name) tuples for templates
 MONTHS = [(i + 1, name) for i, name in enumerate(_MONTH_NAMES_SHORT)]
 MONTHS_FULL = [(i + 1, name) for i, name in enumerate(_MONTH_NAMES_FULL)]
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
 
 
 def _nuptial_flight_queryset(request):
     """Return a filtered AntSpecies queryset based on GET params."""
-    qs = (
-        AntSpecies.objects.prefetch_related("flight_months")
-        .filter(flight_months__isnull=False, valid=True)
-        .order_by("name")
+    return _filter_nuptial_flights(nuptial_flight_table.normalize_filters(request.GET))
+
+
+def _filter_nuptial_flights(filters):
+    """Return a filtered AntSpecies queryset based on normalized filters."""
+    qs = AntSpecies.objects.filter(flight_months_mask__gt=0, valid=True).order_by(
+        "name"
     )
 
-    name = request.GET.get("name", "")
-    if len(name) >= 3:
-        qs = qs.filter(name__icontains=name)
+    if filters["name"]:
+        qs = qs.filter(name__icontains=filters["name"])
 
     # Region: prefer state over country
-    state = request.GET.get("state", "all")
-    country = request.GET.get("country", "all")
-    region_id = None
-    if state != "all":
-        region_id = state
-    elif country != "all":
-        region_id = country
-    if region_id:
-        try:
-            qs = qs.filter(distribution__region__id=int(region_id))
-        except (ValueError, TypeError):
-            qs = qs.filter(distribution__region__code__iexact=region_id)
+    region_id = filters["state"] if filters["state"] != "all" else filters["country"]
+    if region_id != "all":
+        region = region_resolver.resolve(region_id)
+        if region is None:
+            return qs.none()
+        qs = qs.filter(distribution__region_id=region.id)
 
-    month = request.GET.get("month", "all")
-    if month == "current":
-        month = str(datetime.date.today().month)
-    if month != "all":
-        try:
-            qs = qs.filter(flight_months__id=int(month))
-        except (ValueError, TypeError):
-            pass
+    if filters["month"] != "all":
+        qs = filter_by_flight_month(qs, int(filters["month"]))
 
-    return qs.distinct()
+    return qs
 
 
 def _build_entries(page_qs):
     """Convert a queryset page into template-ready dicts."""
     entries = []
     for ant in page_qs:
-        flight_month_ids = frozenset(m.id for m in ant.flight_months.all())
+        flight_month_ids = frozenset(ant.flight_month_ids)
         hr = ant.flight_hour_range
         entries.append(
             {
@@ -152,13 +147,7 @@ class NuptialFlightTableView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        countries = (
-            AntRegion.countries.filter(
-                distribution__species__flight_months__isnull=False
-            )
-            .distinct()
-            .order_by("name")
-        )
+        countries = AntRegion.countries.with_flight_data().order_by("name")
         today = datetime.date.today()
         context["countries"] = countries
         context["months_full"] = MONTHS_FULL
@@ -189,11 +178,8 @@ class NuptialFlightTableView(TemplateView):
         initial_states = []
         if initial_country != "all":
             initial_states = list(
-                AntRegion.states.filter(
-                    parent__code__iexact=initial_country,
-                    distribution__species__flight_months__isnull=False,
-                )
-                .distinct()
+                AntRegion.states.with_flight_data()
+                .filter(parent__code__iexact=initial_country)
                 .order_by("name")
             )
             if initial_state != "all":
@@ -207,11 +193,11 @@ class NuptialFlightTableView(TemplateView):
 
         loc_parts = []
         if initial_country != "all":
-            obj = _resolve_region(initial_country)
+            obj = region_resolver.resolve(initial_country)
             if obj:
                 loc_parts.append(obj.name)
         if initial_state != "all":
-            obj = _resolve_region(initial_state)
+            obj = region_resolver.resolve(initial_state)
             if obj:
                 loc_parts.append(obj.name)
 
@@ -225,6 +211,31 @@ class NuptialFlightTableView(TemplateView):
         return context
 
 
+def render_nuptial_flight_print(filters, name_filter=""):
+    """Render the print view of the nuptial flight table for normalized filters."""
+    month_label = ""
+    if filters["month"] != "all" and 1 <= int(filters["month"]) <= 12:
+        month_label = _MONTH_NAMES_FULL[int(filters["month"]) - 1]
+
+    location_label = ""
+    region_id = filters["state"] if filters["state"] != "all" else filters["country"]
+    if region_id != "all":
+        obj = region_resolver.resolve(region_id)
+        if obj:
+            location_label = obj.name
+
+    return render_to_string(
+        "ants/nuptial_flight_table_print.html",
+        {
+            "entries": _build_entries(_filter_nuptial_flights(filters)),
+            "months": MONTHS,
+            "month_label": month_label,
+            "location_label": location_label,
+            "name_filter": name_filter,
+        },
+    )
+
+
 @method_decorator(never_cache, name="dispatch")
 class NuptialFlightTableRowsView(View):
     """HTMX fragment: paginated table rows + pagination + count.
@@ -235,23 +246,60 @@ class NuptialFlightTableRowsView(View):
     ENTRIES_PER_PAGE = 30
 
     def get(self, request):
-        from django.template.loader import render_to_string
+        filters = nuptial_flight_table.normalize_filters(request.GET)
+        if request.GET.get("print") == "1":
+            return self._print_response(request, filters)
 
-        qs = _nuptial_flight_queryset(request)
+        html, cached = nuptial_flight_table.cached_rows(
+            filters, lambda filters: self._render_rows(request, filters)
+        )
+        response = HttpResponse(html, content_type="text/html")
+        response["X-Cache"] = "HIT" if cached else "MISS"
+        return response
 
-        if request.GET.get("print") == "1":
-            entries = _build_entries(qs)
-            context = self._print_context(request, entries)
-            html = render_to_string(
-                "ants/nuptial_flight_table_print.html", context, request=request
+    def _print_response(self, request, filters):
+        # the name is shown in the print view even if it is too short to filter
+        month = (
+            nuptial_flight_table.print_snapshot_month(filters)
+            if not request.GET.get("name")
+            else False
+        )
+        content = None
+        if month is not False:
+            content = nuptial_flight_table.load_print_snapshot(filters)
+        if content is None:
+            region_id = None
+            if month is not False and filters["country"] != "all":
+                region = region_resolver.resolve(filters["country"])
+                if region is None:
+                    month = False
+                else:
+                    region_id = region.id
+            # taken before rendering, so a snapshot of data which changes
+            # meanwhile is stored for an outdated version
+            version = nuptial_flight_table.print_snapshot_version(region_id)
+            html = render_nuptial_flight_print(filters, request.GET.get("name", ""))
+            if month is False:
+                return HttpResponse(html, content_type="text/html")
+            content = nuptial_flight_table.store_print_snapshot(
+                region_id, month, html, version
             )
-            return HttpResponse(html, content_type="text/html")
 
+        if _ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+            response = HttpResponse(content, content_type="text/html")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(gzip.decompress(content), content_type="text/html")
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+    def _render_rows(self, request, filters):
+        qs = _filter_nuptial_flights(filters)
         total = qs.count()
         paginator = Paginator(qs, self.ENTRIES_PER_PAGE)
-        page_obj = paginator.get_page(request.GET.get("page", 1))
+        page_obj = paginator.get_page(filters["page"])
         entries = _build_entries(page_obj.object_list)
-        html = render_to_string(
+        return render_to_string(
             "ants/nuptial_flight_table_rows.html",
             {
                 "entries": entries,
@@ -261,38 +309,6 @@ class NuptialFlightTableRowsView(View):
             },
             request=request,
         )
-        return HttpResponse(html, content_type="text/html")
-
-    def _print_context(self, request, entries):
-        month = request.GET.get("month", "all")
-        if month == "current":
-            month = str(datetime.date.today().month)
-        month_label = ""
-        if month != "all":
-            try:
-                month_label = _MONTH_NAMES_FULL[int(month) - 1]
-            except (ValueError, IndexError):
-                pass
-
-        parts = []
-        country_id = request.GET.get("country", "all")
-        state_id = request.GET.get("state", "all")
-        if state_id != "all":
-            obj = _resolve_region(state_id)
-            if obj:
-                parts.append(obj.name)
-        elif country_id != "all":
-            obj = _resolve_region(country_id)
-            if obj:
-                parts.append(obj.name)
-
-        return {
-            "entries": entries,
-            "months": MONTHS,
-            "month_label": month_label,
-            "location_label": ", ".join(parts),
-            "name_filter": request.GET.get("name", ""),
-        }
 
 
 class NuptialFlightTableStatesView(View):
@@ -310,11 +326,8 @@ class NuptialFlightTableStatesView(View):
             except (ValueError, TypeError):
                 parent_filter = {"parent__code__iexact": country_id}
             states = (
-                AntRegion.states.filter(
-                    distribution__species__flight_months__isnull=False,
-                    **parent_filter,
-                )
-                .distinct()
+                AntRegion.states.with_flight_data()
+                .filter(**parent_filter)
                 .order_by("name")
             )
         from django.template.loader import render_to_string
@@ -333,12 +346,14 @@ class NuptialFlightCSVExportView(View):
     """Server-side CSV export with current filter params."""
 
     def get(self, request):
-        qs = _nuptial_flight_queryset(request)
+        qs = _nuptial_flight_queryset(request).only(
+            "name", "flight_months_mask", "flight_hour_range", "flight_climate"
+        )
         headers = ["Species"] + _MONTH_NAMES_SHORT + ["Flight time", "Climate"]
         climate_map = {"m": "Moderate", "w": "Warm", "s": "Muggy"}
 
         def row_getter(ant):
-            flight_ids = frozenset(m.id for m in ant.flight_months.all())
+            flight_ids = frozenset(ant.flight_month_ids)
             month_flags = ["x" if i + 1 in flight_ids else "" for i in range(12)]
             hr = ant.flight_hour_range
             time_str = f"{hr.lower}-{hr.upper - 1}" if hr else ""
@@ -349,38 +364,37 @@ class NuptialFlightCSVExportView(View):
             )
 
         filename = _build_export_filename(request)
-        return export_csv_response(qs, filename, headers, row_getter)
+        return export_csv_streaming_response(qs, filename, headers, row_getter)
 
 
 class NuptialFlightJSONExportView(View):
     """Server-side JSON export with current filter params."""
 
     def get(self, request):
-        qs = _nuptial_flight_queryset(request)
-        data = []
-        for ant in qs:
-            hr = ant.flight_hour_range
-            data.append(
-                {
-                    "id": ant.id,
-                    "name": ant.name,
-                    "flight_months": sorted(m.id for m in ant.flight_months.all()),
-                    "flight_hour_range": {"lower": hr.lower, "upper": hr.upper - 1}
-                    if hr
-                    else None,
-                    "flight_climate": ant.flight_climate,
-                    "forbidden_in_eu": ant.forbidden_in_eu,
-                }
-            )
-        return export_json_response(data, _build_export_filename(request))
+        qs = _nuptial_flight_queryset(request).only(
+            "name",
+            "flight_months_mask",
+            "flight_hour_range",
+            "flight_climate",
+            "forbidden_in_eu",
+        )
 
+        def item_getter(ant):
+            hr = ant.flight_hour_range
+            return {
+                "id": ant.id,
+                "name": ant.name,
+                "flight_months": ant.flight_month_ids,
+                "flight_hour_range": {"lower": hr.lower, "upper": hr.upper - 1}
+                if hr
+                else None,
+                "flight_climate": ant.flight_climate,
+                "forbidden_in_eu": ant.forbidden_in_eu,
+            }
 
-def _resolve_region(value):
-    """Look up AntRegion by code (case-insensitive) or numeric id."""
-    try:
-        return AntRegion.objects.filter(id=int(value)).first()
-    except (ValueError, TypeError):
-        return AntRegion.objects.filter(code__iexact=value).first()
+        return export_json_streaming_response(
+            qs, _build_export_filename(request), item_getter
+        )
 
 
 def _build_export_filename(request):
@@ -392,11 +406,11 @@ def _build_export_filename(request):
     country_id = request.GET.get("country", "all")
     state_id = request.GET.get("state", "all")
     if state_id != "all":
-        obj = _resolve_region(state_id)
+        obj = region_resolver.resolve(state_id)
         if obj:
             parts.append(slugify(obj.name))
     elif country_id != "all":
-        obj = _resolve_region(country_id)
+        obj = region_resolver.resolve(country_id)
         if obj:
             parts.append(slugify(obj.name))
     month = request.GET.get("month", "all")
@@ -416,33 +430,42 @@ class TaxonomicRanksByRegion(TemplateView):
     template_name = "ants/antdb/ant_species_by_region.html"
 
     def _get_rank_config(self, taxonomic_rank):
-        """Return (name_field, slug_field, rank_class) for a given taxonomic rank."""
+        """
+        Return (name_field, slug_field, rank_class) of RegionTaxon for a given
+        taxonomic rank.
+        """
         if taxonomic_rank == "genera":
-            return "genus__name", "genus__slug", Genus
+            return "genus_name", "genus_slug", Genus
         if taxonomic_rank == "tribes":
-            return "genus__tribe__name", "genus__tribe__slug", Tribe
+            return "tribe_name", "tribe_slug", Tribe
         if taxonomic_rank == "sub-families":
-            return (
-                "genus__tribe__sub_family__name",
-                "genus__tribe__sub_family__slug",
-                SubFamily,
-            )
-        return "name", "slug", AntSpecies
+            return "sub_family_name", "sub_family_slug", SubFamily
+        return "species_name", "species_slug", AntSpecies
+
+    def _get_region(self, country, sub_region):
+        """
+        Return the RegionRecord of the selected sub region or country or None
+        if it does not exist. Only countries and their sub regions are
+        considered.
+        """
+        if sub_region:
+            region = region_resolver.resolve(sub_region)
+            parent = region_resolver.resolve(region.parent_id) if region else None
+            return region if parent and parent.type == "Country" else None
+        region = region_resolver.resolve(country)
+        return region if region and region.type == "Country" else None
 
     def _get_filtered_queryset(self, taxonomic_rank, country, sub_region, name):
         """Return annotated, filtered queryset for a taxonomic rank (no pagination)."""
         name_field, slug_field, rank_class = self._get_rank_config(taxonomic_rank)
+        if not sub_region and not country:
+            return None
 
-        if sub_region:
-            qs = AntSpecies.objects.by_region_code_or_id(sub_region).select_related(
-                "genus", "genus__tribe", "genus__tribe__sub_family"
-            )
-        elif country:
-            qs = AntSpecies.objects.by_country_code(country).select_related(
-                "genus", "genus__tribe", "genus__tribe__sub_family"
-            )
+        region = self._get_region(country, sub_region)
+        if region is None:
+            qs = RegionTaxon.objects.none()
         else:
-            return None
+            qs = RegionTaxon.objects.filter(region_id=region.id)
 
         qs = qs.annotate(
             taxonomic_rank_name=F(name_field),
@@ -451,26 +474,32 @@ class TaxonomicRanksByRegion(TemplateView):
         if name:
             qs = qs.filter(taxonomic_rank_name__icontains=name)
         if taxonomic_rank == "tribes":
-            qs = qs.exclude(genus__tribe__name="")
-
-        is_species = rank_class == AntSpecies
-        if is_species:
-            qs = qs.values(
-                "id", "taxonomic_rank_name", "taxonomic_rank_slug", "forbidden_in_eu"
-            )
-        else:
-            qs = qs.values("taxonomic_rank_name", "taxonomic_rank_slug")
-
-        return qs.distinct("taxonomic_rank_name").order_by("taxonomic_rank_name")
+            qs = qs.exclude(tribe_name="")
+
+        if rank_class == AntSpecies:
+            # a species occurs only once per region
+            return qs.values(
+                "species_id",
+                "taxonomic_rank_name",
+                "taxonomic_rank_slug",
+                "forbidden_in_eu",
+            ).order_by("taxonomic_rank_name")
+        # species without the rank must not show up as an empty rank
+        return (
+            qs.filter(taxonomic_rank_name__isnull=False)
+            .values("taxonomic_rank_name", "taxonomic_rank_slug")
+            .distinct()
+            .order_by("taxonomic_rank_name")
+        )
 
     def get(self, request, *args, **kwargs):
         export = request.GET.get("export")
-        if export in ("csv", "json"):
+        if export in ("csv", "json", "ndjson"):
             return self._handle_export(request, export, **kwargs)
         return super().get(request, *args, **kwargs)
 
     def _handle_export(self, request, fmt, **kwargs):
-        """Return CSV or JSON export response for the current filter."""
+        """Return CSV, JSON or NDJSON export response for the current filter."""
         taxonomic_rank = kwargs.get("taxonomic_rank", "species")
         country = request.GET.get("country")
         sub_region = request.GET.get("subRegion")
@@ -482,11 +511,11 @@ class TaxonomicRanksByRegion(TemplateView):
 
         filename_parts = [f"ant-{taxonomic_rank}"]
         if country:
-            country_obj = AntRegion.objects.get_by_id_or_code(country)
+            country_obj = region_resolver.resolve(country)
             if country_obj:
                 filename_parts.append(slugify(country_obj.name))
         if sub_region:
-            subregion_obj = AntRegion.objects.get_by_id_or_code(sub_region)
+            subregion_obj = region_resolver.resolve(sub_region)
             if subregion_obj:
                 filename_parts.append(slugify(subregion_obj.name))
         if name and len(name) >= 3:
@@ -505,28 +534,24 @@ class TaxonomicRanksByRegion(TemplateView):
             else:
                 headers = ["Name"]
                 row_getter = lambda item: [item["taxonomic_rank_name"]]  # noqa: E731
-            return export_csv_response(qs, filename, headers, row_getter)
+            return export_csv_streaming_response(qs, filename, headers, row_getter)
 
         # JSON
         if is_species:
-            data = [
-                {
-                    "id": item.get("id"),
-                    "name": item["taxonomic_rank_name"],
-                    "slug": item["taxonomic_rank_slug"],
-                    "forbidden_in_eu": item["forbidden_in_eu"],
-                }
-                for item in qs
-            ]
+            item_getter = lambda item: {  # noqa: E731
+                "id": item["species_id"],
+                "name": item["taxonomic_rank_name"],
+                "slug": item["taxonomic_rank_slug"],
+                "forbidden_in_eu": item["forbidden_in_eu"],
+            }
         else:
-            data = [
-                {
-                    "name": item["taxonomic_rank_name"],
-                    "slug": item["taxonomic_rank_slug"],
-                }
-                for item in qs
-            ]
-        return export_json_response(data, filename)
+            item_getter = lambda item: {  # noqa: E731
+                "name": item["taxonomic_rank_name"],
+                "slug": item["taxonomic_rank_slug"],
+            }
+        return export_json_streaming_response(
+            qs, filename, item_getter, ndjson=fmt == "ndjson"
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -542,7 +567,7 @@ class TaxonomicRanksByRegion(TemplateView):
 
         if country:
             context["country"] = country
-            country_obj = AntRegion.objects.get_by_id_or_code(country)
+            country_obj = region_resolver.resolve(country)
             if country_obj:
                 context["country_name"] = country_obj.name
             sub_regions = AntRegion.states.with_ants_and_country(country).order_by(
@@ -552,7 +577,7 @@ class TaxonomicRanksByRegion(TemplateView):
 
         if sub_region:
             context["sub_region"] = sub_region
-            subregion_obj = AntRegion.objects.get_by_id_or_code(sub_region)
+            subregion_obj = region_resolver.resolve(sub_region)
             if subregion_obj:
                 context["subregion_name"] = subregion_obj.name
 
@@ -579,69 +604,12 @@ class TaxonomicRanksByRegion(TemplateView):
 
 
 RANKING_OPTIONS = {
-    "countries-by-species": {
-        "heading": "countries by number of ant species",
-        "query": lambda n: list(
-            AntSpecies.objects.filter(distribution__region__type="Country")
-            .annotate(rank_entry_name=F("distribution__region__name"))
-            .values("rank_entry_name")
-            .annotate(total=Count("rank_entry_name"))
-            .order_by("-total")[:n]
-        ),
-    },
-    "countries-by-genera": {
-        "heading": "countries by number of ant genera",
-        "query": lambda n: list(
-            AntSpecies.objects.filter(distribution__region__type="Country")
-            .annotate(rank_entry_name=F("distribution__region__name"))
-            .values("rank_entry_name")
-            .annotate(total=Count("genus", distinct=True))
-            .order_by("-total")[:n]
-        ),
-    },
-    "species-by-countries": {
-        "heading": "ant species by number of countries",
-        "query": lambda n: list(
-            AntSpecies.objects.filter(distribution__region__type="Country")
-            .annotate(
-                rank_entry_name=F("name"), total=Count("distribution__region__name")
-            )
-            .values("rank_entry_name", "total")
-            .order_by("-total")[:n]
-        ),
-    },
-    "genera-by-countries": {
-        "heading": "ant genera by number of countries",
-        "query": lambda n: list(
-            AntSpecies.objects.filter(
-                distribution__region__type="Country", genus__isnull=False
-            )
-            .values("genus__name")
-            .annotate(
-                rank_entry_name=F("genus__name"),
-                total=Count("distribution__region__code", distinct=True),
-            )
-            .values("rank_entry_name", "total")
-            .order_by("-total")[:n]
-        ),
-    },
-    "genera-by-species": {
-        "heading": "ant genera by number of species",
-        "query": lambda n: list(
-            Genus.objects.annotate(rank_entry_name=F("name"), total=Count("species"))
-            .values("rank_entry_name", "total")
-            .order_by("-total")[:n]
-        ),
-    },
-    "authors-by-species": {
-        "heading": "authors by number of ant species",
-        "query": lambda n: list(
-            AntSpecies.objects.annotate(rank_entry_name=F("author"))
-            .values("rank_entry_name")
-            .annotate(total=Count("rank_entry_name"))
-            .order_by("-total")[:n]
-        ),
-    },
+    "countries-by-species": {"heading": "countries by number of ant species"},
+    "countries-by-genera": {"heading": "countries by number of ant genera"},
+    "species-by-countries": {"heading": "ant species by number of countries"},
+    "genera-by-countries": {"heading": "ant genera by number of countries"},
+    "genera-by-species": {"heading": "ant genera by number of species"},
+    "authors-by-species": {"heading": "authors by number of ant species"},
 }
 
 
@@ -659,7 +627,7 @@ class TopListsHub(TemplateView):
         context["selected_ranking"] = ranking_key
         context["entries"] = entries
         if ranking_key in RANKING_OPTIONS:
-            ranking = RANKING_OPTIONS[ranking_key]["query"](entries)
+            ranking = rankings.get_ranking(ranking_key, entries)
             context["ranking"] = ranking
             context["max_total"] = ranking[0]["total"] if ranking else 0
             context["heading"] = RANKING_OPTIONS[ranking_key]["heading"]
@@ -678,16 +646,19 @@ class ForbiddenInEUSpeciesListView(TemplateView):
     def get(self, request, *args, **kwargs):
         export = request.GET.get("export")
         if export == "csv":
-            qs = self._get_queryset()
-            return export_csv_response(
+            qs = self._get_queryset().only("name")
+            return export_csv_streaming_response(
                 qs,
                 self._FILENAME,
                 headers=["Name"],
                 row_getter=lambda item: [item.name],
             )
-        if export == "json":
-            data = list(self._get_queryset().values("id", "name", "slug"))
-            return export_json_response(data, self._FILENAME)
+        if export in ("json", "ndjson"):
+            return export_json_streaming_response(
+                self._get_queryset().values("id", "name", "slug"),
+                self._FILENAME,
+                ndjson=export == "ndjson",
+            )
         return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
@@ -708,8 +679,42 @@ class ForbiddenInEUSpeciesListView(TemplateView):
         return context
 
 
+class SpeciesByDifficultyListView(TemplateView):
+    """View to list the species with difficulty ratings sorted by difficulty."""
+
+    template_name = "ants/species_by_difficulty_list.html"
+    SORT_OPTIONS = {
+        "easiest": ("bayesian_average", "species__name"),
+        "hardest": ("-bayesian_average", "species__name"),
+        "ratings": ("-total", "bayesian_average", "species__name"),
+    }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        sort = self.request.GET.get("sort")
+        if sort not in self.SORT_OPTIONS:
+            sort = "easiest"
+        aggregates = SpeciesDifficultyAggregate.objects.select_related(
+            "species"
+        ).order_by(*self.SORT_OPTIONS[sort])
+
+        paginator = Paginator(aggregates, 50)
+        page_obj = paginator.get_page(self.request.GET.get("page"))
+
+        context["page_obj"] = page_obj
+        context["total_objects"] = paginator.count
+        context["sort"] = sort
+        context["difficulty_choices"] = SpeciesDifficultyRating.DIFFICULTY_CHOICES
+        return context
+
+
+@method_decorator(never_cache, name="dispatch")
 class AntSpeciesDetail(DetailView):
-    """Detail view of an ant species."""
+    """
+    Detail view of an ant species. The body of the page is cached by
+    species_detail instead of the whole page, the ratings of a logged-in
+    user are loaded by AntSpeciesDetailUserOverlay.
+    """
 
     model = AntSpecies
     template_name = "ants/antspecies_detail/antspecies_detail.html"
@@ -719,145 +724,72 @@ class AntSpeciesDetail(DetailView):
             super()
             .get_queryset()
             .select_related("genus", "genus__tribe", "genus__tribe__sub_family")
-            .prefetch_related("commonname_set", "invalid_names", "sizes", "images")
         )
 
-    def __get_flight_frequency(self, ant_species):
-        has_flights = Flight.objects.filter(ant_species=ant_species).exists()
-
-        if has_flights:
-            flight_frequency = Flight.objects.flight_frequency_per_month(ant_species)
-            return json.dumps(
-                [value for key, value in flight_frequency.items()],
-                separators=(",", ":"),
-            )
-
-        return None
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context["body"] = species_detail.cached_body(context["object"])
+        return context
 
-        ant = context["object"]
-
-        countries = AntRegion.countries.filter(distribution__species=ant.id)
 
-        context["countries"] = countries
+@method_decorator(never_cache, name="dispatch")
+class AntSpeciesDetailUserOverlay(View):
+    """
+    HTMX partial view: returns the ratings of the logged-in user which are
+    swapped into the cached body of the species detail page.
+    """
 
-        common_names = ant.common_names.all()
-        context["common_names"] = common_names
-
-        invalid_names = ant.invalid_names.all()
-        context["invalid_names"] = invalid_names
-        worker_size = AntSize.objects.by_ant_and_type(ant.id, AntSize.WORKER)
-        queen_size = AntSize.objects.by_ant_and_type(ant.id, AntSize.QUEEN)
-        male_size = AntSize.objects.by_ant_and_type(ant.id, AntSize.MALE)
-
-        context["worker_size"] = worker_size
-        context["queen_size"] = queen_size
-        context["male_size"] = male_size
-        context["flight_frequency"] = self.__get_flight_frequency(ant)
-
-        ratings = ant.difficulty_ratings.all()
-        difficulty_ctx = _build_difficulty_context(ratings)
-        context.update(difficulty_ctx)
-        context["user_difficulty_rating"] = (
-            ratings.filter(user=self.request.user).first()
-            if self.request.user.is_authenticated
-            else None
+    def get(self, request, slug):
+        if not request.user.is_authenticated:
+            return HttpResponse(status=204)
+        species = get_object_or_404(AntSpecies, slug=slug)
+        return render(
+            request,
+            "ants/antspecies_detail/antspecies_detail_user_overlay.html",
+            species_detail.load_user_overlay(species, request.user),
         )
 
-        context.update(_build_food_context(ant, self.request.user))
 
-        return context
+_FOOD_OVERVIEW_TOP_N = 10
 
 
-def _build_difficulty_context(ratings):
-    """Return difficulty rating aggregate data for template context."""
-    choices = SpeciesDifficultyRating.DIFFICULTY_CHOICES
-    total = ratings.count()
-    distribution = {
-        level: ratings.filter(difficulty=level).count() for level, _ in choices
-    }
-    avg = ratings.aggregate(avg=Avg("difficulty"))["avg"]
-    avg_rounded = round(avg, 1) if avg is not None else None
+def _species_acceptance_values(acceptances, *fields):
+    return acceptances.values(
+        *fields,
+        "species_id",
+        "species__name",
+        "species__slug",
+        "rating_count",
+        species_avg=F("average_acceptance"),
+    )
 
-    if total > 0:
-        dominant_level = max(distribution, key=distribution.get)
-        dominant_label = dict(choices)[dominant_level]
-    else:
-        dominant_level = None
-        dominant_label = None
 
+def _food_item_totals(acceptance):
     return {
-        "difficulty_distribution": distribution,
-        "difficulty_total": total,
-        "difficulty_choices": choices,
-        "difficulty_avg": avg_rounded,
-        "dominant_difficulty_level": dominant_level,
-        "dominant_difficulty_label": dominant_label,
+        "total_species": acceptance.species_count,
+        "total_ratings": acceptance.rating_count,
+        "overall_avg": (
+            round(acceptance.average, 1) if acceptance.rating_count else None
+        ),
     }
 
 
-def _build_food_context(species, user):
-    """Return food acceptance rating data grouped by category for template context."""
-    food_items = list(FoodItem.objects.all())
-    ratings_qs = species.food_ratings.select_related("food_item", "submission").all()
-
-    ratings_by_food = {}
-    user_rating_by_food = {}
-    for rating in ratings_qs:
-        fid = rating.food_item_id
-        ratings_by_food.setdefault(fid, []).append(rating)
-        if user.is_authenticated and rating.user_id == user.pk:
-            user_rating_by_food[fid] = rating
-
-    categories = {}
-    for food_item in food_items:
-        item_ratings = ratings_by_food.get(food_item.pk, [])
-        total = len(item_ratings)
-        avg = round(sum(r.submission.acceptance for r in item_ratings) / total, 1) if total > 0 else None
-
-        cat = food_item.category
-        if cat not in categories:
-            categories[cat] = {
-                "category_key": cat,
-                "category_label": dict(FoodItem.CATEGORY_CHOICES)[cat],
-                "items": [],
-            }
-        categories[cat]["items"].append({
-            "food_item": food_item,
-            "total": total,
-            "avg": avg,
-            "user_rating": user_rating_by_food.get(food_item.pk),
-        })
-
-    ordered_keys = [key for key, _ in FoodItem.CATEGORY_CHOICES]
-    food_by_category = [categories[k] for k in ordered_keys if k in categories]
-    return {"food_by_category": food_by_category}
-
-
-_FOOD_OVERVIEW_TOP_N = 10
-
-
 def _build_food_overview_item_context(food_item):
-    ratings_qs = (
-        SpeciesFoodRating.objects
-        .filter(food_item=food_item)
-        .values("species_id", "species__name", "species__slug")
-        .annotate(species_avg=Avg("submission__acceptance"), rating_count=Count("id"))
-        .order_by("-species_avg", "-rating_count")
+    top_species = list(
+        _species_acceptance_values(
+            SpeciesFoodAcceptance.objects.filter(food_item=food_item)
+        ).order_by("-species_avg", "-rating_count")[:_FOOD_OVERVIEW_TOP_N]
     )
-    all_species = list(ratings_qs)
-    agg = food_item.species_ratings.aggregate(avg=Avg("submission__acceptance"), total=Count("id"))
-    overall_avg = round(float(agg["avg"]), 1) if agg["avg"] is not None else None
-    return {
+    acceptance = FoodItemAcceptance.objects.filter(food_item=food_item).first()
+    if acceptance is None:
+        acceptance = FoodItemAcceptance(food_item=food_item)
+    context = {
         "food_item": food_item,
-        "top_species": all_species[:_FOOD_OVERVIEW_TOP_N],
-        "extra_count": max(0, len(all_species) - _FOOD_OVERVIEW_TOP_N),
-        "total_species": len(all_species),
-        "total_ratings": agg["total"],
-        "overall_avg": overall_avg,
+        "top_species": top_species,
+        "extra_count": max(0, acceptance.species_count - _FOOD_OVERVIEW_TOP_N),
     }
+    context.update(_food_item_totals(acceptance))
+    return context
 
 
 def _parse_species_list(request, max_species):
@@ -920,33 +852,26 @@ def _reassign_species_to_submission(species_list, food_item, user, submission):
 
     Returns the set of submission ids that lost a link and may now be orphaned.
     """
-    orphan_candidates = set()
-    for species in species_list:
-        link, created = SpeciesFoodRating.objects.get_or_create(
-            species=species,
-            food_item=food_item,
-            user=user,
-            defaults={"submission": submission},
-        )
-        if not created and link.submission_id != submission.pk:
-            orphan_candidates.add(link.submission_id)
-            link.submission = submission
-            link.save(update_fields=["submission", "updated_at"])
+    species_ids = [species.pk for species in species_list]
+    orphan_candidates = SpeciesFoodRating.objects.link_submission(
+        species_ids, food_item.pk, user.pk, submission.pk
+    )
+    # the bulk upsert bypasses the signal receivers of the links
+    SpeciesFoodAcceptance.objects.update_pairs(
+        (species_id, food_item.pk) for species_id in species_ids
+    )
+    species_detail.invalidate_species(species_ids)
     return orphan_candidates
 
 
 def _delete_orphaned_submissions(orphan_candidates):
     """Delete any FoodRatingSubmissions in `orphan_candidates` no longer referenced
-    by a SpeciesFoodRating (cascades to their RatingPhotos)."""
+    by a SpeciesFoodRating (cascades to their RatingPhotos). The acceptance
+    aggregates are unaffected since the submissions have no links left."""
     if not orphan_candidates:
         return
-    still_referenced = set(
-        SpeciesFoodRating.objects
-        .filter(submission_id__in=orphan_candidates)
-        .values_list("submission_id", flat=True)
-    )
-    FoodRatingSubmission.objects.filter(
-        pk__in=orphan_candidates - still_referenced
+    FoodRatingSubmission.objects.filter(pk__in=orphan_candidates).exclude(
+        Exists(SpeciesFoodRating.objects.filter(submission_id=OuterRef("pk")))
     ).delete()
 
 
@@ -1118,22 +1043,26 @@ def _build_food_overview_list_context(selected_category):
     """Return food_data for one category, grouped by food item, for the overview list partial."""
     food_items = FoodItem.objects.filter(category=selected_category)
 
-    # Per (food_item, species): avg acceptance and rating count
-    species_qs = (
-        SpeciesFoodRating.objects
+    # Top species of each food item by avg acceptance and rating count
+    species_qs = _species_acceptance_values(
+        SpeciesFoodAcceptance.objects
         .filter(food_item__category=selected_category)
-        .values("food_item_id", "species_id", "species__name", "species__slug")
-        .annotate(species_avg=Avg("submission__acceptance"), rating_count=Count("id"))
-        .order_by("food_item_id", "-species_avg")
-    )
-    # Per food_item: overall avg and total count
-    overall_qs = (
-        SpeciesFoodRating.objects
-        .filter(food_item__category=selected_category)
-        .values("food_item_id")
-        .annotate(overall_avg=Avg("submission__acceptance"), total_ratings=Count("id"))
-    )
-    overall_by_food = {r["food_item_id"]: r for r in overall_qs}
+        .annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=F("food_item_id"),
+                order_by=(F("average_acceptance").desc(), F("rating_count").desc()),
+            )
+        )
+        .filter(rank__lte=_FOOD_OVERVIEW_TOP_N),
+        "food_item_id",
+    ).order_by("food_item_id", "rank")
+    acceptance_by_food = {
+        acceptance.food_item_id: acceptance
+        for acceptance in FoodItemAcceptance.objects.filter(
+            food_item__category=selected_category
+        )
+    }
 
     ratings_by_food = {}
     for row in species_qs:
@@ -1141,17 +1070,16 @@ def _build_food_overview_list_context(selected_category):
 
     food_data = []
     for food_item in food_items:
-        all_species = ratings_by_food.get(food_item.pk, [])
-        ov = overall_by_food.get(food_item.pk, {})
-        ov_avg = ov.get("overall_avg")
-        food_data.append({
+        acceptance = acceptance_by_food.get(food_item.pk) or FoodItemAcceptance(
+            food_item=food_item
+        )
+        entry = {
             "food_item": food_item,
-            "top_species": all_species[:_FOOD_OVERVIEW_TOP_N],
-            "extra_count": max(0, len(all_species) - _FOOD_OVERVIEW_TOP_N),
-            "total_species": len(all_species),
-            "total_ratings": ov.get("total_ratings", 0),
-            "overall_avg": round(float(ov_avg), 1) if ov_avg is not None else None,
-        })
+            "top_species": ratings_by_food.get(food_item.pk, []),
+            "extra_count": max(0, acceptance.species_count - _FOOD_OVERVIEW_TOP_N),
+        }
+        entry.update(_food_item_totals(acceptance))
+        food_data.append(entry)
 
     return {"food_data": food_data}
 
@@ -1334,17 +1262,18 @@ class SubmitDifficultyRatingView(LoginRequiredMixin, View):
             return HttpResponse(status=400)
 
         comment = request.POST.get("comment", "").strip()
-        SpeciesDifficultyRating.objects.update_or_create(
+        # the aggregate of the species is updated by the signal receivers
+        # in the same transaction
+        rating, _ = SpeciesDifficultyRating.objects.update_or_create(
             species=species,
             user=request.user,
             defaults={"difficulty": difficulty, "comment": comment},
         )
 
-        ratings = species.difficulty_ratings.all()
-        context = _build_difficulty_context(ratings)
+        context = species_detail.build_difficulty_context(species)
         context.update({
             "object": species,
-            "user_difficulty_rating": ratings.filter(user=request.user).first(),
+            "user_difficulty_rating": rating,
         })
         return render(
             request,
@@ -1520,7 +1449,11 @@ class SizeComparisonView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["regions"] = AntRegion.countries.filter(code__isnull=False).order_by("name")
+        context["regions"] = (
+            AntRegion.countries.with_ants()
+            .filter(code__isnull=False)
+            .order_by("name")
+        )
         return context
 
 
@@ -1545,10 +1478,11 @@ class SizeComparisonResultsView(View):
         qs = AntSpecies.objects.filter(valid=True).filter(size_q)
 
         if region:
-            try:
-                qs = qs.filter(distribution__region__pk=int(region))
-            except ValueError:
-                qs = qs.filter(distribution__region__code__iexact=region)
+            region_obj = region_resolver.resolve(region)
+            if region_obj is None:
+                qs = qs.none()
+            else:
+                qs = qs.filter(distribution__region_id=region_obj.id)
 
         if size_field == "minimum":
             qs = qs.annotate(display_size=Min("sizes__minimum", filter=size_q))
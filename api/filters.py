@@ -1,7 +1,8 @@
 import django_filters
 
+from ants import region_resolver
 from ants.filters import AntSpeciesFilter  # noqa: F401 – re-exported
-from ants.models import AntRegion, AntSpecies
+from ants.models import AntRegion, AntSpecies, SpeciesDifficultyAggregate
 
 
 class AntSizeFilter(django_filters.FilterSet):
@@ -19,13 +20,10 @@ class AntSizeFilter(django_filters.FilterSet):
         fields = []
 
     def filter_by_region(self, queryset, name, value):
-        try:
-            int(value)
-            return queryset.filter(distribution__region__pk=value).distinct()
-        except ValueError:
-            return queryset.filter(
-                distribution__region__code__iexact=value
-            ).distinct()
+        region = region_resolver.resolve(value)
+        if region is None:
+            return queryset.none()
+        return queryset.filter(distribution__region_id=region.id).distinct()
 
     def filter_by_genus(self, queryset, name, value):
         try:
@@ -48,12 +46,33 @@ class AntRegionFilter(django_filters.FilterSet):
 
     def filter_with_ants(self, queryset, name, value):
         if value is True:
-            return queryset.filter(distribution__isnull=False).distinct()
+            return queryset.filter(capabilities__has_ants=True)
         return queryset
 
     def filter_with_flight_months(self, queryset, name, value):
         if value is True:
-            return queryset.filter(
-                distribution__species__flight_months__isnull=False
-            ).distinct()
+            return queryset.filter(capabilities__has_flight_data=True)
         return queryset
+
+
+class SpeciesDifficultyFilter(django_filters.FilterSet):
+    min_ratings = django_filters.NumberFilter(
+        field_name="total",
+        lookup_expr="gte",
+        label="Only species with at least this number of ratings.",
+    )
+    ordering = django_filters.OrderingFilter(
+        fields=(
+            ("bayesian_average", "difficulty"),
+            ("total", "ratings"),
+            ("species__name", "name"),
+        ),
+        label=(
+            "Sort by difficulty (Bayesian average), ratings or name. "
+            "Prefix with - for descending order (default: difficulty)."
+        ),
+    )
+
+    class Meta:
+        model = SpeciesDifficultyAggregate
+        fields = []
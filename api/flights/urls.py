@@ -5,10 +5,13 @@ url module for flights api
 from django.http import HttpResponse
 from django.urls import path
 
-from api.flights.views import flights, years
+from api.flights.views import flights, frequency, near, timeseries, years
 
 urlpatterns = [
     path("hello", lambda request: HttpResponse("Hello World!"), name="hello_world"),
     path("years", years, name="api_flight_years"),
+    path("frequency/<slug:ant_species>", frequency, name="api_flight_frequency"),
+    path("near", near, name="api_flights_near"),
+    path("timeseries", timeseries, name="api_flights_timeseries"),
     path("", flights, name="api_flights"),
 ]
@@ -1,6 +1,10 @@
+import datetime
+
 from django.http import JsonResponse
 
-from flights.models import Flight
+from flights.models import Flight, FlightFrequency
+from flights.packing import POINT_FIELDS, pack_flights
+from flights.timeseries import flight_timeseries
 
 """
     Return the years in which nuptial flights occured.
@@ -15,6 +19,8 @@ def years(request):
 """
     Return the ant flights in a specific year.
     If no year was passed all are returned.
+    If the 'format' parameter is 'packed' the flights are returned in
+    the compact packed format (see flights.packing).
 """
 
 
@@ -25,7 +31,10 @@ def flights(request):
     if year is not None:
         flights = flights.filter(date__year=year)
 
-    flights = flights.values("id", "latitude", "longitude", "ant_species__name", "date")
+    flights = flights.values(*POINT_FIELDS, "date")
+    if request.GET.get("format") == "packed":
+        return JsonResponse(pack_flights(flights, include_dates=True))
+
     data = [
         {
             "id": flight.get("id"),
@@ -37,3 +46,88 @@ def flights(request):
     ]
 
     return JsonResponse(data, safe=False)
+
+
+"""
+    Return the number of flights per month for a specific ant species.
+    The result can be restricted with the 'country' (id or code) and the
+    'year' parameters.
+"""
+
+
+def frequency(request, ant_species):
+    year = request.GET.get("year")
+    if year is not None:
+        try:
+            year = int(year)
+        except ValueError:
+            return JsonResponse({"error": "year must be a number"}, status=400)
+
+    frequency = FlightFrequency.objects.frequency_per_month(
+        ant_species, request.GET.get("country"), year
+    )
+    return JsonResponse(frequency)
+
+
+"""
+    Return the flights within 'radius' km (default 50, at most
+    MAX_NEAR_RADIUS_KM) around 'lat' and 'lng' which were reported in the
+    last 'days' days (default 7), ordered by their distance.
+"""
+
+MAX_NEAR_RADIUS_KM = 500
+
+
+def near(request):
+    try:
+        lat = float(request.GET["lat"])
+        lng = float(request.GET["lng"])
+        radius = float(request.GET.get("radius", 50))
+        days = int(request.GET.get("days", 7))
+    except (KeyError, ValueError):
+        return JsonResponse(
+            {"error": "lat and lng are required, radius and days must be numbers"},
+            status=400,
+        )
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JsonResponse({"error": "invalid coordinates"}, status=400)
+    if not (0 < radius <= MAX_NEAR_RADIUS_KM) or days < 0:
+        return JsonResponse({"error": "invalid radius or days"}, status=400)
+
+    start_date = datetime.date.today() - datetime.timedelta(days=days)
+    flights = Flight.objects.near(lat, lng, radius, start_date=start_date).values(
+        *POINT_FIELDS, "date", "distance"
+    )
+    data = [
+        {
+            "id": flight["id"],
+            "position": {"lat": flight["latitude"], "lng": flight["longitude"]},
+            "ant": flight["ant_species__name"],
+            "date": flight["date"],
+            "distance": round(flight["distance"], 3),
+        }
+        for flight in flights
+    ]
+    return JsonResponse(data, safe=False)
+
+
+"""
+    Return the number of flights per day, week or month ('interval',
+    default month). The flights can be filtered by 'species' (slug),
+    'genus', 'country' (code), 'year_from' and 'year_to'.
+"""
+
+
+def timeseries(request):
+    try:
+        buckets = flight_timeseries(
+            interval=request.GET.get("interval"),
+            species=request.GET.get("species"),
+            genus=request.GET.get("genus"),
+            country=request.GET.get("country"),
+            year_from=request.GET.get("year_from"),
+            year_to=request.GET.get("year_to"),
+        )
+    except ValueError as error:
+        return JsonResponse({"error": str(error)}, status=400)
+    return JsonResponse(buckets, safe=False)
@@ -167,6 +167,9 @@ class AntsWithNuptialFlightsListSerializer(serializers.ModelSerializer):
     """Serializer for a list of ants with nuptial flight months."""
 
     flight_hour_range = IntegerRangeField()
+    flight_months = serializers.ListField(
+        source="flight_month_ids", child=serializers.IntegerField(), read_only=True
+    )
 
     class Meta:
         model = ant_models.AntSpecies
@@ -188,3 +191,28 @@ class AntSpeciesNameSerializer(serializers.ModelSerializer):
         model = ant_models.AntSpecies
         fields = ("id", "name")
         read_only_fields = fields
+
+
+class SpeciesDifficultySerializer(serializers.ModelSerializer):
+    """Serializer for the difficulty rating aggregate of an ant species."""
+
+    id = serializers.IntegerField(source="species_id", read_only=True)
+    name = serializers.CharField(source="species.name", read_only=True)
+    slug = serializers.CharField(source="species.slug", read_only=True)
+    average = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ant_models.SpeciesDifficultyAggregate
+        fields = (
+            "id",
+            "name",
+            "slug",
+            "beginner_count",
+            "intermediate_count",
+            "advanced_count",
+            "expert_count",
+            "total",
+            "average",
+            "bayesian_average",
+        )
+        read_only_fields = fields
@@ -1,3 +1,7 @@
+import calendar
+import datetime
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 from django.urls import reverse
 from psycopg2.extras import NumericRange
@@ -11,9 +15,12 @@ from ants.models import (
     Distribution,
     Genus,
     Month,
+    SpeciesDifficultyRating,
     SubFamily,
     Tribe,
 )
+from flights.models import Flight
+from flights.packing import COORDINATE_SCALE, decode_int32_array
 
 
 class APIViewsTest(TestCase):
@@ -221,7 +228,7 @@ class NuptialFlightMonthsTest(TestCase):
         self.ant_species = AntSpecies.objects.create(
             name="Lasius niger", valid=True, genus=self.genus
         )
-        self.month = Month.objects.create(name="June")
+        self.month = Month.objects.create(id=6, name="June")
         self.ant_species.flight_months.add(self.month)
 
     def test_nuptial_flight_months_status(self):
@@ -265,6 +272,86 @@ class NuptialFlightMonthsTest(TestCase):
         self.assertEqual(len(response.data), 1)
 
 
+class FlightsAPITest(TestCase):
+    def setUp(self):
+        self.genus = Genus.objects.create(name="Lasius")
+        self.ant_species = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=self.genus
+        )
+        self.region = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.flight = Flight.objects.create(
+            ant_species=self.ant_species,
+            date="2024-05-15",
+            latitude=50.0,
+            longitude=10.0,
+            country=self.region,
+        )
+
+    def test_flights(self):
+        response = self.client.get(reverse("api_flights"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["position"], {"lat": 50.0, "lng": 10.0})
+        self.assertEqual(data[0]["date"], "2024-05-15")
+
+    def test_flights_packed(self):
+        response = self.client.get(reverse("api_flights") + "?format=packed")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(decode_int32_array(data["ids"]), [self.flight.id])
+        self.assertEqual(decode_int32_array(data["lat"]), [50 * COORDINATE_SCALE])
+        self.assertEqual(decode_int32_array(data["dates"]), [19858])
+
+    def test_flight_frequency(self):
+        url = reverse("api_flight_frequency", args=[self.ant_species.slug])
+        response = self.client.get(url + "?country=de&year=2024")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(list(data), list(calendar.month_name)[1:])
+        self.assertEqual(data["May"], 1)
+        self.assertEqual(sum(data.values()), 1)
+
+    def test_flight_frequency_other_year(self):
+        url = reverse("api_flight_frequency", args=[self.ant_species.slug])
+        response = self.client.get(url + "?year=2023")
+        self.assertEqual(sum(response.json().values()), 0)
+
+    def test_flights_near(self):
+        self.flight.date = datetime.date.today()
+        self.flight.save()
+        response = self.client.get(
+            reverse("api_flights_near") + "?lat=50.1&lng=10&radius=20"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([flight["id"] for flight in data], [self.flight.id])
+        self.assertAlmostEqual(data[0]["distance"], 11.1, delta=0.1)
+
+    def test_flights_near_invalid_parameters(self):
+        response = self.client.get(reverse("api_flights_near") + "?lat=50.1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flights_timeseries(self):
+        response = self.client.get(
+            reverse("api_flights_timeseries") + "?interval=week&country=de"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [{"date": "2024-05-13", "count": 1}])
+
+    def test_flights_timeseries_invalid_interval(self):
+        response = self.client.get(reverse("api_flights_timeseries") + "?interval=x")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_flight_frequency_invalid_year(self):
+        url = reverse("api_flight_frequency", args=[self.ant_species.slug])
+        response = self.client.get(url + "?year=abc")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class APIv2ViewsTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -355,6 +442,36 @@ class APIv2ViewsTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["name"], "Lasius niger")
 
+    def test_v2_ants_by_difficulty(self):
+        formica = AntSpecies.objects.create(
+            name="Formica rufa", valid=True, genus=self.genus, slug="formica-rufa"
+        )
+        users = [User.objects.create_user(username=f"user{i}") for i in range(3)]
+        for user in users:
+            SpeciesDifficultyRating.objects.create(
+                species=self.ant_species, user=user, difficulty=1
+            )
+        SpeciesDifficultyRating.objects.create(
+            species=formica, user=users[0], difficulty=4
+        )
+        url = reverse("v2_api_ants_by_difficulty")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 2)
+        first = response.data["results"][0]
+        self.assertEqual(first["id"], self.ant_species.id)
+        self.assertEqual(first["slug"], "lasius-niger")
+        self.assertEqual(first["beginner_count"], 3)
+        self.assertEqual(first["average"], 1.0)
+        self.assertAlmostEqual(first["bayesian_average"], 15.5 / 8)
+
+        response = self.client.get(url, {"ordering": "-difficulty"})
+        self.assertEqual(response.data["results"][0]["name"], "Formica rufa")
+        response = self.client.get(url, {"min_ratings": 2})
+        self.assertEqual(
+            [item["name"] for item in response.data["results"]], ["Lasius niger"]
+        )
     def test_v2_ant_species_detail_not_found(self):
         response = self.client.get(
             reverse("v2_api_ant_species_detail", args=["nonexistent-species"])
@@ -425,8 +542,8 @@ class V2NuptialFlightMonthsTest(TestCase):
     def setUp(self):
         self.client = APIClient()
         self.genus = Genus.objects.create(name="Lasius")
-        self.july = Month.objects.create(name="July")
-        self.august = Month.objects.create(name="August")
+        self.july = Month.objects.create(id=7, name="July")
+        self.august = Month.objects.create(id=8, name="August")
         self.ant_july = AntSpecies.objects.create(
             name="Lasius niger", valid=True, genus=self.genus
         )
@@ -460,7 +577,7 @@ class V2NuptialFlightMonthsTest(TestCase):
         self.assertEqual(response.data["results"][0]["name"], "Lasius niger")
 
     def test_v2_nuptial_flight_months_month_filter_no_match(self):
-        other_month = Month.objects.create(name="January")
+        other_month = Month.objects.create(id=1, name="January")
         response = self.client.get(
             reverse("v2_api_ants_nuptial_flight_month") + f"?month={other_month.id}"
         )
@@ -795,3 +912,45 @@ class AntSpeciesFilterTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["count"], 1)
         self.assertEqual(response.data["results"][0]["name"], "Formica rufa")
+
+
+class IncludeDescendantsTest(TestCase):
+    """Tests for include_descendants on region filters."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.bavaria = AntRegion.objects.create(
+            name="Bavaria", code="DE-BY", type="State", parent=self.germany
+        )
+        self.lasius_niger = AntSpecies.objects.create(name="Lasius niger", valid=True)
+        self.formica_rufa = AntSpecies.objects.create(name="Formica rufa", valid=True)
+        Distribution.objects.create(
+            species=self.lasius_niger, region=self.germany, native=True
+        )
+        Distribution.objects.create(
+            species=self.lasius_niger, region=self.bavaria, native=False
+        )
+        Distribution.objects.create(species=self.formica_rufa, region=self.bavaria)
+
+    def test_ants_by_region(self):
+        url = reverse("api_ants_by_region", args=["DE"])
+        response = self.client.get(url)
+        self.assertEqual([ant["name"] for ant in response.data], ["Lasius niger"])
+
+        response = self.client.get(url, {"include_descendants": "true"})
+        self.assertEqual(
+            [(ant["name"], ant["native"]) for ant in response.data],
+            [("Lasius niger", True), ("Formica rufa", None)],
+        )
+
+    def test_ant_species_filter(self):
+        url = reverse("v2_api_ant_species")
+        response = self.client.get(url, {"region": "de"})
+        self.assertEqual(response.data["count"], 1)
+
+        response = self.client.get(url, {"region": "de", "include_descendants": "true"})
+        names = sorted(r["name"] for r in response.data["results"])
+        self.assertEqual(names, ["Formica rufa", "Lasius niger"])
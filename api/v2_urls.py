@@ -19,6 +19,11 @@ urlpatterns = [
         v2_views.AntQueenSizeListView.as_view(),
         name="v2_api_ant_queen_sizes",
     ),
+    path(
+        "ants/by-difficulty/",
+        v2_views.SpeciesByDifficultyListView.as_view(),
+        name="v2_api_ants_by_difficulty",
+    ),
     path(
         "ants/<str:ant_species>/",
         v2_views.AntSpeciesDetailView.as_view(),
@@ -5,9 +5,16 @@ from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import generics
 from rest_framework.response import Response
 
-from ants.models import AntRegion, AntSpecies
-
-from .filters import AntRegionFilter, AntSizeFilter, AntSpeciesFilter
+from ants import region_resolver
+from ants.helpers import filter_by_flight_month
+from ants.models import AntRegion, AntSpecies, SpeciesDifficultyAggregate
+
+from .filters import (
+    AntRegionFilter,
+    AntSizeFilter,
+    AntSpeciesFilter,
+    SpeciesDifficultyFilter,
+)
 from .pagination import StandardResultsSetPagination
 from .serializers import (
     AntSizeListSerializer,
@@ -15,6 +22,7 @@ from .serializers import (
     AntSpeciesNameSerializer,
     AntsWithNuptialFlightsListSerializer,
     RegionListSerializer,
+    SpeciesDifficultySerializer,
 )
 
 _EXPERIMENTAL_WARNING = (
@@ -69,9 +77,7 @@ class NuptialFlightMonths(ExperimentalApiMixin, generics.ListAPIView):
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
-        ants = AntSpecies.objects.prefetch_related("flight_months").filter(
-            flight_months__isnull=False, valid=True
-        )
+        ants = AntSpecies.objects.filter(flight_months_mask__gt=0, valid=True)
         name = self.request.query_params.get("name", None)
         region = self.request.query_params.get("region", None)
         month = self.request.query_params.get("month", None)
@@ -80,17 +86,16 @@ class NuptialFlightMonths(ExperimentalApiMixin, generics.ListAPIView):
             ants = ants.filter(name__icontains=name)
 
         if region is not None:
-            try:
-                int(region)
-                ants = ants.filter(distribution__region__pk=region)
-            except ValueError:
-                ants = ants.filter(
-                    Q(distribution__region__code=region)
-                    | Q(distribution__region__slug__iexact=region)
-                )
+            region = region_resolver.resolve(region)
+            if region is None:
+                return ants.none()
+            ants = ants.filter(distribution__region_id=region.id)
 
         if month is not None:
-            ants = ants.filter(flight_months__id=month)
+            try:
+                ants = filter_by_flight_month(ants, int(month))
+            except ValueError:
+                ants = ants.none()
 
         return ants.distinct()
 
@@ -156,3 +161,14 @@ class AntQueenSizeListView(ExperimentalApiMixin, generics.ListAPIView):
     serializer_class = AntSizeListSerializer
     pagination_class = StandardResultsSetPagination
     filterset_class = AntSizeFilter
+
+
+class SpeciesByDifficultyListView(ExperimentalApiMixin, generics.ListAPIView):
+    """Ant species with difficulty ratings, the easiest species first."""
+
+    queryset = SpeciesDifficultyAggregate.objects.select_related("species").order_by(
+        "bayesian_average", "species__name"
+    )
+    serializer_class = SpeciesDifficultySerializer
+    pagination_class = StandardResultsSetPagination
+    filterset_class = SpeciesDifficultyFilter
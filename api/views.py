@@ -1,4 +1,4 @@
-from django.db.models import F, Q, Subquery
+from django.db.models import Case, F, Q, Subquery, When
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from drf_spectacular.types import OpenApiTypes
@@ -6,6 +6,7 @@ from drf_spectacular.utils import extend_schema
 from rest_framework import generics
 from rest_framework.response import Response
 
+from ants import region_resolver
 from ants.models import AntRegion, AntSpecies, Distribution, Genus
 
 from .filters import AntRegionFilter
@@ -38,9 +39,7 @@ class NuptialFlightMonths(generics.ListAPIView):
     serializer_class = AntsWithNuptialFlightsListSerializer
 
     def get_queryset(self):
-        ants = AntSpecies.objects.prefetch_related("flight_months").filter(
-            flight_months__isnull=False, valid=True
-        )
+        ants = AntSpecies.objects.filter(flight_months_mask__gt=0, valid=True)
         name = self.request.query_params.get("name", None)
         region = self.request.query_params.get("region", None)
 
@@ -48,14 +47,10 @@ class NuptialFlightMonths(generics.ListAPIView):
             ants = ants.filter(name__icontains=name)
 
         if region is not None:
-            try:
-                int(region)
-                ants = ants.filter(distribution__region__pk=region)
-            except ValueError:
-                ants = ants.filter(
-                    Q(distribution__region__code=region)
-                    | Q(distribution__region__slug__iexact=region)
-                )
+            region = region_resolver.resolve(region)
+            if region is None:
+                return ants.none()
+            ants = ants.filter(distribution__region_id=region.id)
 
         return ants.distinct()
 
@@ -115,17 +110,10 @@ class RegionDetailView(generics.RetrieveAPIView):
     lookup_url_kwarg = "region"
 
     def get_object(self):
-        lookup_value = self.kwargs.get(self.lookup_url_kwarg)
-        queryset = self.get_queryset()
-
-        try:
-            obj = queryset.get(pk=lookup_value)
-        except (ValueError, AntRegion.DoesNotExist):
-            obj = get_object_or_404(
-                queryset, Q(code=lookup_value) | Q(slug=lookup_value)
-            )
-
-        return obj
+        region = region_resolver.resolve(self.kwargs.get(self.lookup_url_kwarg))
+        if region is None:
+            raise Http404
+        return get_object_or_404(self.get_queryset(), pk=region.id)
 
 
 class RegionListView(generics.ListAPIView):
@@ -141,15 +129,10 @@ class RegionListView(generics.ListAPIView):
 
 
 def get_region_query(region):
-    region_query = None
-    try:
-        int(region)
-        region_query = Q(region__pk=region)
-    except ValueError:
-        code_query = Q(region__code=region)
-        slug_query = Q(region__slug__iexact=region)
-        region_query = code_query | slug_query
-    return region_query
+    region = region_resolver.resolve(region)
+    if region is None:
+        return Q(pk__in=[])
+    return Q(region_id=region.id)
 
 
 @extend_schema(responses=OpenApiTypes.OBJECT)
@@ -165,13 +148,20 @@ class AntsByRegionView(generics.GenericAPIView):
         if ant_species_name is not None:
             ants = ants.search_by_name(ant_species_name)
 
-        try:
-            int(region)
-            ants = ants.filter(distribution__region__pk=region)
-        except ValueError:
-            code_query = Q(distribution__region__code=region)
-            slug_query = Q(distribution__region__slug=region)
-            ants = ants.filter(code_query | slug_query)
+        region = region_resolver.resolve(region)
+        if region is None:
+            raise Http404
+        include_descendants = (
+            self.request.query_params.get("include_descendants") == "true"
+        )
+        if include_descendants:
+            ants = ants.filter(
+                distribution__region_id__in=AntRegion.objects.with_descendants(
+                    region.id
+                ).values("pk")
+            )
+        else:
+            ants = ants.filter(distribution__region_id=region.id)
 
         ants = ants.values(
             "id",
@@ -181,6 +171,12 @@ class AntsByRegionView(generics.GenericAPIView):
             protected=F("distribution__protected"),
             red_list_status=F("distribution__red_list_status"),
         )
+        if include_descendants:
+            # one row per species, preferring the distribution in the region
+            ants = ants.order_by(
+                "id",
+                Case(When(distribution__region_id=region.id, then=0), default=1),
+            ).distinct("id")
 
         if len(ants) == 0:
             raise Http404
@@ -1,13 +1,38 @@
 """
-Bing maps geocoding helper module.
+Geocoding helper module.
+
+Requests are answered by a pluggable provider (Bing maps by default, see
+settings.GEOCODING_PROVIDER) and their results are cached in the database.
+Query strings are normalized and coordinates are rounded to about 100 m
+before they are used as cache key, so similar requests share one entry.
 """
 
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from functools import lru_cache
+
 import requests
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from .models import GeocodingCacheEntry
+
+# 3 decimal places are about 111 m in latitude.
+COORDINATE_PRECISION = 3
+MAX_CACHE_KEY_LENGTH = GeocodingCacheEntry._meta.get_field("key").max_length
 
 
 def create_result_dict(raw_json):
-    resource = raw_json["resourceSets"][0]["resources"][0]
+    resources = raw_json["resourceSets"][0]["resources"]
+    if not resources:
+        return None
+
+    resource = resources[0]
     address = resource.get("address")
     full_address = resource.get("name")
     country = address.get("countryRegion")
@@ -33,35 +58,230 @@ def create_result_dict(raw_json):
     }
 
 
+def normalize_query(query_string):
+    """Return the query string in lower case with collapsed whitespace."""
+    return " ".join(query_string.lower().split())
+
+
+def round_coordinates(lat, lng):
+    """Round coordinates to COORDINATE_PRECISION decimal places."""
+    return round(float(lat), COORDINATE_PRECISION), round(
+        float(lng), COORDINATE_PRECISION
+    )
+
+
+def coordinates_key(lat, lng):
+    """Return the key of rounded coordinates used by cache and providers."""
+    lat, lng = round_coordinates(lat, lng)
+    return f"{lat:.{COORDINATE_PRECISION}f},{lng:.{COORDINATE_PRECISION}f}"
+
+
+class GeocodingProvider(ABC):
+    """
+    Base class of geocoding providers. Both methods return a result
+    dictionary (see create_result_dict) or None if nothing was found.
+    """
+
+    @abstractmethod
+    def geocode(self, query_string):
+        pass
+
+    @abstractmethod
+    def reverse_geocode(self, lat, lng):
+        pass
+
+
 BASE_BING_URL = "http://dev.virtualearth.net/REST/v1/Locations"
 
 
-def geocode(query_string):
+class BingGeocodingProvider(GeocodingProvider):
+    """Provider which requests the Bing maps locations API."""
+
+    # (connect, read) timeout in seconds
+    TIMEOUT = (3.05, 10)
+    POOL_SIZE = 10
+
+    _session = None
+
+    @classmethod
+    def get_session(cls):
+        """Return the HTTP session shared by all requests."""
+        if cls._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=cls.POOL_SIZE, pool_maxsize=cls.POOL_SIZE
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            cls._session = session
+        return cls._session
+
+    def _request(self, url, payload):
+        payload = {
+            "maxResults": 1,
+            "incl": "ciso2",
+            "key": settings.BING_API_KEY_SERVER,
+            **payload,
+        }
+        response = self.get_session().get(url, params=payload, timeout=self.TIMEOUT)
+        response.raise_for_status()
+        return create_result_dict(response.json())
+
+    def geocode(self, query_string):
+        return self._request(BASE_BING_URL, {"q": query_string})
+
+    def reverse_geocode(self, lat, lng):
+        return self._request(f"{BASE_BING_URL}/{lat},{lng}", {})
+
+
+@lru_cache(maxsize=8)
+def _load_offline_file(path):
+    with open(path, encoding="utf-8") as offline_file:
+        return json.load(offline_file)
+
+
+class OfflineGeocodingProvider(GeocodingProvider):
+    """
+    Provider which answers from a JSON file instead of the network. The file
+    contains a "geocode" object with results per normalized query string
+    and a "reverse" object with results per rounded "lat,lng" key.
+    """
+
+    def __init__(self, path=None):
+        self.data = _load_offline_file(path or settings.GEOCODING_OFFLINE_FILE)
+
+    def geocode(self, query_string):
+        return self.data.get("geocode", {}).get(normalize_query(query_string))
+
+    def reverse_geocode(self, lat, lng):
+        return self.data.get("reverse", {}).get(coordinates_key(lat, lng))
+
+
+def get_provider():
+    """Return an instance of the configured geocoding provider."""
+    return import_string(settings.GEOCODING_PROVIDER)()
+
+
+def _cache_key(prefix, key):
+    cache_key = f"{prefix}:{key}"
+    if len(cache_key) > MAX_CACHE_KEY_LENGTH:
+        cache_key = f"{prefix}:sha256:{hashlib.sha256(key.encode()).hexdigest()}"
+    return cache_key
+
+
+def _get_cached(keys):
+    """Return the cached, not expired results of the keys."""
+    now = timezone.now()
+    expired = now - timedelta(days=settings.GEOCODING_CACHE_TTL_DAYS)
+    entries = GeocodingCacheEntry.objects.filter(key__in=keys, created_at__gt=expired)
+    results = dict(entries.values_list("key", "result"))
+    if results:
+        GeocodingCacheEntry.objects.filter(key__in=results).update(last_used_at=now)
+    return results
+
+
+def _set_cached(results):
+    """Store results in the cache."""
+    if not results:
+        return
+
+    now = timezone.now()
+    GeocodingCacheEntry.objects.bulk_create(
+        [
+            GeocodingCacheEntry(
+                key=key, result=result, created_at=now, last_used_at=now
+            )
+            for key, result in results.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["key"],
+        update_fields=["result", "created_at", "last_used_at"],
+    )
+
+
+def evict_cache():
+    """
+    Delete expired cache entries and the least recently used ones beyond
+    settings.GEOCODING_CACHE_MAX_ENTRIES.
+
+    Return the number of deleted entries.
+    """
+    expired = timezone.now() - timedelta(days=settings.GEOCODING_CACHE_TTL_DAYS)
+    with transaction.atomic():
+        deleted, _ = GeocodingCacheEntry.objects.filter(
+            created_at__lte=expired
+        ).delete()
+        least_recently_used = GeocodingCacheEntry.objects.order_by(
+            "-last_used_at", "-id"
+        ).values("id")[settings.GEOCODING_CACHE_MAX_ENTRIES :]
+        evicted, _ = GeocodingCacheEntry.objects.filter(
+            id__in=least_recently_used
+        ).delete()
+    return deleted + evicted
+
+
+def _lookup(keys, request, prefix):
+    """
+    Return the results of the keys using the cache and request(key) for
+    missing ones.
+    """
+    cache_keys = {key: _cache_key(prefix, key) for key in keys}
+    cached = _get_cached(cache_keys.values())
+    results = {}
+    new_results = {}
+    for key, cache_key in cache_keys.items():
+        if cache_key in cached:
+            results[key] = cached[cache_key]
+            continue
+        result = request(key)
+        results[key] = result
+        if result is not None:
+            new_results[cache_key] = result
+    _set_cached(new_results)
+    return results
+
+
+def geocode_many(query_strings, provider=None):
+    """
+    Geocode multiple query strings at once.
+
+    Return a dictionary with the result dictionary (or None) per query string.
+    """
+    provider = provider or get_provider()
+    normalized = {query: normalize_query(query) for query in query_strings}
+    results = _lookup(set(normalized.values()), provider.geocode, "q")
+    return {query: results[key] for query, key in normalized.items()}
+
+
+def reverse_geocode_many(coordinates, provider=None):
+    """
+    Reverse geocode multiple (lat, lng) pairs at once.
+
+    Return a dictionary with the result dictionary (or None) per pair.
+    """
+    provider = provider or get_provider()
+    keys = {(lat, lng): coordinates_key(lat, lng) for lat, lng in coordinates}
+
+    def request(key):
+        return provider.reverse_geocode(*key.split(","))
+
+    results = _lookup(set(keys.values()), request, "r")
+    return {pair: results[key] for pair, key in keys.items()}
+
+
+def geocode(query_string, provider=None):
     """
     Request geocoding for specific query string.
 
     Return a dictionary containing the needed parts of the response.
     """
-    url = BASE_BING_URL
-    payload = {
-        "q": query_string,
-        "maxResults": 1,
-        "incl": "ciso2",
-        "key": settings.BING_API_KEY_SERVER,
-    }
+    return geocode_many([query_string], provider)[query_string]
 
-    response = requests.get(url, params=payload)
-    return create_result_dict(response.json())
 
-
-def reverse_geocode(lat, lng):
+def reverse_geocode(lat, lng, provider=None):
     """
     Request reverse geocoding for specitific latitude and longitude.
 
     Return a dictionary containing the needed parts of the response.
     """
-    url = f"{BASE_BING_URL}/{lat},{lng}"
-    payload = {"maxResults": 1, "incl": "ciso2", "key": settings.BING_API_KEY_SERVER}
-
-    response = requests.get(url, params=payload)
-    return create_result_dict(response.json())
+    return reverse_geocode_many([(lat, lng)], provider)[(lat, lng)]
@@ -0,0 +1,112 @@
+"""
+Geohash helpers for proximity queries of flights.
+
+A geohash encodes a coordinate as a base32 string. Every additional
+character narrows the cell down, so all flights inside a cell share the
+cell's geohash as prefix and can be found with an index on the geohash.
+"""
+
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Precision of the geohashes stored on flights (cells of about 5 x 5 m).
+PRECISION = 9
+# Maximum number of cells used to cover the search area of a query.
+MAX_CELLS = 16
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LATITUDE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Return the geohash of a coordinate with the given precision."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(geohash) < precision:
+        value, value_range = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(geohash)
+
+
+def cell_size(precision):
+    """Return the height and width of a cell in degrees."""
+    lat_bits = 5 * precision // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / 2**lat_bits, 360.0 / 2**lng_bits
+
+
+def _step_count(start, end, step):
+    return math.floor(end / step) - math.floor(start / step) + 1
+
+
+def _steps(start, end, step):
+    """Return the centers of the cells between start and end."""
+    first = math.floor(start / step) * step + step / 2
+    return [first + i * step for i in range(_step_count(start, end, step))]
+
+
+def _cells(south, north, west, east, precision):
+    height, width = cell_size(precision)
+    south = max(south, -90.0)
+    north = min(north, 90.0 - 1e-9)
+    if east - west >= 360.0:
+        west, east = -180.0, 180.0 - 1e-9
+    cell_count = _step_count(south, north, height) * _step_count(west, east, width)
+    if cell_count > MAX_CELLS:
+        return None
+    return {
+        encode(latitude, (longitude + 180.0) % 360.0 - 180.0, precision)
+        for latitude in _steps(south, north, height)
+        for longitude in _steps(west, east, width)
+    }
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Return the geohash prefixes of the cells which cover the circle around
+    a coordinate. The most precise cells are used for which not more than
+    MAX_CELLS are needed.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE_LATITUDE
+    south = latitude - delta_lat
+    north = latitude + delta_lat
+    max_abs_latitude = max(abs(south), abs(north))
+    if max_abs_latitude >= 90.0:
+        delta_lng = 180.0
+    else:
+        delta_lng = min(delta_lat / math.cos(math.radians(max_abs_latitude)), 180.0)
+    west = longitude - delta_lng
+    east = longitude + delta_lng
+
+    for precision in range(PRECISION, 0, -1):
+        cells = _cells(south, north, west, east, precision)
+        if cells is not None:
+            return cells
+    return set(BASE32)
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """Return the great circle distance of two coordinates in km."""
+    lat1, lng1, lat2, lng2 = map(
+        math.radians, (latitude1, longitude1, latitude2, longitude2)
+    )
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,130 @@
+import datetime
+import random
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from ants.models import AntRegion, AntSpecies, Genus
+from flights import geohash
+from flights.models import Flight
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    The command inserts synthetic flights inside a transaction, compares
+    the geohash proximity query with a full scan and rolls everything back.
+    """
+
+    help = "Benchmarks proximity queries of flights on synthetic data."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=1000000,
+            help="Number of synthetic flights (default: 1000000).",
+        )
+        parser.add_argument(
+            "--radius", type=float, default=50, help="Search radius in km."
+        )
+        parser.add_argument(
+            "--days", type=int, default=7, help="Length of the date window."
+        )
+        parser.add_argument(
+            "--queries", type=int, default=20, help="Number of random queries."
+        )
+
+    def _create_flights(self, count, ant_species, country):
+        rng = random.Random(0)
+        first_date = datetime.date(2015, 1, 1)
+        batch = []
+        for _ in range(count):
+            latitude, longitude = rng.choice(self.hotspots)
+            latitude = min(max(latitude + rng.gauss(0, 1), -90), 90)
+            longitude = (longitude + rng.gauss(0, 1) + 180) % 360 - 180
+            batch.append(
+                Flight(
+                    ant_species=ant_species,
+                    spotting_type="F",
+                    date=first_date + datetime.timedelta(days=rng.randrange(3650)),
+                    address="",
+                    latitude=latitude,
+                    longitude=longitude,
+                    geohash=geohash.encode(latitude, longitude),
+                    country=country,
+                )
+            )
+            if len(batch) == 10000:
+                Flight.objects.bulk_create(batch)
+                batch = []
+        Flight.objects.bulk_create(batch)
+
+    def _measure(self, query, searches):
+        start = time.perf_counter()
+        results = sum(len(query(*search)) for search in searches)
+        return (time.perf_counter() - start) / len(searches), results
+
+    def handle(self, *args, **options):
+        radius = options["radius"]
+        days = datetime.timedelta(days=options["days"])
+        # flights are reported around populated areas, so the synthetic ones
+        # are spread around random hotspots and searched near them
+        rng = random.Random(1)
+        self.hotspots = [
+            (rng.uniform(-45, 65), rng.uniform(-180, 180)) for _ in range(500)
+        ]
+        searches = [
+            (
+                *rng.choice(self.hotspots),
+                datetime.date(2015, 1, 1) + datetime.timedelta(rng.randrange(3650)),
+            )
+            for _ in range(options["queries"])
+        ]
+
+        def near(latitude, longitude, date):
+            return list(
+                Flight.objects.near(
+                    latitude, longitude, radius, date - days, date
+                ).values_list("id", flat=True)
+            )
+
+        def full_scan(latitude, longitude, date):
+            return list(
+                Flight.objects.with_distance(latitude, longitude)
+                .filter(date__gte=date - days, date__lte=date, distance__lte=radius)
+                .order_by("distance")
+                .values_list("id", flat=True)
+            )
+
+        try:
+            with transaction.atomic():
+                genus = Genus.objects.create(name="Benchmarkgenus")
+                ant_species = AntSpecies.objects.create(
+                    name="Benchmarkgenus species", genus=genus
+                )
+                country = AntRegion.objects.create(
+                    name="Benchmarkland", code="bm", type="Country"
+                )
+                start = time.perf_counter()
+                self._create_flights(options["count"], ant_species, country)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {Flight._meta.db_table}")
+                self.stdout.write(
+                    f"Inserted {options['count']} flights in "
+                    f"{time.perf_counter() - start:.1f} s"
+                )
+
+                for name, query in (("geohash", near), ("full scan", full_scan)):
+                    seconds, results = self._measure(query, searches)
+                    self.stdout.write(
+                        f"{name:<10} {seconds * 1000:>9.1f} ms/query "
+                        f"({results} flights found)"
+                    )
+                raise _Rollback
+        except _Rollback:
+            pass
@@ -0,0 +1,85 @@
+import datetime
+import random
+import time
+
+from django.core.management import BaseCommand
+from django.http import JsonResponse
+
+from flights.models import Flight
+from flights.packing import POINT_FIELDS, pack_flights
+from flights.views import _flight_points
+
+
+def _synthetic_flights(count, species_count):
+    rng = random.Random(0)
+    species_names = [f"Genus{i // 20} species{i}" for i in range(species_count)]
+    first_date = datetime.date(2015, 1, 1)
+    flights = []
+    for flight_id in range(1, count + 1):
+        species_id = rng.randrange(species_count)
+        flights.append(
+            {
+                "id": flight_id,
+                "latitude": rng.uniform(-60, 70),
+                "longitude": rng.uniform(-180, 180),
+                "ant_species_id": species_id,
+                "ant_species__name": species_names[species_id],
+                "date": first_date + datetime.timedelta(days=rng.randrange(3650)),
+            }
+        )
+    return flights
+
+
+class Command(BaseCommand):
+    """
+    The command compares payload size and serialization time of the JSON
+    and the packed flights feed.
+    """
+
+    help = "Benchmarks the JSON and the packed format of the flights feed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            default=50000,
+            help="Number of synthetic flights (default: 50000).",
+        )
+        parser.add_argument(
+            "--species", type=int, default=500, help="Number of synthetic species."
+        )
+        parser.add_argument(
+            "--from-db",
+            action="store_true",
+            help="Use the flights from database instead of synthetic ones.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _measure(self, serialize, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            content = serialize().content
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return len(content), best
+
+    def handle(self, *args, **options):
+        if options["from_db"]:
+            flights = list(Flight.objects.values(*POINT_FIELDS))
+        else:
+            flights = _synthetic_flights(options["count"], options["species"])
+
+        formats = {
+            "json": lambda: JsonResponse(_flight_points(flights), safe=False),
+            "packed": lambda: JsonResponse(pack_flights(flights)),
+        }
+        self.stdout.write(f"{len(flights)} flights")
+        json_size = None
+        for name, serialize in formats.items():
+            size, seconds = self._measure(serialize, options["repeat"])
+            json_size = json_size or size
+            self.stdout.write(
+                f"{name:<8} {size / 1024:>10.1f} KiB "
+                f"({size / json_size:>6.1%}) {seconds * 1000:>8.1f} ms"
+            )
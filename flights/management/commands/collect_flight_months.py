@@ -1,12 +1,23 @@
-from django.core.management import BaseCommand
+import calendar
 
-from flights.models import Flight
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from ants import nuptial_flight_table, species_detail
+from ants.models import AntRegionCapabilities, AntSpecies, Month
+from flights.models import FlightFrequency
+
+MINIMUM_FLIGHT_COUNT = 3
 
 
 class Command(BaseCommand):
     """
     The command will collect flight months for all species based on
-    the reported flights in database
+    the reported flights in database.
+    A month becomes a flight month of a species if at least
+    MINIMUM_FLIGHT_COUNT flights were reported for it. Only species with
+    reported flights are changed.
     """
 
     help = "Collects flight months for all ant species based on the reported "
@@ -14,41 +25,79 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("species_name", type=str)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print the changes without saving them.",
+        )
 
     def handle(self, *args, **options):
-        MINIMUM_FLIGHT_COUNT = 3
         species_name = options["species_name"]
-        flights = Flight.objects
-        if species_name == "all":
-            flights = flights.all()
-        else:
-            flights = flights.filter(ant_species__name=species_name)
-        flight_months_count = {}
-        flight_months = {}
-
-        for flight in flights:
-            species_name = flight.ant_species.name
+        frequencies = FlightFrequency.objects.all()
+        if species_name != "all":
+            if not AntSpecies.objects.filter(name=species_name).exists():
+                raise CommandError(f"Ant species '{species_name}' does not exist.")
+            frequencies = frequencies.filter(ant_species__name=species_name)
 
-            if species_name not in flight_months_count:
-                flight_months_count[species_name] = {}
+        species_ids = set(
+            frequencies.order_by().values_list("ant_species_id", flat=True).distinct()
+        )
+        collected = set(
+            frequencies.order_by()
+            .values("ant_species_id", "month")
+            .annotate(total=Sum("count"))
+            .filter(total__gte=MINIMUM_FLIGHT_COUNT)
+            .values_list("ant_species_id", "month")
+        )
+        month_ids = set(Month.objects.values_list("id", flat=True))
+        collected = {pair for pair in collected if pair[1] in month_ids}
 
-            flight_months_dict = flight_months_count[species_name]
+        through = AntSpecies.flight_months.through
+        current_ids = {
+            (species_id, month_id): pk
+            for pk, species_id, month_id in through.objects.filter(
+                antspecies_id__in=species_ids
+            ).values_list("pk", "antspecies_id", "month_id")
+        }
+        current = set(current_ids)
 
-            flight_month = flight.date.month
+        to_add = collected - current
+        to_remove = current - collected
+        self._print_changes(to_add, to_remove)
 
-            if flight_month in flight_months_dict:
-                flight_months_dict[flight_month] += 1
-            else:
-                flight_months_dict[flight_month] = 1
+        if options["dry_run"] or not (to_add or to_remove):
+            return
 
-        for species, months_dict in flight_months_count.items():
-            flight_months[species] = []
-            flight_months_list = flight_months[species]
-            for month, months_count in months_dict.items():
-                if months_count >= MINIMUM_FLIGHT_COUNT:
-                    flight_months_list.append(month)
+        changed_species_ids = {species_id for species_id, _ in to_add | to_remove}
+        with transaction.atomic():
+            through.objects.filter(
+                pk__in=[current_ids[pair] for pair in to_remove]
+            ).delete()
+            through.objects.bulk_create(
+                [
+                    through(antspecies_id=species_id, month_id=month_id)
+                    for species_id, month_id in to_add
+                ]
+            )
+            # bulk changes of the through table do not send m2m_changed
+            AntSpecies.objects.update_flight_months_masks(changed_species_ids)
+            nuptial_flight_table.invalidate_species_print_snapshots(changed_species_ids)
+            AntRegionCapabilities.objects.update_species_regions(changed_species_ids)
+            species_detail.invalidate_species(changed_species_ids)
+        nuptial_flight_table.invalidate_rows()
 
-            flight_months_list.sort()
+        self.stdout.write(
+            f"Added {len(to_add)} and removed {len(to_remove)} flight months."
+        )
 
-        print(flight_months_count)
-        print(flight_months)
+    def _print_changes(self, to_add, to_remove):
+        species_ids = {species_id for species_id, _ in to_add | to_remove}
+        names = dict(
+            AntSpecies.objects.filter(id__in=species_ids).values_list("id", "name")
+        )
+        changes = sorted(
+            [(names[species_id], month, "+") for species_id, month in to_add]
+            + [(names[species_id], month, "-") for species_id, month in to_remove]
+        )
+        for name, month, sign in changes:
+            self.stdout.write(f"{sign} {name}: {calendar.month_name[month]}")
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from flights import geocoding
+
+
+class Command(BaseCommand):
+    """
+    The command deletes expired and least recently used geocoding results
+    from the cache. It is meant to be run regularly in the background.
+    """
+
+    help = "Evicts expired and least recently used geocoding cache entries."
+
+    def handle(self, *args, **options):
+        deleted = geocoding.evict_cache()
+        self.stdout.write(f"Evicted {deleted} geocoding cache entries.")
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from flights.models import FlightFrequency
+
+
+class Command(BaseCommand):
+    """
+    The command rebuilds the flight counts per species, country, year and
+    month used for the flight frequency statistics.
+    """
+
+    help = "Rebuilds the flight frequency rollup table from all reported flights."
+
+    def handle(self, *args, **options):
+        row_count = FlightFrequency.objects.rebuild()
+        self.stdout.write(f"Flight frequencies rebuilt ({row_count} rows).")
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from flights import map_grid
+
+
+class Command(BaseCommand):
+    """
+    The command rebuilds the grid index used for clustering flights on
+    the flights map.
+    """
+
+    help = "Rebuilds the flights map grid index from all reported flights."
+
+    def handle(self, *args, **options):
+        cell_count = map_grid.rebuild()
+        self.stdout.write(f"Flights map grid rebuilt ({cell_count} cells).")
@@ -3,42 +3,165 @@
 import calendar
 from collections import OrderedDict
 
-from django.db.models import Count, Manager, Q
+from django.apps import apps
+from django.db import transaction
+from django.db.models import (
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Manager,
+    Q,
+    Sum,
+    Value,
+)
+from django.db.models.functions import (
+    ASin,
+    Cos,
+    ExtractMonth,
+    ExtractYear,
+    Least,
+    Power,
+    Radians,
+    Sin,
+    Sqrt,
+)
 
-from ants.models import AntSpecies
+from ants.models import AntRegion, AntSpecies
+
+from . import geohash
 
 
 class FlightManager(Manager):
     """Manager for Flight model."""
 
-    def flight_frequency_per_month(self, ant_species, country=None):
+    def flight_frequency_per_month(self, ant_species, country=None, year=None):
         """
         Return the frequency of flights per month for a specific ant
         species. The ant_species parameter can be the id, the slug or
-        an object of type AntSpecies. If a country is provided the
-        query will be restritcted to the specific country.
+        an object of type AntSpecies. If a country (id, code or object of
+        type AntRegion) or a year is provided the query will be restricted
+        to the specific country or year.
+        The frequencies are read from the FlightFrequency rollup table.
+        """
+        flight_frequency_model = apps.get_model("flights", "FlightFrequency")
+        return flight_frequency_model.objects.frequency_per_month(
+            ant_species, country, year
+        )
+
+    def with_distance(self, latitude, longitude):
+        """
+        Return all flights annotated with their haversine distance (in km)
+        to a coordinate as distance.
+        """
+        lat1 = Radians(Value(float(latitude)))
+        lng1 = Radians(Value(float(longitude)))
+        lat2 = Radians("latitude")
+        lng2 = Radians("longitude")
+        a = Power(Sin((lat2 - lat1) / 2), 2) + Cos(lat1) * Cos(lat2) * Power(
+            Sin((lng2 - lng1) / 2), 2
+        )
+        distance = 2 * geohash.EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0)))
+        return self.get_queryset().annotate(
+            distance=ExpressionWrapper(distance, FloatField())
+        )
+
+    def near(self, latitude, longitude, radius_km, start_date=None, end_date=None):
+        """
+        Return the flights within radius_km around a coordinate, optionally
+        restricted to a date window, ordered by their distance.
+        The flights of the geohash cells covering the area are selected first
+        and then filtered by their exact haversine distance (see
+        with_distance).
+        """
+        cells = Q()
+        for cell in geohash.covering_cells(latitude, longitude, radius_km):
+            cells |= Q(geohash__startswith=cell)
+        qs = self.with_distance(latitude, longitude).filter(cells)
+        if start_date is not None:
+            qs = qs.filter(date__gte=start_date)
+        if end_date is not None:
+            qs = qs.filter(date__lte=end_date)
+
+        return qs.filter(distance__lte=radius_km).order_by("distance")
+
+
+class FlightFrequencyManager(Manager):
+    """Manager for FlightFrequency model."""
+
+    def frequency_per_month(self, ant_species, country=None, year=None):
+        """
+        Return an ordered dictionary with the number of flights per month
+        name for a specific ant species.
+        See FlightManager.flight_frequency_per_month.
         """
-        flights_qs = self.get_queryset()
+        qs = self.get_queryset()
 
         if isinstance(ant_species, str):
-            flights_qs = flights_qs.filter(ant_species__slug=ant_species)
+            qs = qs.filter(ant_species__slug=ant_species)
         elif isinstance(ant_species, AntSpecies) or isinstance(ant_species, int):
-            flights_qs = flights_qs.filter(ant_species=ant_species)
+            qs = qs.filter(ant_species=ant_species)
         else:
             raise ValueError(
                 "ant_species must be an integer, a string or an "
                 "object of type AntSpecies"
             )
 
-        frequency_aggregation = {
-            month: Count("date", filter=Q(date__month=index + 1))
-            for index, month in enumerate(calendar.month_name[1:])
-        }
+        if isinstance(country, str):
+            try:
+                qs = qs.filter(country_id=int(country))
+            except ValueError:
+                qs = qs.filter(country__code__iexact=country)
+        elif isinstance(country, AntRegion) or isinstance(country, int):
+            qs = qs.filter(country=country)
+
+        if year is not None:
+            qs = qs.filter(year=year)
 
-        aggregation_result = flights_qs.aggregate(**frequency_aggregation)
+        counts = dict(
+            qs.values("month")
+            .annotate(total=Sum("count"))
+            .values_list("month", "total")
+        )
         ordered_result = OrderedDict()
         for i in range(1, 13):
-            current_month = calendar.month_name[i]
-            ordered_result[current_month] = aggregation_result[current_month]
+            ordered_result[calendar.month_name[i]] = counts.get(i, 0)
 
         return ordered_result
+
+    @transaction.atomic
+    def add_flights(self, ant_species_id, country_id, year, month, count=1):
+        """
+        Add (or remove if count is negative) flights to the count of a
+        specific species, country, year and month.
+        """
+        key = {
+            "ant_species_id": ant_species_id,
+            "country_id": country_id,
+            "year": year,
+            "month": month,
+        }
+        if count > 0:
+            # concurrent first flights must not insert the row twice
+            self.bulk_create([self.model(**key, count=0)], ignore_conflicts=True)
+        qs = self.get_queryset().filter(**key)
+        qs.update(count=F("count") + count)
+        if count < 0:
+            qs.filter(count__lte=0).delete()
+
+    @transaction.atomic
+    def rebuild(self, species_ids=None):
+        """Rebuild the flight counts of the species or of all species."""
+        flights = apps.get_model("flights", "Flight").objects.all()
+        counts = self.get_queryset().all()
+        if species_ids is not None:
+            flights = flights.filter(ant_species_id__in=species_ids)
+            counts = counts.filter(ant_species_id__in=species_ids)
+        rows = (
+            flights.annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+            .values("ant_species_id", "country_id", "year", "month")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        counts.delete()
+        return len(self.bulk_create(self.model(**row) for row in rows))
@@ -0,0 +1,202 @@
+"""
+Grid index for the flights map.
+
+Flights are aggregated into square Web Mercator cells for every zoom level
+up to MAX_CLUSTER_ZOOM, so the map only has to fetch the clusters of the
+visible area instead of every single flight.
+"""
+
+import math
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Flight, FlightMapCell
+from .packing import POINT_FIELDS
+
+# Number of grid cells per axis of a 256px map tile (64px cells).
+CELLS_PER_TILE = 4
+# Up to this zoom level clusters are returned, above single flights.
+MAX_CLUSTER_ZOOM = 12
+# Web Mercator can't represent the poles.
+MAX_LATITUDE = 85.0511287798
+
+CELL_KEY_FIELDS = ("zoom", "x", "y", "year", "ant_species_id")
+
+
+def _cells_per_axis(zoom):
+    return (2**zoom) * CELLS_PER_TILE
+
+
+def cell_x(longitude, zoom):
+    """Return the grid column of a longitude at a specific zoom level."""
+    n = _cells_per_axis(zoom)
+    x = math.floor((longitude + 180.0) / 360.0 * n)
+    return min(max(x, 0), n - 1)
+
+
+def cell_y(latitude, zoom):
+    """Return the grid row of a latitude at a specific zoom level."""
+    n = _cells_per_axis(zoom)
+    lat = math.radians(min(max(latitude, -MAX_LATITUDE), MAX_LATITUDE))
+    y = math.floor((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)
+    return min(max(y, 0), n - 1)
+
+
+def _cell_keys(latitude, longitude, year, species_id):
+    """Return the cell keys a single flight contributes to."""
+    return [
+        (zoom, cell_x(longitude, zoom), cell_y(latitude, zoom), year, species_id)
+        for zoom in range(MAX_CLUSTER_ZOOM + 1)
+    ]
+
+
+def _cell_fields(key):
+    return dict(zip(CELL_KEY_FIELDS, key))
+
+
+def _cells_filter(keys):
+    query = Q()
+    for key in keys:
+        query |= Q(**_cell_fields(key))
+    return query
+
+
+def add_flight(latitude, longitude, year, species_id):
+    """Add a single flight to the grid index."""
+    keys = _cell_keys(latitude, longitude, year, species_id)
+    with transaction.atomic():
+        # empty cells are inserted first, so concurrent flights of a new
+        # cell increment the same row instead of inserting it twice
+        FlightMapCell.objects.bulk_create(
+            [
+                FlightMapCell(
+                    **_cell_fields(key), count=0, latitude_sum=0, longitude_sum=0
+                )
+                for key in keys
+            ],
+            ignore_conflicts=True,
+        )
+        FlightMapCell.objects.filter(_cells_filter(keys)).update(
+            count=F("count") + 1,
+            latitude_sum=F("latitude_sum") + latitude,
+            longitude_sum=F("longitude_sum") + longitude,
+        )
+
+
+def remove_flight(latitude, longitude, year, species_id):
+    """Remove a single flight from the grid index."""
+    keys = _cell_keys(latitude, longitude, year, species_id)
+    with transaction.atomic():
+        cells = FlightMapCell.objects.filter(_cells_filter(keys))
+        cells.update(
+            count=F("count") - 1,
+            latitude_sum=F("latitude_sum") - latitude,
+            longitude_sum=F("longitude_sum") - longitude,
+        )
+        cells.filter(count__lte=0).delete()
+
+
+@transaction.atomic
+def rebuild(species_ids=None):
+    """
+    Rebuild the grid index of the species or the whole grid index from the
+    flights table.
+    """
+    counts = Counter()
+    latitude_sums = defaultdict(float)
+    longitude_sums = defaultdict(float)
+    flights = Flight.objects.all()
+    cells = FlightMapCell.objects.all()
+    if species_ids is not None:
+        flights = flights.filter(ant_species_id__in=species_ids)
+        cells = cells.filter(ant_species_id__in=species_ids)
+    flights = flights.values_list(
+        "latitude", "longitude", "date__year", "ant_species_id"
+    )
+    for latitude, longitude, year, species_id in flights.iterator():
+        for key in _cell_keys(latitude, longitude, year, species_id):
+            counts[key] += 1
+            latitude_sums[key] += latitude
+            longitude_sums[key] += longitude
+
+    cells.delete()
+    FlightMapCell.objects.bulk_create(
+        (
+            FlightMapCell(
+                **_cell_fields(key),
+                count=count,
+                latitude_sum=latitude_sums[key],
+                longitude_sum=longitude_sums[key],
+            )
+            for key, count in counts.items()
+        ),
+        batch_size=5000,
+    )
+    return len(counts)
+
+
+def _bbox_filter(bbox, zoom):
+    west, south, east, north = bbox
+    query = Q(y__gte=cell_y(north, zoom), y__lte=cell_y(south, zoom))
+    if west <= east:
+        return query & Q(x__gte=cell_x(west, zoom), x__lte=cell_x(east, zoom))
+    # bounding box crosses the antimeridian
+    return query & (Q(x__gte=cell_x(west, zoom)) | Q(x__lte=cell_x(east, zoom)))
+
+
+def clusters(bbox, zoom, year=None, species=None):
+    """
+    Return the flight clusters inside a bounding box (west, south, east,
+    north) for a specific zoom level. Each cluster contains the number of
+    flights, its centroid and the species with most flights.
+    """
+    zoom = min(zoom, MAX_CLUSTER_ZOOM)
+    cells = FlightMapCell.objects.filter(_bbox_filter(bbox, zoom), zoom=zoom)
+    if year is not None:
+        cells = cells.filter(year=year)
+    if species:
+        cells = cells.filter(ant_species__name__icontains=species)
+    cells = cells.values_list(
+        "x", "y", "ant_species__name", "count", "latitude_sum", "longitude_sum"
+    )
+
+    grouped = {}
+    for x, y, species_name, count, latitude_sum, longitude_sum in cells:
+        cluster = grouped.setdefault(
+            (x, y), {"count": 0, "lat": 0.0, "lng": 0.0, "species": Counter()}
+        )
+        cluster["count"] += count
+        cluster["lat"] += latitude_sum
+        cluster["lng"] += longitude_sum
+        cluster["species"][species_name] += count
+
+    return [
+        {
+            "lat": cluster["lat"] / cluster["count"],
+            "lng": cluster["lng"] / cluster["count"],
+            "count": cluster["count"],
+            "ant": cluster["species"].most_common(1)[0][0],
+        }
+        for cluster in grouped.values()
+    ]
+
+
+def points(bbox, year=None, species=None):
+    """
+    Return the single flights inside a bounding box as values() rows
+    containing the POINT_FIELDS.
+    """
+    west, south, east, north = bbox
+    flights = Flight.objects.filter(latitude__gte=south, latitude__lte=north)
+    if west <= east:
+        flights = flights.filter(longitude__gte=west, longitude__lte=east)
+    else:
+        flights = flights.filter(Q(longitude__gte=west) | Q(longitude__lte=east))
+    if year is not None:
+        flights = flights.filter(date__year=year)
+    if species:
+        flights = flights.filter(ant_species__name__icontains=species)
+
+    return flights.values(*POINT_FIELDS)
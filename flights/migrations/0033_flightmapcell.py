@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0062_alter_fooditem_image_author_and_more'),
+        ('flights', '0032_alter_flight_id_alter_temperature_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightMapCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField()),
+                ('x', models.IntegerField()),
+                ('y', models.IntegerField()),
+                ('year', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('latitude_sum', models.FloatField(default=0)),
+                ('longitude_sum', models.FloatField(default=0)),
+                ('ant_species', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ants.antspecies')),
+            ],
+            options={
+                'unique_together': {('zoom', 'year', 'x', 'y', 'ant_species')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_flight_frequencies(apps, schema_editor):
+    Flight = apps.get_model("flights", "Flight")
+    FlightFrequency = apps.get_model("flights", "FlightFrequency")
+    rows = (
+        Flight.objects.annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("ant_species_id", "country_id", "year", "month")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    FlightFrequency.objects.bulk_create(FlightFrequency(**row) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0062_alter_fooditem_image_author_and_more'),
+        ('flights', '0033_flightmapcell'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FlightFrequency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('ant_species', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flight_frequencies', to='ants.antspecies')),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flight_frequencies', to='ants.antregion')),
+            ],
+            options={
+                'unique_together': {('ant_species', 'country', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_flight_frequencies, migrations.RunPython.noop),
+    ]
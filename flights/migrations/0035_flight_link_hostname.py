@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:02
+
+from django.db import migrations, models
+
+from flights.helpers import parse_hostname
+
+
+def populate_link_hostnames(apps, schema_editor):
+    Flight = apps.get_model("flights", "Flight")
+    flights = Flight.objects.exclude(link__isnull=True).exclude(link="")
+    for flight in flights.only("id", "link").iterator():
+        flight.link_hostname = parse_hostname(flight.link)
+        flight.save(update_fields=["link_hostname"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('flights', '0034_flightfrequency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='link_hostname',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.RunPython(populate_link_hostnames, migrations.RunPython.noop),
+    ]
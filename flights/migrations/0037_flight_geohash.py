@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+from flights import geohash
+
+
+def populate_geohashes(apps, schema_editor):
+    Flight = apps.get_model("flights", "Flight")
+    flights = []
+    for flight in Flight.objects.only("id", "latitude", "longitude").iterator():
+        flight.geohash = geohash.encode(flight.latitude, flight.longitude)
+        flights.append(flight)
+    Flight.objects.bulk_update(flights, ["geohash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0062_alter_fooditem_image_author_and_more'),
+        ('flights', '0036_geocodingcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flight',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=9),
+        ),
+        migrations.RunPython(populate_geohashes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(fields=['geohash', 'date'], name='flight_geohash_date_idx', opclasses=['varchar_pattern_ops', 'date_ops']),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ants', '0062_alter_fooditem_image_author_and_more'),
+        ('flights', '0037_flight_geohash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight',
+            index=models.Index(condition=models.Q(('reviewed', False)), fields=['created_at', 'id'], name='flight_review_queue_idx'),
+        ),
+    ]
@@ -11,8 +11,9 @@ from taggit.managers import TaggableManager
 
 from ants.models import AntRegion, AntSpecies
 
+from . import geohash
 from .helpers import parse_hostname
-from .managers import FlightManager
+from .managers import FlightFrequencyManager, FlightManager
 
 
 # Create your models here.
@@ -169,6 +170,10 @@ class Flight(models.Model):
     address = models.CharField(max_length=200)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    # geohash of latitude and longitude, stored on save for proximity queries
+    geohash = models.CharField(
+        max_length=geohash.PRECISION, blank=True, default="", editable=False
+    )
     country = models.ForeignKey(AntRegion, models.CASCADE, "flights")
     state = models.CharField(max_length=150, blank=True, null=True)
     city = models.CharField(max_length=150, blank=True, null=True)
@@ -219,6 +224,10 @@ class Flight(models.Model):
     # additional information
     comment = models.TextField(max_length=255, blank=True, null=True)
     link = models.URLField(blank=True, null=True)
+    # hostname of link, stored on save to group flights by website
+    link_hostname = models.CharField(
+        max_length=255, blank=True, null=True, editable=False
+    )
 
     @property
     def link_host(self):
@@ -268,5 +277,81 @@ class Flight(models.Model):
         """Returns the verbose string of the set sky condition option."""
         return self.SKY_CONDITION_CHOICES_DICT.get(self.sky_condition, None)
 
+    def save(self, *args, **kwargs):
+        self.link_hostname = self.link_host
+        self.geohash = geohash.encode(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "link" in update_fields:
+                update_fields.add("link_hostname")
+            if {"latitude", "longitude"} & update_fields:
+                update_fields.add("geohash")
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.date}: {self.ant_species.name}; {self.address}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["geohash", "date"],
+                name="flight_geohash_date_idx",
+                opclasses=["varchar_pattern_ops", "date_ops"],
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                name="flight_review_queue_idx",
+                condition=models.Q(reviewed=False),
+            ),
+        ]
+
+
+class FlightMapCell(models.Model):
+    """
+    Pre-aggregated flights of one species and year inside a single cell
+    of the flights map grid at a specific zoom level.
+    """
+
+    zoom = models.PositiveSmallIntegerField()
+    x = models.IntegerField()
+    y = models.IntegerField()
+    year = models.PositiveSmallIntegerField()
+    ant_species = models.ForeignKey(AntSpecies, models.CASCADE, "+")
+    count = models.PositiveIntegerField(default=0)
+    latitude_sum = models.FloatField(default=0)
+    longitude_sum = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ("zoom", "year", "x", "y", "ant_species")
+
+
+class FlightFrequency(models.Model):
+    """
+    Rollup of the number of flights of an ant species per country,
+    year and month.
+    """
+
+    objects = FlightFrequencyManager()
+
+    ant_species = models.ForeignKey(AntSpecies, models.CASCADE, "flight_frequencies")
+    country = models.ForeignKey(AntRegion, models.CASCADE, "flight_frequencies")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("ant_species", "country", "year", "month")
+
+
+class GeocodingCacheEntry(models.Model):
+    """
+    Cached result of a geocoding request. The key is the normalized query
+    string or the rounded coordinates of a reverse geocoding request.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -0,0 +1,74 @@
+"""
+Compact "packed" representation of flight points.
+
+Instead of one JSON object per flight, coordinates are quantized to
+int32 and sent together with flight and species ids as base64 encoded
+little-endian int32 arrays. Species names are sent only once in a
+dictionary keyed by species id.
+"""
+
+import base64
+import datetime
+import sys
+from array import array
+
+# values() fields needed to build flight points
+POINT_FIELDS = ("id", "latitude", "longitude", "ant_species_id", "ant_species__name")
+# Coordinates are stored as integer multiples of 1/COORDINATE_SCALE degrees
+# (about 0.1 m).
+COORDINATE_SCALE = 10**6
+_EPOCH = datetime.date(1970, 1, 1)
+
+
+def encode_int32_array(values):
+    """Return a list of integers as base64 encoded little-endian int32 array."""
+    data = array("i", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def decode_int32_array(encoded):
+    """Return the list of integers of a base64 encoded int32 array."""
+    data = array("i")
+    data.frombytes(base64.b64decode(encoded))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tolist()
+
+
+def pack_flights(flights, include_dates=False):
+    """
+    Pack values() rows of flights containing the POINT_FIELDS (and "date"
+    if include_dates is True) into a dictionary which can be serialized as
+    JSON.
+    """
+    ids = []
+    latitudes = []
+    longitudes = []
+    species_ids = []
+    dates = []
+    species_names = {}
+    for flight in flights:
+        ids.append(flight["id"])
+        latitudes.append(round(flight["latitude"] * COORDINATE_SCALE))
+        longitudes.append(round(flight["longitude"] * COORDINATE_SCALE))
+        species_id = flight["ant_species_id"]
+        species_ids.append(species_id)
+        species_names[str(species_id)] = flight["ant_species__name"]
+        if include_dates:
+            dates.append((flight["date"] - _EPOCH).days)
+
+    data = {
+        "format": "packed",
+        "count": len(ids),
+        "scale": COORDINATE_SCALE,
+        "ids": encode_int32_array(ids),
+        "lat": encode_int32_array(latitudes),
+        "lng": encode_int32_array(longitudes),
+        "species": encode_int32_array(species_ids),
+        "species_names": species_names,
+    }
+    if include_dates:
+        data["dates"] = encode_int32_array(dates)
+    return data
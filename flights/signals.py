@@ -0,0 +1,81 @@
+"""Signal receivers of flights app."""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ants import species_detail
+
+from . import map_grid, timeseries, top_lists
+from .models import Flight, FlightFrequency
+
+_TRACKED_FIELDS = ("latitude", "longitude", "date", "ant_species_id", "country_id")
+
+
+def _flight_state(flight):
+    """Return the values of a flight the derived flight data depends on."""
+    date = Flight._meta.get_field("date").to_python(flight.date)
+    return {
+        "latitude": float(flight.latitude),
+        "longitude": float(flight.longitude),
+        "year": date.year,
+        "month": date.month,
+        "species_id": flight.ant_species_id,
+        "country_id": flight.country_id,
+    }
+
+
+def _add_to_derived_data(state):
+    map_grid.add_flight(
+        state["latitude"], state["longitude"], state["year"], state["species_id"]
+    )
+    FlightFrequency.objects.add_flights(
+        state["species_id"], state["country_id"], state["year"], state["month"]
+    )
+
+
+def _remove_from_derived_data(state):
+    map_grid.remove_flight(
+        state["latitude"], state["longitude"], state["year"], state["species_id"]
+    )
+    FlightFrequency.objects.add_flights(
+        state["species_id"], state["country_id"], state["year"], state["month"], -1
+    )
+
+
+@receiver(pre_save, sender=Flight)
+def remember_previous_state(sender, instance, **kwargs):
+    """Store the state of the flight before it gets changed."""
+    instance._previous_state = None
+    if instance.pk is None:
+        return
+    previous = sender.objects.filter(pk=instance.pk).only(*_TRACKED_FIELDS).first()
+    if previous is not None:
+        instance._previous_state = _flight_state(previous)
+
+
+@receiver(post_save, sender=Flight)
+def update_derived_data_on_save(sender, instance, raw=False, **kwargs):
+    """Update the data derived from a saved flight."""
+    if raw:
+        return
+    top_lists.invalidate_top_lists()
+    timeseries.invalidate_timeseries()
+    previous_state = getattr(instance, "_previous_state", None)
+    current_state = _flight_state(instance)
+    if previous_state == current_state:
+        return
+    species_detail.invalidate_species(
+        [current_state["species_id"], previous_state and previous_state["species_id"]]
+    )
+    if previous_state is not None:
+        _remove_from_derived_data(previous_state)
+    _add_to_derived_data(current_state)
+
+
+@receiver(post_delete, sender=Flight)
+def update_derived_data_on_delete(sender, instance, **kwargs):
+    """Remove a deleted flight from the derived data."""
+    top_lists.invalidate_top_lists()
+    timeseries.invalidate_timeseries()
+    species_detail.invalidate_species([instance.ant_species_id])
+    _remove_from_derived_data(_flight_state(instance))
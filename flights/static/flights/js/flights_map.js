@@ -1,13 +1,15 @@
 (function () {
+  const SEARCH_DELAY_MS = 300;
+  // has to match MAX_INFO_WINDOWS of FlightInfoWindowsView
+  const MAX_PREFETCHED_INFO_WINDOWS = 100;
+
   class AntMap {
     constructor(year, searchString) {
-      this._markers = [];
-      this._flights = [];
-      this._filteredFlights = [];
-      this._selectedYear = null;
-      this._filterString = null;
       this._year = year;
       this._searchString = searchString;
+      this._requestCount = 0;
+      this._searchTimeout = null;
+      this._infoWindows = new Map();
 
       this.initMap();
     }
@@ -30,8 +32,11 @@
     set searchString(value) {
       if (this._searchString !== value) {
         this._searchString = value;
-        this.filterFlights();
-        this.updateMarkers();
+        clearTimeout(this._searchTimeout);
+        this._searchTimeout = setTimeout(
+          () => this.updateMap(),
+          SEARCH_DELAY_MS,
+        );
       }
     }
 
@@ -48,19 +53,12 @@
         },
       ).addTo(this._map);
 
+      this._markerLayer = L.layerGroup().addTo(this._map);
       this._map.setView([45, 10], 2);
-      this.initClusterGroup();
+      this._map.on("moveend", () => this.updateMap());
       this.updateMap();
     }
 
-    initClusterGroup() {
-      this._clusterGroup = L.markerClusterGroup();
-      this._map.addLayer(this._clusterGroup);
-      this._clusterGroup.on("click", (a) => {
-        this.openFlightInfo(a.layer);
-      });
-    }
-
     async getCurrentPosition() {
       return new Promise((resolve, reject) => {
         if ("geolocation" in navigator) {
@@ -94,63 +92,127 @@
         });
     }
 
-    openFlightInfo(marker) {
-      const markerIndex = this._markers.indexOf(marker);
-      const flight = this._filteredFlights[markerIndex];
-      fetch(flight.id + "/info-window")
+    showFlightInfo(html) {
+      document.getElementById("flightInfoModalContent").innerHTML = html;
+      var modal = bootstrap.Modal.getOrCreateInstance(
+        document.getElementById("flightInfoModal"),
+      );
+      modal.toggle();
+    }
+
+    prefetchFlightInfo(flightIds) {
+      const missingIds = flightIds
+        .filter((flightId) => !this._infoWindows.has(flightId))
+        .slice(0, MAX_PREFETCHED_INFO_WINDOWS);
+      if (missingIds.length === 0) {
+        return;
+      }
+      const params = new URLSearchParams({ ids: missingIds.join(",") });
+      fetch("/flights/info-windows/?" + params.toString())
+        .then((response) => response.json())
+        .then((data) => {
+          for (const [flightId, html] of Object.entries(data.flights)) {
+            this._infoWindows.set(Number(flightId), html);
+          }
+        })
+        .catch((error) =>
+          console.log(`Could not prefetch flight infos: ${error}`),
+        );
+    }
+
+    openFlightInfo(flightId) {
+      if (this._infoWindows.has(flightId)) {
+        this.showFlightInfo(this._infoWindows.get(flightId));
+        return;
+      }
+      fetch(flightId + "/info-window")
         .then((response) => response.text())
         .then((data) => {
-          document.getElementById("flightInfoModalContent").innerHTML = data;
-          var modal = bootstrap.Modal.getOrCreateInstance(
-            document.getElementById("flightInfoModal"),
-          );
-          modal.toggle();
+          this._infoWindows.set(flightId, data);
+          this.showFlightInfo(data);
         })
         .catch((error) =>
           console.log(
-            `Could not fetch info for flight with id ${flight.id}: ${error}`,
+            `Could not fetch info for flight with id ${flightId}: ${error}`,
           ),
         );
     }
 
-    removeMarkers() {
-      this._clusterGroup.clearLayers();
-      this._markers = [];
+    getBoundingBox() {
+      const bounds = this._map.getBounds();
+      let west = bounds.getWest();
+      let east = bounds.getEast();
+      if (east - west >= 360) {
+        west = -180;
+        east = 180;
+      } else {
+        west = L.Util.wrapNum(west, [-180, 180], true);
+        east = L.Util.wrapNum(east, [-180, 180], true);
+      }
+      const south = Math.max(bounds.getSouth(), -90);
+      const north = Math.min(bounds.getNorth(), 90);
+      return [west, south, east, north].join(",");
     }
 
     updateMap() {
-      this._flights = [];
-      this._filteredFlights = [];
-      fetch("/flights/list?year=" + this._year)
+      const requestId = ++this._requestCount;
+      const params = new URLSearchParams({
+        bbox: this.getBoundingBox(),
+        zoom: this._map.getZoom(),
+        year: this._year,
+        species: this._searchString,
+        format: "packed",
+      });
+      fetch("/flights/clusters/?" + params.toString())
         .then((response) => response.json())
         .then((data) => {
-          this._flights = data;
-          this.filterFlights();
-          this.updateMarkers();
-        });
+          // ignore responses of outdated requests
+          if (requestId === this._requestCount) {
+            this.updateMarkers(data);
+          }
+        })
+        .catch((error) => console.log(`Could not fetch flights: ${error}`));
     }
 
-    filterFlights() {
-      var filterStringLower = this._searchString.toLowerCase();
-
-      if (filterStringLower) {
-        this._filteredFlights = this._flights.filter(function (flight) {
-          var antSpeciesLower = flight.ant.toLowerCase();
-          return antSpeciesLower.indexOf(filterStringLower) >= 0;
-        });
-      } else {
-        this._filteredFlights = this._flights;
+    createClusterIcon(count) {
+      let sizeClass = "marker-cluster-small";
+      if (count >= 100) {
+        sizeClass = "marker-cluster-large";
+      } else if (count >= 10) {
+        sizeClass = "marker-cluster-medium";
       }
+      return L.divIcon({
+        html: `<div><span>${count}</span></div>`,
+        className: `marker-cluster ${sizeClass}`,
+        iconSize: L.point(40, 40),
+      });
     }
 
-    updateMarkers() {
-      this.removeMarkers();
+    updateMarkers(data) {
+      this._markerLayer.clearLayers();
 
-      for (var flight of this._filteredFlights) {
-        var plotll = new L.LatLng(flight.lat, flight.lng, true);
-        var plotmark = new L.Marker(plotll);
-        this._markers.push(plotmark);
-        this._clusterGroup.addLayer(plotmark);
+      for (const cluster of data.clusters) {
+        const marker = L.marker([cluster.lat, cluster.lng], {
+          icon: this.createClusterIcon(cluster.count),
+          title: cluster.ant,
+        });
+        marker.on("click", () => {
+          this._map.setView([cluster.lat, cluster.lng], this._map.getZoom() + 2);
+        });
+        this._markerLayer.addLayer(marker);
+      }
+
+      if (data.points.format === "packed") {
+        const points = decodePackedFlights(data.points);
+        for (let i = 0; i < points.count; i++) {
+          const flightId = points.ids[i];
+          const marker = L.marker([points.lat[i], points.lng[i]], {
+            title: points.speciesNames[points.species[i]],
+          });
+          marker.on("click", () => this.openFlightInfo(flightId));
+          this._markerLayer.addLayer(marker);
+        }
+        this.prefetchFlightInfo(Array.from(points.ids));
       }
     }
   }
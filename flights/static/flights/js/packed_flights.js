@@ -0,0 +1,38 @@
+/*
+ * Decoder for the packed flights format (?format=packed).
+ * Integer arrays are base64 encoded little-endian int32 arrays.
+ */
+(function () {
+  function decodeInt32Array(encoded) {
+    const binary = atob(encoded);
+    const view = new DataView(new ArrayBuffer(binary.length));
+    for (let i = 0; i < binary.length; i++) {
+      view.setUint8(i, binary.charCodeAt(i));
+    }
+    const values = new Int32Array(binary.length / 4);
+    for (let i = 0; i < values.length; i++) {
+      values[i] = view.getInt32(i * 4, true);
+    }
+    return values;
+  }
+
+  function decodeCoordinates(encoded, scale) {
+    const values = decodeInt32Array(encoded);
+    const coordinates = new Float64Array(values.length);
+    for (let i = 0; i < values.length; i++) {
+      coordinates[i] = values[i] / scale;
+    }
+    return coordinates;
+  }
+
+  window.decodePackedFlights = function (data) {
+    return {
+      count: data.count,
+      ids: decodeInt32Array(data.ids),
+      lat: decodeCoordinates(data.lat, data.scale),
+      lng: decodeCoordinates(data.lng, data.scale),
+      species: decodeInt32Array(data.species),
+      speciesNames: data.species_names,
+    };
+  };
+})();
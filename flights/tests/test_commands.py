@@ -0,0 +1,61 @@
+"""Test module for the management commands of flights app."""
+
+import calendar
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ants.models import AntRegion, AntSpecies, Genus, Month
+from flights.models import Flight
+
+
+class CollectFlightMonthsTest(TestCase):
+    def setUp(self):
+        for i in range(1, 13):
+            Month.objects.create(id=i, name=calendar.month_name[i])
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus
+        )
+        self.lasius_flavus = AntSpecies.objects.create(
+            name="Lasius flavus", valid=True, genus=genus
+        )
+        region = AntRegion.objects.create(name="Germany", code="DE", type="Country")
+        for species, dates in (
+            (self.lasius_niger, ["2023-07-01", "2024-07-10", "2024-07-20"]),
+            (self.lasius_niger, ["2024-08-01"]),
+            (self.lasius_flavus, ["2024-08-01", "2024-08-02"]),
+        ):
+            for date in dates:
+                Flight.objects.create(
+                    ant_species=species,
+                    date=date,
+                    latitude=50.0,
+                    longitude=10.0,
+                    country=region,
+                )
+        self.lasius_niger.flight_months.set([6])
+        self.lasius_flavus.flight_months.set([5])
+
+    def _months(self, species):
+        return list(species.flight_months.values_list("id", flat=True))
+
+    def test_collect_all(self):
+        out = StringIO()
+        call_command("collect_flight_months", "all", stdout=out)
+        self.assertEqual(self._months(self.lasius_niger), [7])
+        self.assertEqual(self._months(self.lasius_flavus), [])
+        self.assertIn("+ Lasius niger: July", out.getvalue())
+        self.assertIn("- Lasius niger: June", out.getvalue())
+
+    def test_collect_single_species(self):
+        call_command("collect_flight_months", "Lasius niger", stdout=StringIO())
+        self.assertEqual(self._months(self.lasius_niger), [7])
+        self.assertEqual(self._months(self.lasius_flavus), [5])
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command("collect_flight_months", "all", dry_run=True, stdout=out)
+        self.assertEqual(self._months(self.lasius_niger), [6])
+        self.assertIn("- Lasius flavus: May", out.getvalue())
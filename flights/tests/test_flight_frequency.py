@@ -0,0 +1,80 @@
+"""Test module for the flight frequency rollup table."""
+
+from django.test import TestCase
+
+from ants.models import AntRegion, AntSpecies, Genus
+from flights.models import Flight, FlightFrequency
+
+
+class FlightFrequencyTest(TestCase):
+    def setUp(self):
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus
+        )
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.austria = AntRegion.objects.create(
+            name="Austria", code="AT", type="Country"
+        )
+
+    def _create_flight(self, date="2024-05-15", country=None):
+        return Flight.objects.create(
+            ant_species=self.lasius_niger,
+            date=date,
+            latitude=50.0,
+            longitude=10.0,
+            country=country or self.germany,
+        )
+
+    def test_flights_are_counted(self):
+        self._create_flight()
+        self._create_flight(date="2024-05-20")
+        row = FlightFrequency.objects.get()
+        self.assertEqual(
+            (row.country, row.year, row.month, row.count), (self.germany, 2024, 5, 2)
+        )
+
+    def test_changed_flight_moves_count(self):
+        flight = self._create_flight()
+        flight.date = "2023-07-01"
+        flight.country = self.austria
+        flight.save()
+        row = FlightFrequency.objects.get()
+        self.assertEqual(
+            (row.country, row.year, row.month, row.count), (self.austria, 2023, 7, 1)
+        )
+
+    def test_deleted_flight_removes_row(self):
+        flight = self._create_flight()
+        flight.delete()
+        self.assertFalse(FlightFrequency.objects.exists())
+
+    def test_frequency_per_month(self):
+        self._create_flight()
+        self._create_flight(date="2023-05-01", country=self.austria)
+        self._create_flight(date="2024-06-01")
+
+        frequency = Flight.objects.flight_frequency_per_month(self.lasius_niger)
+        self.assertEqual(frequency["May"], 2)
+        self.assertEqual(frequency["June"], 1)
+        self.assertEqual(frequency["January"], 0)
+
+        frequency = Flight.objects.flight_frequency_per_month(
+            self.lasius_niger.slug, country="AT"
+        )
+        self.assertEqual(sum(frequency.values()), 1)
+
+        frequency = Flight.objects.flight_frequency_per_month(
+            self.lasius_niger, country=self.germany, year=2024
+        )
+        self.assertEqual(frequency["May"], 1)
+        self.assertEqual(frequency["June"], 1)
+
+    def test_rebuild(self):
+        self._create_flight()
+        self._create_flight(date="2024-05-20")
+        FlightFrequency.objects.all().delete()
+        self.assertEqual(FlightFrequency.objects.rebuild(), 1)
+        self.assertEqual(FlightFrequency.objects.get().count, 2)
@@ -0,0 +1,160 @@
+"""Test module for the geocoding cache and providers."""
+
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from flights import geocoding
+from flights.models import GeocodingCacheEntry
+
+BERLIN = {
+    "address": "Berlin, Germany",
+    "country": "Germany",
+    "country_code": "de",
+    "state": "Berlin",
+    "city": "Berlin",
+    "lat": 52.52,
+    "lng": 13.405,
+}
+
+
+class CountingProvider(geocoding.OfflineGeocodingProvider):
+    """Offline provider which counts its requests."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.requests = 0
+
+    def geocode(self, query_string):
+        self.requests += 1
+        return super().geocode(query_string)
+
+    def reverse_geocode(self, lat, lng):
+        self.requests += 1
+        return super().reverse_geocode(lat, lng)
+
+
+class GeocodingTest(TestCase):
+    def setUp(self):
+        offline_file = tempfile.NamedTemporaryFile(
+            "w", suffix=".json", delete=False, encoding="utf-8"
+        )
+        json.dump(
+            {
+                "geocode": {"berlin, germany": BERLIN},
+                "reverse": {"52.520,13.405": BERLIN},
+            },
+            offline_file,
+        )
+        offline_file.close()
+        self.path = offline_file.name
+        self.addCleanup(os.remove, self.path)
+        self.provider = CountingProvider(self.path)
+
+    def test_normalize_query(self):
+        self.assertEqual(
+            geocoding.normalize_query("  Berlin,   GERMANY "), "berlin, germany"
+        )
+
+    def test_geocode_is_cached(self):
+        result = geocoding.geocode("Berlin, Germany", self.provider)
+        self.assertEqual(result, BERLIN)
+        self.assertEqual(geocoding.geocode(" berlin,  germany", self.provider), BERLIN)
+        self.assertEqual(self.provider.requests, 1)
+        self.assertTrue(GeocodingCacheEntry.objects.filter(key="q:berlin, germany"))
+
+    def test_reverse_geocode_uses_rounded_coordinates(self):
+        geocoding.reverse_geocode(52.52001, 13.40499, self.provider)
+        result = geocoding.reverse_geocode(52.5199, 13.4051, self.provider)
+        self.assertEqual(result, BERLIN)
+        self.assertEqual(self.provider.requests, 1)
+
+    def test_missing_results_are_not_cached(self):
+        self.assertIsNone(geocoding.geocode("Atlantis", self.provider))
+        self.assertFalse(GeocodingCacheEntry.objects.exists())
+
+    def test_geocode_many(self):
+        geocoding.geocode("Berlin, Germany", self.provider)
+        results = geocoding.geocode_many(
+            ["Berlin, Germany", "BERLIN, Germany", "Atlantis"], self.provider
+        )
+        self.assertEqual(results["BERLIN, Germany"], BERLIN)
+        self.assertIsNone(results["Atlantis"])
+        self.assertEqual(self.provider.requests, 2)
+
+    def test_expired_entries_are_requested_again(self):
+        geocoding.geocode("Berlin, Germany", self.provider)
+        GeocodingCacheEntry.objects.update(
+            created_at=timezone.now() - timedelta(days=365)
+        )
+        with self.settings(GEOCODING_CACHE_TTL_DAYS=30):
+            geocoding.geocode("Berlin, Germany", self.provider)
+        self.assertEqual(self.provider.requests, 2)
+        self.assertEqual(GeocodingCacheEntry.objects.count(), 1)
+
+    @override_settings(GEOCODING_CACHE_TTL_DAYS=30, GEOCODING_CACHE_MAX_ENTRIES=1)
+    def test_evict_cache(self):
+        geocoding.geocode("Berlin, Germany", self.provider)
+        geocoding.geocode("Atlantis", self.provider)
+        geocoding.reverse_geocode(52.52, 13.405, self.provider)
+        GeocodingCacheEntry.objects.create(key="q:old", result=BERLIN)
+        GeocodingCacheEntry.objects.filter(key="q:old").update(
+            created_at=timezone.now() - timedelta(days=365)
+        )
+        self.assertEqual(GeocodingCacheEntry.objects.count(), 3)
+
+        out = StringIO()
+        call_command("evict_geocoding_cache", stdout=out)
+        self.assertIn("Evicted 2", out.getvalue())
+        self.assertEqual(
+            list(GeocodingCacheEntry.objects.values_list("key", flat=True)),
+            ["r:52.520,13.405"],
+        )
+
+    def test_provider_must_implement_both_methods(self):
+        class GeocodeOnlyProvider(geocoding.GeocodingProvider):
+            def geocode(self, query_string):
+                return None
+
+        with self.assertRaises(TypeError):
+            GeocodeOnlyProvider()
+
+    def test_configured_provider(self):
+        with self.settings(
+            GEOCODING_PROVIDER="flights.geocoding.OfflineGeocodingProvider",
+            GEOCODING_OFFLINE_FILE=self.path,
+        ):
+            self.assertEqual(geocoding.geocode("Berlin, Germany"), BERLIN)
+
+    def test_bing_result_dict(self):
+        raw_json = {
+            "resourceSets": [
+                {
+                    "resources": [
+                        {
+                            "name": "Berlin, Germany",
+                            "address": {
+                                "countryRegion": "Germany",
+                                "countryRegionIso2": "DE",
+                                "adminDistrict": "Berlin",
+                                "postalCode": "10117",
+                                "locality": "Berlin",
+                            },
+                            "point": {"coordinates": [52.52, 13.405]},
+                        }
+                    ]
+                }
+            ]
+        }
+        result = geocoding.create_result_dict(raw_json)
+        self.assertEqual(result["country_code"], "de")
+        self.assertEqual(result["city"], "10117 Berlin")
+        self.assertIsNone(
+            geocoding.create_result_dict({"resourceSets": [{"resources": []}]})
+        )
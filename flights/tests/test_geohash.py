@@ -0,0 +1,80 @@
+"""Test module for geohash proximity queries."""
+
+import datetime
+
+from django.test import SimpleTestCase, TestCase
+
+from ants.models import AntRegion, AntSpecies, Genus
+from flights import geohash
+from flights.models import Flight
+
+
+class GeohashTest(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(geohash.encode(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(geohash.encode(-25.382708, -49.265506, 6), "6gkzwg")
+
+    def test_covering_cells_contain_area(self):
+        latitude, longitude, radius = 48.1, 11.5, 50
+        cells = geohash.covering_cells(latitude, longitude, radius)
+        self.assertLessEqual(len(cells), geohash.MAX_CELLS)
+        for delta_lat, delta_lng in ((0, 0), (0.44, 0), (-0.44, 0), (0, 0.66)):
+            point_hash = geohash.encode(latitude + delta_lat, longitude + delta_lng)
+            self.assertTrue(any(point_hash.startswith(cell) for cell in cells))
+
+    def test_covering_cells_across_antimeridian(self):
+        cells = geohash.covering_cells(0, 179.9, 50)
+        self.assertTrue(
+            any(geohash.encode(0, -179.9).startswith(cell) for cell in cells)
+        )
+
+    def test_haversine(self):
+        # Berlin - Munich
+        distance = geohash.haversine(52.5200, 13.4050, 48.1351, 11.5820)
+        self.assertAlmostEqual(distance, 504.4, delta=1)
+
+
+class NearFlightsTest(TestCase):
+    def setUp(self):
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus
+        )
+        self.region = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+
+    def _create_flight(self, latitude, longitude, date="2024-05-15"):
+        return Flight.objects.create(
+            ant_species=self.lasius_niger,
+            date=date,
+            latitude=latitude,
+            longitude=longitude,
+            country=self.region,
+        )
+
+    def test_geohash_stored_on_save(self):
+        flight = self._create_flight(52.52, 13.405)
+        self.assertEqual(flight.geohash, geohash.encode(52.52, 13.405))
+        flight.latitude = 48.1351
+        flight.save(update_fields=["latitude"])
+        flight.refresh_from_db()
+        self.assertEqual(flight.geohash, geohash.encode(48.1351, 13.405))
+
+    def test_near(self):
+        berlin = self._create_flight(52.52, 13.405)
+        potsdam = self._create_flight(52.39, 13.06)
+        self._create_flight(48.1351, 11.582)
+        self._create_flight(52.40, 13.10, date="2024-04-01")
+
+        flights = Flight.objects.near(
+            52.52,
+            13.405,
+            50,
+            datetime.date(2024, 5, 8),
+            datetime.date(2024, 5, 15),
+        )
+        self.assertEqual(list(flights), [berlin, potsdam])
+        self.assertAlmostEqual(
+            flights[1].distance, geohash.haversine(52.52, 13.405, 52.39, 13.06)
+        )
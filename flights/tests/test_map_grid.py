@@ -0,0 +1,104 @@
+"""Test module for the flights map grid index."""
+
+from django.test import TestCase
+
+from ants.models import AntRegion, AntSpecies, Genus
+from flights import map_grid
+from flights.models import Flight, FlightMapCell
+
+
+class MapGridTest(TestCase):
+    def setUp(self):
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus
+        )
+        self.lasius_flavus = AntSpecies.objects.create(
+            name="Lasius flavus", valid=True, genus=genus
+        )
+        self.region = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+
+    def _create_flight(self, species, latitude=50.0, longitude=10.0, date="2024-05-15"):
+        return Flight.objects.create(
+            ant_species=species,
+            date=date,
+            latitude=latitude,
+            longitude=longitude,
+            country=self.region,
+        )
+
+    def test_cell_coordinates(self):
+        self.assertEqual(map_grid.cell_x(-180, 0), 0)
+        self.assertEqual(map_grid.cell_x(180, 0), map_grid.CELLS_PER_TILE - 1)
+        self.assertEqual(map_grid.cell_y(90, 0), 0)
+        self.assertEqual(map_grid.cell_y(-90, 0), map_grid.CELLS_PER_TILE - 1)
+
+    def test_flight_added_to_every_zoom_level(self):
+        self._create_flight(self.lasius_niger)
+        self.assertEqual(FlightMapCell.objects.count(), map_grid.MAX_CLUSTER_ZOOM + 1)
+
+    def test_flights_in_same_cell_are_counted(self):
+        self._create_flight(self.lasius_niger)
+        self._create_flight(self.lasius_niger, latitude=50.0001)
+        cell = FlightMapCell.objects.get(zoom=0)
+        self.assertEqual(cell.count, 2)
+        self.assertAlmostEqual(cell.latitude_sum, 100.0001)
+
+    def test_deleted_flight_removed_from_grid(self):
+        flight = self._create_flight(self.lasius_niger)
+        flight.delete()
+        self.assertFalse(FlightMapCell.objects.exists())
+
+    def test_moved_flight_updates_grid(self):
+        flight = self._create_flight(self.lasius_niger)
+        flight.latitude = -30.0
+        flight.longitude = 150.0
+        flight.save()
+        self.assertEqual(FlightMapCell.objects.count(), map_grid.MAX_CLUSTER_ZOOM + 1)
+        cell = FlightMapCell.objects.get(zoom=map_grid.MAX_CLUSTER_ZOOM)
+        self.assertEqual(cell.x, map_grid.cell_x(150.0, cell.zoom))
+        self.assertEqual(cell.y, map_grid.cell_y(-30.0, cell.zoom))
+
+    def test_rebuild(self):
+        self._create_flight(self.lasius_niger)
+        self._create_flight(self.lasius_flavus, date="2023-06-01")
+        cells = list(
+            FlightMapCell.objects.values_list(*map_grid.CELL_KEY_FIELDS, "count")
+        )
+        FlightMapCell.objects.all().delete()
+        map_grid.rebuild()
+        self.assertCountEqual(
+            FlightMapCell.objects.values_list(*map_grid.CELL_KEY_FIELDS, "count"),
+            cells,
+        )
+
+    def test_clusters(self):
+        self._create_flight(self.lasius_niger)
+        self._create_flight(self.lasius_niger, latitude=50.2)
+        self._create_flight(self.lasius_flavus, latitude=50.1)
+        clusters = map_grid.clusters((-180, -85, 180, 85), 0)
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual(clusters[0]["count"], 3)
+        self.assertAlmostEqual(clusters[0]["lat"], 50.1)
+        self.assertEqual(clusters[0]["ant"], "Lasius niger")
+
+    def test_clusters_filtered_by_year_and_species(self):
+        self._create_flight(self.lasius_niger)
+        self._create_flight(self.lasius_flavus, date="2023-06-01")
+        bbox = (-180, -85, 180, 85)
+        self.assertEqual(
+            map_grid.clusters(bbox, 0, year=2023)[0]["ant"], "Lasius flavus"
+        )
+        self.assertEqual(map_grid.clusters(bbox, 0, species="niger")[0]["count"], 1)
+        self.assertEqual(map_grid.clusters(bbox, 0, year=2000), [])
+
+    def test_clusters_outside_bbox(self):
+        self._create_flight(self.lasius_niger)
+        self.assertEqual(map_grid.clusters((100, -40, 120, -20), 5), [])
+
+    def test_points_crossing_antimeridian(self):
+        flight = self._create_flight(self.lasius_niger, longitude=179.5)
+        points = map_grid.points((170, 40, -170, 60))
+        self.assertEqual([point["id"] for point in points], [flight.id])
@@ -0,0 +1,55 @@
+"""Test module for the packed flights format."""
+
+import datetime
+
+from django.test import SimpleTestCase
+
+from flights.packing import (
+    COORDINATE_SCALE,
+    decode_int32_array,
+    encode_int32_array,
+    pack_flights,
+)
+
+
+class PackingTest(SimpleTestCase):
+    def setUp(self):
+        self.flights = [
+            {
+                "id": 1,
+                "latitude": 50.123456,
+                "longitude": -10.5,
+                "ant_species_id": 7,
+                "ant_species__name": "Lasius niger",
+                "date": datetime.date(2024, 5, 15),
+            },
+            {
+                "id": 2,
+                "latitude": -33.9,
+                "longitude": 151.2,
+                "ant_species_id": 7,
+                "ant_species__name": "Lasius niger",
+                "date": datetime.date(1970, 1, 2),
+            },
+        ]
+
+    def test_int32_array_round_trip(self):
+        values = [0, 1, -1, 2**31 - 1, -(2**31)]
+        self.assertEqual(decode_int32_array(encode_int32_array(values)), values)
+
+    def test_pack_flights(self):
+        data = pack_flights(self.flights)
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(decode_int32_array(data["ids"]), [1, 2])
+        self.assertEqual(decode_int32_array(data["species"]), [7, 7])
+        self.assertEqual(data["species_names"], {"7": "Lasius niger"})
+        latitudes = [
+            value / COORDINATE_SCALE for value in decode_int32_array(data["lat"])
+        ]
+        self.assertAlmostEqual(latitudes[0], 50.123456)
+        self.assertAlmostEqual(latitudes[1], -33.9)
+        self.assertNotIn("dates", data)
+
+    def test_pack_flights_with_dates(self):
+        data = pack_flights(self.flights, include_dates=True)
+        self.assertEqual(decode_int32_array(data["dates"]), [19858, 1])
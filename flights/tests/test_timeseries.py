@@ -0,0 +1,101 @@
+"""Test module for the flight time series."""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ants.models import AntRegion, AntSpecies, Genus
+from ants.tests.caches import LOCMEM_CACHE
+from flights.models import Flight
+from flights.timeseries import flight_timeseries
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FlightTimeseriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        lasius = Genus.objects.create(name="Lasius")
+        messor = Genus.objects.create(name="Messor")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=lasius
+        )
+        self.messor_barbarus = AntSpecies.objects.create(
+            name="Messor barbarus", valid=True, genus=messor
+        )
+        self.germany = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+        self.spain = AntRegion.objects.create(name="Spain", code="ES", type="Country")
+        self._create_flight(self.lasius_niger, "2023-07-03")
+        self._create_flight(self.lasius_niger, "2024-07-01")
+        self._create_flight(self.lasius_niger, "2024-07-05")
+        self._create_flight(self.messor_barbarus, "2024-09-20", self.spain)
+
+    def _create_flight(self, species, date, country=None):
+        return Flight.objects.create(
+            ant_species=species,
+            date=date,
+            latitude=50.0,
+            longitude=10.0,
+            country=country or self.germany,
+        )
+
+    def test_month_buckets(self):
+        self.assertEqual(
+            flight_timeseries(),
+            [
+                {"date": "2023-07-01", "count": 1},
+                {"date": "2024-07-01", "count": 2},
+                {"date": "2024-09-01", "count": 1},
+            ],
+        )
+
+    def test_week_and_day_buckets(self):
+        self.assertEqual(
+            flight_timeseries(interval="week", year_from=2024, genus="lasius"),
+            [{"date": "2024-07-01", "count": 2}],
+        )
+        self.assertEqual(
+            len(flight_timeseries(interval="DAY", species=self.lasius_niger.slug)), 3
+        )
+
+    def test_filters(self):
+        self.assertEqual(
+            flight_timeseries(country="es"), [{"date": "2024-09-01", "count": 1}]
+        )
+        self.assertEqual(
+            flight_timeseries(year_from="2023", year_to="2023"),
+            [{"date": "2023-07-01", "count": 1}],
+        )
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            flight_timeseries(interval="year")
+        with self.assertRaises(ValueError):
+            flight_timeseries(year_from="abc")
+
+    def test_single_aggregate_query(self):
+        with self.assertNumQueries(1):
+            flight_timeseries(interval="week", genus="Lasius", country="DE")
+
+    def test_cached_per_normalized_parameters(self):
+        flight_timeseries(genus="Lasius", country="DE")
+        with self.assertNumQueries(0):
+            flight_timeseries(interval="MONTH", genus=" lasius ", country="de")
+
+    def test_invalidated_when_flights_change(self):
+        self.assertEqual(len(flight_timeseries()), 3)
+        flight = self._create_flight(self.lasius_niger, "2022-05-01")
+        self.assertEqual(len(flight_timeseries()), 4)
+        flight.delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(len(flight_timeseries()), 3)
+
+    def test_invalidated_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self._create_flight(self.lasius_niger, "2022-05-01")
+            # a request before the commit can cache the time series again
+            flight_timeseries()
+        for callback in callbacks:
+            callback()
+        with self.assertNumQueries(1):
+            flight_timeseries()
@@ -0,0 +1,85 @@
+"""Test module for the flights top lists."""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ants.models import AntRegion, AntSpecies, Genus
+from ants.tests.caches import LOCMEM_CACHE
+from flights import top_lists
+from flights.models import Flight
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TopListsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        genus = Genus.objects.create(name="Lasius")
+        self.lasius_niger = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus
+        )
+        self.region = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+
+    def _create_flight(self, **kwargs):
+        return Flight.objects.create(
+            ant_species=self.lasius_niger,
+            date="2024-05-15",
+            latitude=50.0,
+            longitude=10.0,
+            country=self.region,
+            **kwargs,
+        )
+
+    def test_link_hostname_stored_on_save(self):
+        flight = self._create_flight(link="https://www.example.com/flights/1")
+        self.assertEqual(flight.link_hostname, "https://www.example.com")
+        flight.link = None
+        flight.save()
+        flight.refresh_from_db()
+        self.assertIsNone(flight.link_hostname)
+
+    def test_top_lists(self):
+        self._create_flight(external_user="ant", link="https://a.example.com/1")
+        self._create_flight(external_user="ant", link="https://a.example.com/2")
+        self._create_flight(external_user="bee", link="https://b.example.com/1")
+        self._create_flight()
+
+        lists = top_lists.get_top_lists()
+        self.assertEqual(
+            lists["external_users"][0],
+            {"name": "ant", "hostname": "https://a.example.com", "flight_count": 2},
+        )
+        self.assertEqual(lists["max_flights"], 2)
+        self.assertEqual(
+            lists["top_websites"],
+            [
+                {"name": "https://a.example.com", "count": 2},
+                {"name": "https://b.example.com", "count": 1},
+            ],
+        )
+        self.assertEqual(lists["top_species"], [{"name": "Lasius niger", "count": 4}])
+        self.assertEqual(lists["top_countries_max_reports"], 4)
+
+    def test_snapshot_rebuilt_after_flight_change(self):
+        self._create_flight()
+        self.assertEqual(top_lists.get_top_lists()["top_species_max_reports"], 1)
+        with self.assertNumQueries(0):
+            top_lists.get_top_lists()
+
+        self._create_flight()
+        self.assertEqual(top_lists.get_top_lists()["top_species_max_reports"], 2)
+
+    def test_snapshot_dropped_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self._create_flight()
+            # a request before the commit can cache the old leaderboards
+            cache.set(top_lists.TOP_LISTS_CACHE_KEY, {"stale": True}, timeout=None)
+        for callback in callbacks:
+            callback()
+        self.assertNotIn("stale", top_lists.get_top_lists())
+
+    def test_top_lists_without_flights(self):
+        lists = top_lists.get_top_lists()
+        self.assertEqual(lists["external_users"], [])
+        self.assertEqual(lists["max_flights"], 0)
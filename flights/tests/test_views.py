@@ -3,7 +3,9 @@ from django.test import TestCase
 from django.urls import reverse
 
 from ants.models import AntRegion, AntSpecies, Genus
-from flights.models import Flight
+from flights import views
+from flights.models import Flight, Temperature, Velocity
+from flights.packing import decode_int32_array
 
 
 class FlightsViewsTest(TestCase):
@@ -39,12 +41,72 @@ class FlightsViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json()), 1)
 
+    def test_flights_list_packed(self):
+        response = self.client.get(reverse("flights_list") + "?format=packed")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["format"], "packed")
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(decode_int32_array(data["ids"]), [self.flight.id])
+        self.assertEqual(
+            data["species_names"], {str(self.ant_species.id): "Lasius niger"}
+        )
+
     def test_flights_list_year_filter_no_match(self):
         response = self.client.get(reverse("flights_list") + "?year=2000")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.json()), 0)
 
 
+class FlightInfoWindowsViewTest(TestCase):
+    def setUp(self):
+        genus = Genus.objects.create(name="Lasius")
+        self.ant_species = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus, slug="lasius-niger"
+        )
+        self.region = AntRegion.objects.create(
+            name="Germany", code="DE", type="Country"
+        )
+
+    def _create_flight(self):
+        flight = Flight.objects.create(
+            ant_species=self.ant_species,
+            date="2024-05-15",
+            latitude=50.0,
+            longitude=10.0,
+            country=self.region,
+            spotting_type="F",
+            temperature=Temperature.objects.create(value=20, unit=Temperature.CELSIUS),
+            wind_speed=Velocity.objects.create(value=5, unit=Velocity.KMH),
+        )
+        flight.habitat.add("forest", "meadow")
+        return flight
+
+    def _get(self, flights):
+        ids = ",".join(str(flight.pk) for flight in flights)
+        return self.client.get(reverse("flight_info_windows") + "?ids=" + ids)
+
+    def test_info_windows(self):
+        flight = self._create_flight()
+        response = self._get([flight])
+        self.assertEqual(response.status_code, 200)
+        html = response.json()["flights"][str(flight.pk)]
+        self.assertIn("Lasius niger", html)
+        self.assertIn("forest, meadow", html)
+
+    def test_constant_number_of_queries(self):
+        flights = [self._create_flight() for _ in range(5)]
+        with self.assertNumQueries(2):
+            self._get(flights[:1])
+        with self.assertNumQueries(2):
+            response = self._get(flights)
+        self.assertEqual(len(response.json()["flights"]), 5)
+
+    def test_invalid_ids(self):
+        response = self.client.get(reverse("flight_info_windows") + "?ids=1,a")
+        self.assertEqual(response.status_code, 400)
+
+
 class FlightsReviewViewsTest(TestCase):
     def setUp(self):
         self.genus = Genus.objects.create(name="Lasius")
@@ -88,3 +150,117 @@ class FlightsReviewViewsTest(TestCase):
         response = self.client.get(reverse("flights_review_list"))
         self.assertEqual(response.status_code, 200)
         self.assertNotContains(response, "Lasius niger")
+
+    def _create_flights(self, count, **kwargs):
+        return [
+            Flight.objects.create(
+                ant_species=self.ant_species,
+                date="2024-05-15",
+                latitude=50.0,
+                longitude=10.0,
+                country=self.region,
+                **kwargs,
+            )
+            for _ in range(count)
+        ]
+
+    def test_review_list_keyset_pagination(self):
+        flights = [self.flight, *self._create_flights(views.REVIEW_PAGE_SIZE)]
+        self.client.login(username="staff", password="pass")
+        response = self.client.get(reverse("flights_review_list"))
+        self.assertEqual(response.context["flights"], flights[: views.REVIEW_PAGE_SIZE])
+        self.assertEqual(response.context["pending_count"], len(flights))
+
+        response = self.client.get(
+            reverse("flights_review_list") + "?" + response.context["next_query"]
+        )
+        self.assertEqual(response.context["flights"], flights[-1:])
+        self.assertNotIn("next_query", response.context)
+
+    def test_review_list_invalid_cursor(self):
+        self.client.login(username="staff", password="pass")
+        response = self.client.get(reverse("flights_review_list") + "?after=abc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_review_list_filters(self):
+        project_flight = self._create_flights(1, project="Ant survey")[0]
+        self.client.login(username="staff", password="pass")
+        response = self.client.get(
+            reverse("flights_review_list") + "?project=ant+survey&country=de"
+        )
+        self.assertEqual(response.context["flights"], [project_flight])
+        self.assertEqual(response.context["pending_count"], 1)
+
+    def test_bulk_review(self):
+        flights = [self.flight, *self._create_flights(2)]
+        self.client.login(username="staff", password="pass")
+        response = self.client.post(
+            reverse("flights_bulk_review"),
+            {"flights": [flight.pk for flight in flights[:2]], "action": "review"},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(Flight.objects.filter(reviewed=False)), flights[2:])
+
+    def test_bulk_delete(self):
+        flights = [self.flight, *self._create_flights(2)]
+        self.client.login(username="staff", password="pass")
+        self.client.post(
+            reverse("flights_bulk_review"),
+            {"flights": [flight.pk for flight in flights[1:]], "action": "delete"},
+        )
+        self.assertEqual(list(Flight.objects.all()), [self.flight])
+
+    def test_bulk_review_requires_staff(self):
+        self.client.post(
+            reverse("flights_bulk_review"),
+            {"flights": [self.flight.pk], "action": "review"},
+        )
+        self.flight.refresh_from_db()
+        self.assertFalse(self.flight.reviewed)
+
+
+class FlightClustersViewTest(TestCase):
+    def setUp(self):
+        genus = Genus.objects.create(name="Lasius")
+        ant_species = AntSpecies.objects.create(
+            name="Lasius niger", valid=True, genus=genus, slug="lasius-niger"
+        )
+        region = AntRegion.objects.create(name="Germany", code="DE", type="Country")
+        self.flight = Flight.objects.create(
+            ant_species=ant_species,
+            date="2024-05-15",
+            latitude=50.0,
+            longitude=10.0,
+            country=region,
+        )
+        self.url = reverse("flights_clusters")
+
+    def test_clusters_at_low_zoom(self):
+        response = self.client.get(self.url + "?bbox=-180,-85,180,85&zoom=3")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["points"], [])
+        self.assertEqual(len(data["clusters"]), 1)
+        self.assertEqual(data["clusters"][0]["count"], 1)
+        self.assertEqual(data["clusters"][0]["ant"], "Lasius niger")
+
+    def test_points_at_high_zoom(self):
+        response = self.client.get(self.url + "?bbox=9.9,49.9,10.1,50.1&zoom=15")
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["clusters"], [])
+        self.assertEqual(data["points"][0]["id"], self.flight.id)
+
+    def test_year_filter(self):
+        response = self.client.get(self.url + "?bbox=-180,-85,180,85&zoom=3&year=2000")
+        self.assertEqual(response.json()["clusters"], [])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        response = self.client.get(self.url + "?bbox=1,2,3&zoom=3")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url + "?bbox=-180,-85,180,85&zoom=x")
+        self.assertEqual(response.status_code, 400)
+        for bbox in ("nan,0,10,10", "-inf,0,10,10", "0,0,10,1e999"):
+            response = self.client.get(self.url + f"?bbox={bbox}&zoom=3")
+            self.assertEqual(response.status_code, 400)
@@ -0,0 +1,105 @@
+"""
+Flight counts bucketed by day, week or month.
+
+Results are cached per normalized parameter set. All cached results are
+invalidated at once by bumping a version number which is part of the
+cache keys whenever a flight changes.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import Trunc
+
+from ants.utils import cache_versions
+
+from .models import Flight
+
+INTERVALS = ("day", "week", "month")
+TIMESERIES_VERSION_CACHE_KEY = "flights_timeseries_version"
+TIMESERIES_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def normalize_parameters(
+    interval="month",
+    species=None,
+    genus=None,
+    country=None,
+    year_from=None,
+    year_to=None,
+):
+    """
+    Return the parameters as dictionary with normalized values. Raise
+    ValueError for unknown intervals or years which are not numbers.
+    """
+    interval = (interval or "month").lower()
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+
+    def normalize_string(value):
+        return value.strip().lower() if value and value.strip() else None
+
+    def normalize_year(value):
+        return int(value) if value not in (None, "") else None
+
+    return {
+        "interval": interval,
+        "species": normalize_string(species),
+        "genus": normalize_string(genus),
+        "country": normalize_string(country),
+        "year_from": normalize_year(year_from),
+        "year_to": normalize_year(year_to),
+    }
+
+
+def _query(interval, species, genus, country, year_from, year_to):
+    flights = Flight.objects.all()
+    if species:
+        flights = flights.filter(ant_species__slug=species)
+    if genus:
+        flights = flights.filter(ant_species__genus__name__iexact=genus)
+    if country:
+        flights = flights.filter(country__code__iexact=country)
+    if year_from is not None:
+        flights = flights.filter(date__year__gte=year_from)
+    if year_to is not None:
+        flights = flights.filter(date__year__lte=year_to)
+
+    buckets = (
+        flights.annotate(bucket=Trunc("date", interval))
+        .values("bucket")
+        .annotate(count=Count("id"))
+        .order_by("bucket")
+        .values_list("bucket", "count")
+    )
+    return [{"date": bucket.isoformat(), "count": count} for bucket, count in buckets]
+
+
+def _cache_key(parameters):
+    version = cache_versions.get_version(TIMESERIES_VERSION_CACHE_KEY)
+    digest = hashlib.sha1(
+        json.dumps(parameters, sort_keys=True).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"flights_timeseries:{version}:{digest}"
+
+
+def flight_timeseries(**parameters):
+    """
+    Return the number of flights per bucket as list of dictionaries with
+    date (first day of the bucket) and count. See normalize_parameters for
+    the supported parameters.
+    """
+    parameters = normalize_parameters(**parameters)
+    key = _cache_key(parameters)
+    buckets = cache.get(key)
+    if buckets is None:
+        buckets = _query(**parameters)
+        cache.set(key, buckets, timeout=TIMESERIES_CACHE_TIMEOUT)
+    return buckets
+
+
+def invalidate_timeseries():
+    """Invalidate all cached time series."""
+    cache_versions.bump_versions(TIMESERIES_VERSION_CACHE_KEY)
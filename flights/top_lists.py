@@ -0,0 +1,98 @@
+"""
+Leaderboards of the flights top lists page.
+
+All leaderboards are built with a few aggregating queries and stored as
+a single snapshot in the cache. The snapshot is dropped whenever a flight
+changes and rebuilt on the next read.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Flight
+
+TOP_LISTS_CACHE_KEY = "flights_top_lists"
+TOP_LIST_SIZE = 10
+
+
+def _max_count(entries, key="count"):
+    return entries[0][key] if entries else 0
+
+
+def _top_external_users(flights):
+    external_users = list(
+        flights.filter(external_user__isnull=False)
+        .values(name=F("external_user"), hostname=F("link_hostname"))
+        .annotate(flight_count=Count("id"))
+        .order_by("-flight_count", "name")[:TOP_LIST_SIZE]
+    )
+    return {
+        "external_users": external_users,
+        "max_flights": _max_count(external_users, "flight_count"),
+    }
+
+
+def _top_websites(flights):
+    websites = list(
+        flights.filter(link_hostname__isnull=False)
+        .values(name=F("link_hostname"))
+        .annotate(count=Count("id"))
+        .order_by("-count", "name")
+    )
+    return {
+        "top_websites": websites,
+        "top_websites_max_reports": _max_count(websites),
+    }
+
+
+def _top_species(flights):
+    species = list(
+        flights.values(name=F("ant_species__name"))
+        .annotate(count=Count("id"))
+        .order_by("-count", "name")[:TOP_LIST_SIZE]
+    )
+    return {
+        "top_species": species,
+        "top_species_max_reports": _max_count(species),
+    }
+
+
+def _top_countries(flights):
+    countries = list(
+        flights.values(name=F("country__name"))
+        .annotate(count=Count("id"))
+        .order_by("-count", "name")[:TOP_LIST_SIZE]
+    )
+    return {
+        "top_countries": countries,
+        "top_countries_max_reports": _max_count(countries),
+    }
+
+
+def build_top_lists():
+    """Build all leaderboards and store them as snapshot in the cache."""
+    flights = Flight.objects.all()
+    top_lists = {
+        **_top_external_users(flights),
+        **_top_websites(flights),
+        **_top_species(flights),
+        **_top_countries(flights),
+    }
+    cache.set(TOP_LISTS_CACHE_KEY, top_lists, timeout=None)
+    return top_lists
+
+
+def get_top_lists():
+    """Return the leaderboards snapshot, building it if necessary."""
+    top_lists = cache.get(TOP_LISTS_CACHE_KEY)
+    if top_lists is None:
+        top_lists = build_top_lists()
+    return top_lists
+
+
+def invalidate_top_lists():
+    """Drop the leaderboards snapshot."""
+    cache.delete(TOP_LISTS_CACHE_KEY)
+    # other requests could build the snapshot of the old data before the commit
+    transaction.on_commit(lambda: cache.delete(TOP_LISTS_CACHE_KEY))
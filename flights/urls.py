@@ -7,7 +7,18 @@ from . import views
 urlpatterns = [
     path("", views.FlightsMapView.as_view(), name="flights_map"),
     path("list/", views.FlightsListView.as_view(), name="flights_list"),
+    path("clusters/", views.FlightClustersView.as_view(), name="flights_clusters"),
     path("review/", views.FlightsReviewListView.as_view(), name="flights_review_list"),
+    path(
+        "review/bulk",
+        views.FlightsBulkReviewView.as_view(),
+        name="flights_bulk_review",
+    ),
+    path(
+        "info-windows/",
+        views.FlightInfoWindowsView.as_view(),
+        name="flight_info_windows",
+    ),
     path(
         "<int:pk>/info-window",
         views.FlightInfoWindow.as_view(),
@@ -1,14 +1,19 @@
 """Module which contains all views of flights app."""
 
 import logging
+import math
+from datetime import datetime
+from urllib.parse import urlencode
 
 from dal import autocomplete
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Count, F, Func, Value
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Func, Q, Value
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
-from django.urls import reverse_lazy
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
 from django.views.decorators.clickjacking import xframe_options_exempt
@@ -23,7 +28,9 @@ from taggit.models import Tag
 
 from ants.views import add_iframe_to_context
 
-from .models import Flight
+from . import map_grid, top_lists
+from .models import Flight, FlightFrequency
+from .packing import POINT_FIELDS, pack_flights
 
 logger = logging.getLogger(__name__)
 
@@ -45,9 +52,30 @@ class FlightsMapView(TemplateView):
         return context
 
 
+def _flight_points(flights):
+    """Return values() rows of flights as list of map points."""
+    return [
+        {
+            "id": flight.get("id"),
+            "lat": flight.get("latitude"),
+            "lng": flight.get("longitude"),
+            "ant": flight.get("ant_species__name"),
+        }
+        for flight in flights
+    ]
+
+
+def _is_packed(request):
+    return request.GET.get("format") == "packed"
+
+
 @method_decorator(never_cache, name="dispatch")
 class FlightsListView(ListView):
-    """List view for flights."""
+    """
+    List view for flights.
+    If the 'format' parameter is 'packed' the flights are returned in
+    the compact packed format (see flights.packing).
+    """
 
     model = Flight
 
@@ -56,38 +84,211 @@ class FlightsListView(ListView):
         year = request.GET.get("year")
         if year and year != "all":
             qs = qs.filter(date__year=year)
-        qs = qs.values("id", "latitude", "longitude", "ant_species__name")
-        data = [
-            {
-                "id": flight.get("id"),
-                "lat": flight.get("latitude"),
-                "lng": flight.get("longitude"),
-                "ant": flight.get("ant_species__name"),
+        qs = qs.values(*POINT_FIELDS)
+        if _is_packed(request):
+            return JsonResponse(pack_flights(qs), status=200)
+        return JsonResponse(_flight_points(qs), status=200, safe=False)
+
+
+@method_decorator(never_cache, name="dispatch")
+class FlightClustersView(View):
+    """
+    Returns the flight clusters inside the requested bounding box.
+    Above the maximum cluster zoom level single flights are returned,
+    packed if the 'format' parameter is 'packed'.
+    """
+
+    def get(self, request):
+        try:
+            bbox = [float(value) for value in request.GET.get("bbox", "").split(",")]
+            zoom = int(request.GET.get("zoom", ""))
+        except ValueError:
+            return HttpResponse(status=400)
+        if len(bbox) != 4 or zoom < 0 or not all(map(math.isfinite, bbox)):
+            return HttpResponse(status=400)
+
+        year = request.GET.get("year")
+        if year and year != "all":
+            try:
+                year = int(year)
+            except ValueError:
+                return HttpResponse(status=400)
+        else:
+            year = None
+        species = request.GET.get("species", "").strip()
+
+        if zoom > map_grid.MAX_CLUSTER_ZOOM:
+            points = map_grid.points(bbox, year, species)
+            if _is_packed(request):
+                points = pack_flights(points)
+            else:
+                points = _flight_points(points)
+            data = {"clusters": [], "points": points}
+        else:
+            data = {
+                "clusters": map_grid.clusters(bbox, zoom, year, species),
+                "points": [],
             }
-            for flight in qs
-        ]
-        return JsonResponse(data, status=200, safe=False)
+        return JsonResponse(data, status=200)
+
+
+# Maximum number of flights of a FlightInfoWindowsView request.
+MAX_INFO_WINDOWS = 100
+
+
+def _info_window_queryset():
+    """Return flights with everything their info window shows loaded."""
+    return Flight.objects.select_related(
+        "ant_species", "country", "temperature", "wind_speed"
+    ).prefetch_related("habitat")
 
 
 class FlightInfoWindow(DetailView):
     """View for google maps info window."""
 
     template_name = "flights/info_window.html"
-    model = Flight
     context_object_name = "flight"
 
+    def get_queryset(self):
+        return _info_window_queryset()
+
+
+class FlightInfoWindowsView(View):
+    """
+    Returns the rendered info windows of the flights with the ids passed
+    as comma separated 'ids' parameter (at most MAX_INFO_WINDOWS).
+    """
+
+    def get(self, request):
+        try:
+            ids = {int(value) for value in request.GET.get("ids", "").split(",")}
+        except ValueError:
+            return HttpResponse(status=400)
+        if len(ids) > MAX_INFO_WINDOWS:
+            return HttpResponse(status=400)
+
+        flights = _info_window_queryset().filter(pk__in=ids)
+        info_windows = {
+            flight.pk: render_to_string(
+                FlightInfoWindow.template_name, {"flight": flight}, request
+            )
+            for flight in flights
+        }
+        return JsonResponse({"flights": info_windows}, status=200)
+
+
+REVIEW_PAGE_SIZE = 50
+# Pending flights are counted up to this number only.
+REVIEW_COUNT_LIMIT = 1000
+REVIEW_FILTERS = ("species", "country", "project")
+
+
+def _review_queue(params):
+    """
+    Return the not yet reviewed flights filtered by the species, country
+    and project parameters.
+    """
+    flights = Flight.objects.filter(reviewed=False)
+    if params.get("species"):
+        flights = flights.filter(ant_species__name__icontains=params["species"])
+    if params.get("country"):
+        flights = flights.filter(country__code__iexact=params["country"])
+    if params.get("project"):
+        flights = flights.filter(project__iexact=params["project"])
+    return flights
+
+
+def _encode_review_cursor(flight):
+    return f"{flight.created_at.isoformat()}_{flight.pk}"
+
+
+def _decode_review_cursor(cursor):
+    created_at, pk = cursor.rsplit("_", 1)
+    return datetime.fromisoformat(created_at), int(pk)
+
 
 @method_decorator(staff_member_required, name="dispatch")
 @method_decorator(never_cache, name="dispatch")
-class FlightsReviewListView(ListView):
-    """Displays all not yet reviewed flights."""
+class FlightsReviewListView(TemplateView):
+    """
+    Displays the not yet reviewed flights, oldest first. The flights are
+    paginated by (created_at, id): the 'after' parameter contains the
+    position of the last flight of the previous page.
+    """
 
-    model = Flight
     template_name = "flights/flights_review.html"
-    queryset = model.objects.filter(reviewed=False).select_related(
-        "ant_species", "country"
-    )
-    context_object_name = "flights"
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.after = (
+                _decode_review_cursor(request.GET["after"])
+                if request.GET.get("after")
+                else None
+            )
+        except ValueError:
+            return HttpResponse(status=400)
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        filters = {
+            name: self.request.GET.get(name, "").strip() for name in REVIEW_FILTERS
+        }
+        queue = _review_queue(filters)
+
+        flights = queue.select_related("ant_species", "country").order_by(
+            "created_at", "id"
+        )
+        if self.after is not None:
+            created_at, pk = self.after
+            flights = flights.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+            )
+        flights = list(flights[: REVIEW_PAGE_SIZE + 1])
+        has_next = len(flights) > REVIEW_PAGE_SIZE
+        flights = flights[:REVIEW_PAGE_SIZE]
+
+        pending_count = queue[: REVIEW_COUNT_LIMIT + 1].count()
+        context["flights"] = flights
+        context["filters"] = filters
+        context["filter_query"] = urlencode(filters)
+        context["pending_count"] = min(pending_count, REVIEW_COUNT_LIMIT)
+        context["pending_count_exceeded"] = pending_count > REVIEW_COUNT_LIMIT
+        if has_next:
+            context["next_query"] = urlencode(
+                {**filters, "after": _encode_review_cursor(flights[-1])}
+            )
+        return context
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class FlightsBulkReviewView(View):
+    """
+    Marks the selected not yet reviewed flights as reviewed or deletes
+    them, depending on the 'action' parameter.
+    """
+
+    def post(self, request):
+        try:
+            ids = [int(pk) for pk in request.POST.getlist("flights")]
+        except ValueError:
+            return HttpResponse(status=400)
+        action = request.POST.get("action")
+        if action not in ("review", "delete"):
+            return HttpResponse(status=400)
+
+        flights = Flight.objects.filter(pk__in=ids, reviewed=False)
+        with transaction.atomic():
+            if action == "review":
+                flights.update(reviewed=True)
+            else:
+                flights.delete()
+
+        url = reverse("flights_review_list")
+        filter_query = urlencode(
+            {name: request.POST.get(name, "") for name in REVIEW_FILTERS}
+        )
+        return redirect(f"{url}?{filter_query}")
 
 
 @method_decorator(staff_member_required, name="dispatch")
@@ -114,7 +315,7 @@ class FlightStatisticView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         ants = (
-            Flight.objects.values("ant_species__slug", "ant_species__name")
+            FlightFrequency.objects.values("ant_species__slug", "ant_species__name")
             .distinct()
             .order_by("ant_species__name")
         )
@@ -139,7 +340,6 @@ class HabitatTagAutocomplete(autocomplete.Select2QuerySetView):
         return qs.distinct().order_by("name")
 
 
-
 class RegexpReplace(Func):
     function = "REGEXP_REPLACE"
 
@@ -161,79 +361,6 @@ class TopLists(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        qs = Flight.objects
-        self.add_top_external_users(qs, context)
-        self.add_top_external_websites(qs, context)
-        self.add_top_species(qs, context)
-        self.add_top_countries(qs, context)
+        context.update(top_lists.get_top_lists())
 
         return context
-
-    def add_top_external_users(self, query_set, context):
-        flights = query_set.filter(external_user__isnull=False).order_by(
-            "external_user", "link", "date"
-        )
-
-        external_users = []
-        last_username = None
-        last_hostname = None
-        for flight in flights:
-            if (
-                flight.external_user != last_username
-                or flight.link_host != last_hostname
-            ):
-                last_username = flight.external_user
-                last_hostname = flight.link_host
-                external_user = {}
-                external_user["name"] = last_username
-                external_user["hostname"] = last_hostname
-                external_user["flight_count"] = 0
-                external_users.append(external_user)
-
-            last_external_user = external_users[-1]
-            last_external_user["flight_count"] += 1
-
-        external_users.sort(
-            key=lambda external_user: external_user["flight_count"], reverse=True
-        )
-        context["external_users"] = external_users[:10]
-        context["max_flights"] = external_users[0]["flight_count"]
-
-    def add_top_external_websites(self, query_set, context):
-        flights = query_set.exclude(link__isnull=True).order_by("link", "date")
-
-        websites = []
-        last_website_name = None
-        for flight in flights:
-            if flight.link_host != last_website_name:
-                last_website_name = flight.link_host
-                website = {}
-                website["name"] = last_website_name
-                website["count"] = 0
-                websites.append(website)
-
-            if len(websites) > 1:
-                last_website = websites[-1]
-                last_website["count"] += 1
-
-        websites.sort(key=lambda website: website["count"], reverse=True)
-        context["top_websites"] = websites
-        context["top_websites_max_reports"] = websites[0]["count"]
-
-    def add_top_species(self, query_set, context):
-        species = (
-            query_set.values(name=F("ant_species__name"))
-            .annotate(count=Count("name"))
-            .order_by("-count")
-        )[:10]
-        context["top_species"] = species
-        context["top_species_max_reports"] = species.first()["count"]
-
-    def add_top_countries(self, query_set, context):
-        countries = (
-            query_set.values(name=F("country__name"))
-            .annotate(count=Count("name"))
-            .order_by("-count")
-        )[:10]
-        context["top_countries"] = countries
-        context["top_countries_max_reports"] = countries.first()["count"]
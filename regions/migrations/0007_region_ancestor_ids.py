@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:04
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def populate_ancestor_ids(apps, schema_editor):
+    Region = apps.get_model("regions", "Region")
+    parents = dict(Region.objects.values_list("pk", "parent_id"))
+    regions = []
+    for region_id in parents:
+        ancestor_ids = []
+        parent_id = parents[region_id]
+        # stop at cycles, they cannot be represented
+        while parent_id is not None and parent_id not in ancestor_ids:
+            ancestor_ids.insert(0, parent_id)
+            parent_id = parents.get(parent_id)
+        regions.append(Region(pk=region_id, ancestor_ids=ancestor_ids))
+    Region.objects.bulk_update(regions, ["ancestor_ids"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("regions", "0006_alter_region_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="region",
+            name="ancestor_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.BigIntegerField(),
+                blank=True,
+                default=list,
+                editable=False,
+                size=None,
+            ),
+        ),
+        migrations.RunPython(populate_ancestor_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="region",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["ancestor_ids"], name="region_ancestor_ids_idx"
+            ),
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.utils.translation import gettext as _
 
@@ -22,17 +25,71 @@ class Region(models.Model):
     parent = models.ForeignKey(
         "Region", models.SET_NULL, blank=True, null=True, related_name="children"
     )
+    # ids of all parents from the topmost region down to the parent
+    ancestor_ids = ArrayField(
+        models.BigIntegerField(), default=list, blank=True, editable=False
+    )
 
     class Meta:
         verbose_name = _("Region")
         verbose_name_plural = _("Regions")
         ordering = ["type", "name"]
+        indexes = [GinIndex(fields=["ancestor_ids"], name="region_ancestor_ids_idx")]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
 
+    def clean(self):
+        super().clean()
+        if self.pk is not None and self.pk in self._get_ancestor_ids():
+            raise ValidationError(
+                {"parent": _("A region cannot be a descendant of itself.")}
+            )
+
     def save(
         self, force_insert=False, force_update=False, using=None, update_fields=None
     ):
         self.slug = slugify(self.name)
-        super().save(force_insert, force_update, using, update_fields)
+        if update_fields is not None and "parent" not in update_fields:
+            super().save(force_insert, force_update, using, update_fields)
+            return
+        if update_fields is not None:
+            update_fields = {*update_fields, "ancestor_ids"}
+
+        ancestor_ids = self._get_ancestor_ids()
+        if self.pk is not None and self.pk in ancestor_ids:
+            raise ValueError("A region cannot be a descendant of itself.")
+        changed = self.pk is not None and ancestor_ids != self.ancestor_ids
+        self.ancestor_ids = ancestor_ids
+        with transaction.atomic(using=using):
+            super().save(force_insert, force_update, using, update_fields)
+            if changed:
+                replace_ancestors(self.pk, [*ancestor_ids, self.pk])
+
+    def _get_ancestor_ids(self):
+        """Return the ancestor ids of the region based on its parent."""
+        if self.parent_id is None:
+            return []
+        parent_ancestor_ids = (
+            Region.objects.filter(pk=self.parent_id)
+            .values_list("ancestor_ids", flat=True)
+            .get()
+        )
+        return [*parent_ancestor_ids, self.parent_id]
+
+
+def replace_ancestors(region_id, ancestor_ids):
+    """
+    Replace the ancestors of all descendants of a region up to and including
+    the region with ancestor_ids.
+    """
+    descendants = list(
+        Region.objects.filter(ancestor_ids__contains=[region_id]).only("ancestor_ids")
+    )
+    for descendant in descendants:
+        position = descendant.ancestor_ids.index(region_id)
+        descendant.ancestor_ids = [
+            *ancestor_ids,
+            *descendant.ancestor_ids[position + 1 :],
+        ]
+    Region.objects.bulk_update(descendants, ["ancestor_ids"], batch_size=1000)
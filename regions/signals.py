@@ -0,0 +1,15 @@
+"""Signal receivers of regions app."""
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Region, replace_ancestors
+
+
+@receiver(post_delete, sender=Region)
+def remove_deleted_ancestor(sender, instance, **kwargs):
+    """
+    Remove a deleted region from the ancestors of its descendants. The
+    parent of its children is set to null without saving them.
+    """
+    replace_ancestors(instance.pk, [])
@@ -1 +1,55 @@
-# Create your tests here.
+from django.core.exceptions import ValidationError
+from django.forms import modelform_factory
+from django.test import TestCase
+
+from regions.models import Region
+
+
+class RegionAncestorsTest(TestCase):
+    def setUp(self):
+        self.europe = Region.objects.create(name="Europe", type="Continent")
+        self.germany = Region.objects.create(
+            name="Germany", type="Country", parent=self.europe
+        )
+        self.bavaria = Region.objects.create(
+            name="Bavaria", type="State", parent=self.germany
+        )
+
+    def test_ancestor_ids(self):
+        self.assertEqual(self.europe.ancestor_ids, [])
+        self.assertEqual(self.germany.ancestor_ids, [self.europe.pk])
+        self.assertEqual(self.bavaria.ancestor_ids, [self.europe.pk, self.germany.pk])
+
+    def test_moving_updates_descendants(self):
+        eurasia = Region.objects.create(name="Eurasia", type="Continent")
+        self.germany.parent = eurasia
+        self.germany.save()
+        self.bavaria.refresh_from_db()
+        self.assertEqual(self.bavaria.ancestor_ids, [eurasia.pk, self.germany.pk])
+
+        self.germany.parent = None
+        self.germany.save(update_fields=["parent"])
+        self.bavaria.refresh_from_db()
+        self.assertEqual(self.bavaria.ancestor_ids, [self.germany.pk])
+
+    def test_deleting_removes_ancestor(self):
+        self.europe.delete()
+        self.bavaria.refresh_from_db()
+        self.assertEqual(self.bavaria.ancestor_ids, [self.germany.pk])
+
+    def test_cycle(self):
+        self.europe.parent = self.bavaria
+        with self.assertRaises(ValidationError) as context:
+            self.europe.full_clean()
+        self.assertIn("parent", context.exception.message_dict)
+        with self.assertRaises(ValueError):
+            self.europe.save()
+
+    def test_cycle_is_a_form_error(self):
+        form_class = modelform_factory(Region, fields=["name", "type", "parent"])
+        form = form_class(
+            {"name": "Europe", "type": "Continent", "parent": self.bavaria.pk},
+            instance=self.europe,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn("parent", form.errors)
@@ -15,15 +15,16 @@ from .forms import AddAntspeciesToRegionForm
 
 def add_distribution(ant_species, ant_region):
     Distribution.objects.create(species=ant_species, region=ant_region)
-    # check if parent object has this species too
-    parent_region = ant_region.parent
-    if (
-        parent_region
-        and not Distribution.objects.filter(
-            species=ant_species, region=parent_region
-        ).exists()
-    ):
-        add_distribution(ant_species, parent_region)
+    # add the species to the parent regions up to the first one which has it
+    existing_region_ids = set(
+        Distribution.objects.filter(
+            species=ant_species, region_id__in=ant_region.ancestor_ids
+        ).values_list("region_id", flat=True)
+    )
+    for region_id in reversed(ant_region.ancestor_ids):
+        if region_id in existing_region_ids:
+            break
+        Distribution.objects.create(species=ant_species, region_id=region_id)
 
 
 # Create your views here.